@@ -1 +1,2 @@
-from .database_interaction import *
\ No newline at end of file
+from .database_interaction import *
+from .http_client import *
\ No newline at end of file
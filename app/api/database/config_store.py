@@ -0,0 +1,248 @@
+import os
+import copy
+import json
+import time
+import random
+import asyncio
+import threading
+from pathlib import Path
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type, TypeVar
+from app.utils.metrics import metrics
+
+T = TypeVar("T", bound=BaseModel)
+
+# Config keys read by the service, fetched together on the first lookup
+CONFIG_KEYS = (
+    "api_keys", "llm", "rag", "summarizer", "task_classifier",
+    "inference", "inference_pool", "embedding", "embedding_cache", "model_loading",
+    "warmup", "translation", "speculation", "context_packing", "retrieval",
+    "retrieval_cache", "history_cache", "persistence", "http_client", "image_store",
+    "image_fetch", "response_cache", "history_summary",
+)
+
+class ConfigStore:
+    """
+    In-process cache of the JSON configs stored in Redis.
+
+    The first lookup fetches every known key in one MGET round trip; later lookups are
+    served from memory, and a key not seen before costs one extra GET. A background task
+    subscribed to a pub/sub channel reloads the keys named in change notifications (a
+    message of "*" reloads everything), then calls the registered change callbacks. When
+    a snapshot path is set, every successful load is written there, and the snapshot is
+    used whenever Redis is unreachable, so the service can start without Redis. Missing
+    keys are cached (and snapshotted) as None too, so optional configs that are not
+    deployed do not cost a Redis round trip per lookup.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        async_client: Any = None,
+        keys: Iterable[str] = CONFIG_KEYS,
+        snapshot_path: str = None,
+        channel: str = "config:changes"
+    ):
+        """
+        Args:
+            client (Any): Synchronous Redis client, used for lookups outside the event loop.
+            async_client (Any, optional): Async Redis client for pub/sub and reloads.
+            keys (Iterable[str]): Config keys loaded together up front.
+            snapshot_path (str, optional): JSON file holding the last loaded configs. It may
+                contain secrets (e.g. "api_keys") and is written with owner-only permissions.
+            channel (str): Pub/sub channel carrying the names of changed keys.
+        """
+        self.client = client
+        self.async_client = async_client
+        self.keys = list(keys)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.channel = channel
+        self._values: Dict[str, Optional[dict]] = {}
+        self._typed: Dict[tuple, BaseModel] = {}
+        self._callbacks: List[Callable[[List[str]], None]] = []
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _parse(raw: Any) -> Optional[dict]:
+        if raw is None:
+            return None
+        return json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+    def _store(self, names: List[str], raws: List[Any]) -> List[str]:
+        """Cache freshly read values and return the names whose value changed."""
+        parsed = [self._parse(raw) for raw in raws]
+        with self._lock:
+            changed = [name for name, value in zip(names, parsed) if self._values.get(name) != value or name not in self._values]
+            self._values.update(zip(names, parsed))
+            self._typed = {key: value for key, value in self._typed.items() if key[0] not in changed}
+            self._loaded = True
+        return changed
+
+    def _read_snapshot(self) -> bool:
+        """Load every config from the snapshot file; returns False if there is none."""
+        if self.snapshot_path is None or not self.snapshot_path.is_file():
+            return False
+        values = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._values.update(values)
+            self._loaded = True
+        metrics.increment("config.loads", source="snapshot")
+        print(f"[Config] Loaded {len(values)} configs from snapshot {self.snapshot_path}")
+        return True
+
+    def _write_snapshot(self) -> None:
+        """Write the cached configs to the snapshot file (missing keys as null), replacing it atomically."""
+        if self.snapshot_path is None:
+            return
+        with self._lock:
+            values = dict(self._values)
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.snapshot_path.with_suffix(".tmp")
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(values, f)
+            os.replace(temp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"[Config] Failed to write snapshot: {e}")
+
+    def load(self) -> None:
+        """
+        Fetch every known key from Redis in one round trip, falling back to the snapshot.
+
+        Raises:
+            Exception: If Redis is unreachable and there is no snapshot.
+        """
+        names = list(dict.fromkeys([*self.keys, *self._values]))
+        start_time = time.perf_counter()
+        try:
+            raws = self.client.mget(names)
+        except Exception as e:
+            print(f"[Config] Redis unavailable ({e}); trying the snapshot")
+            if self._read_snapshot():
+                return
+            raise
+        self._store(names, raws)
+        metrics.increment("config.loads", source="redis")
+        metrics.observe("config.load_seconds", time.perf_counter() - start_time)
+        self._write_snapshot()
+
+    def get(self, name: str) -> Optional[dict]:
+        """
+        Return a copy of a config, or None if the key does not exist.
+
+        Args:
+            name (str): Redis key name.
+
+        Returns:
+            Optional[dict]: The parsed config.
+        """
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            cached = name in self._values
+            value = self._values.get(name)
+        if not cached:
+            # A key outside the known set: fetch it once and include it in later reloads
+            try:
+                value = self._parse(self.client.get(name))
+            except Exception:
+                if not self._read_snapshot():
+                    raise
+                with self._lock:
+                    # Cache a miss too, so Redis is not retried on every lookup; the listener
+                    # reloads every cached key once it reconnects
+                    value = self._values.setdefault(name, None)
+            else:
+                with self._lock:
+                    self._values[name] = value
+        return copy.deepcopy(value)
+
+    def get_typed(self, name: str, model: Type[T]) -> T:
+        """
+        Return a config validated into a pydantic model, cached until the key changes.
+
+        Raises:
+            KeyError: If the key does not exist.
+            pydantic.ValidationError: If the config does not match the model.
+        """
+        typed = self._typed.get((name, model))
+        if typed is None:
+            value = self.get(name)
+            if value is None:
+                raise KeyError(f"Config '{name}' not found in Redis.")
+            typed = self._typed[(name, model)] = model.model_validate(value)
+        return typed
+
+    def on_change(self, callback: Callable[[List[str]], None]) -> None:
+        """Register a callback receiving the names of configs changed by a reload."""
+        self._callbacks.append(callback)
+
+    async def reload(self, names: Iterable[str] = None) -> List[str]:
+        """
+        Re-read configs from Redis (all cached keys by default) and notify callbacks.
+
+        Returns:
+            List[str]: The names whose value changed.
+        """
+        names = list(dict.fromkeys(names or [*self.keys, *self._values]))
+        raws = await self.async_client.mget(names)
+        changed = self._store(names, raws)
+        metrics.increment("config.loads", source="reload")
+        if changed:
+            print(f"[Config] Reloaded {', '.join(changed)}")
+            await asyncio.to_thread(self._write_snapshot)
+            for callback in self._callbacks:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    print(f"[Config] Change callback failed: {e}")
+        return changed
+
+    async def publish(self, name: str, value: dict) -> None:
+        """Write a config to Redis and notify every replica of the change."""
+        await self.async_client.set(name, json.dumps(value))
+        await self.async_client.publish(self.channel, name)
+
+    async def _listen(self) -> None:
+        """Follow change notifications, resubscribing with backoff if the connection drops."""
+        attempt = 0
+        while True:
+            pubsub = self.async_client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Catch up on changes published while we were not subscribed
+                await self.reload()
+                attempt = 0
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    name = data.decode("utf-8") if isinstance(data, bytes) else str(data)
+                    await self.reload(None if name == "*" else [name])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.increment("config.listener_errors")
+                print(f"[Config] Change listener failed: {e}")
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+            attempt += 1
+            await asyncio.sleep(random.uniform(0, min(30.0, 2 ** attempt)))
+
+    def start(self) -> None:
+        """Start following change notifications in the background (needs the async client)."""
+        if self.async_client is not None and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop following change notifications."""
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
@@ -1,11 +1,37 @@
 
-import httpx
-from .redis_client import get_config
+from app.utils.metrics import metrics
 from app.schemas.message import Message
+from .http_client import get_http_client
+from .history_cache import ConversationHistoryCache
+from .persistence_queue import PersistenceQueue, PermanentWriteError
 from app.utils.common import serialize_image
+from app.utils.text_processing import RetrievalCache, local_hybrid_search
+from app.schemas.config import ApiKeysConfig
+from .redis_client import get_optional_config, get_typed_config, binary_redis_client
 from qdrant_client.conversions import common_types as types
 
-DATA_URL = get_config("api_keys")["DATA_URL"]
+DATA_URL = get_typed_config("api_keys", ApiKeysConfig).DATA_URL
+
+# Hybrid search results shared across replicas, invalidated by collection version
+retrieval_cache = RetrievalCache(config=get_optional_config("retrieval_cache"), redis_client=binary_redis_client)
+
+# Rendered recent conversations per user, invalidated as turns are answered
+history_cache = ConversationHistoryCache(config=get_optional_config("history_cache"), redis_client=binary_redis_client)
+
+async def _fetch_recent_conversations(collection_name: str, limit: int, base_url: str) -> str:
+    """Request the history rendered by the data service."""
+    params = {"collection_name": collection_name, "limit": limit}
+
+    response = await get_http_client().get(
+        f"{base_url}/api/model_query/recent_conversations",
+        endpoint="recent_conversations",
+        params=params
+    )
+
+    if response.status_code != 200:
+        raise Exception(f"Request failed: {response.status_code} - {response.text}")
+
+    return response.json().get("recent_conversations", "")
 
 async def get_recent_conversations(
     collection_name: str,
@@ -15,6 +41,9 @@ async def get_recent_conversations(
     """
     Calls the /recent_conversations endpoint and returns the conversation string.
 
+    When the history cache is enabled, the rendered history is served from the cache until
+    the user's next message invalidates it (see `call_add_message_endpoint`).
+
     Args:
         collection_name (str): Qdrant collection name.
         limit (int): Number of recent conversations to retrieve.
@@ -24,74 +53,128 @@ async def get_recent_conversations(
         str: Formatted conversation string, or error message.
     """
     try:
-        async with httpx.AsyncClient(base_url=base_url, timeout=10.0) as client:
-            response = await client.get(
-                "/api/model_query/recent_conversations",
-                params={"collection_name": collection_name, "limit": limit}
-            )
+        use_cache = history_cache.enabled and limit == history_cache.limit
+        cached = await history_cache.get(collection_name) if use_cache else None
+        if cached is not None:
+            metrics.increment("history_cache.hits")
+            return cached
 
-        if response.status_code != 200:
-            raise Exception(f"Request failed: {response.status_code} - {response.text}")
-
-        return response.json().get("recent_conversations", "")
+        recent_conversations = await _fetch_recent_conversations(collection_name, limit, base_url)
+        if use_cache:
+            metrics.increment("history_cache.misses")
+            await history_cache.put(collection_name, recent_conversations)
+        return recent_conversations
 
     except Exception as e:
         print(f"[Client Error] Failed to fetch recent conversations: {e}")
         return ""
 
-async def call_add_message_endpoint(conversation_id: str, message: Message, response: str):
+async def _post_add_message(item: dict) -> None:
+    """
+    Persist one queued message through the add_message endpoint.
+
+    Raises:
+        PermanentWriteError: If the data service rejects the message (4xx other than 408/429).
+        Exception: On transport errors and other failed responses, which are retried.
+    """
+    response_data = await get_http_client().post(
+        f"{item['base_url']}/api/conversations/{item['conversation_id']}/add_message",
+        endpoint="add_message",
+        json=item["payload"]
+    )
+
+    if response_data.status_code == 200:
+        if item.get("user_id") is not None:
+            # The stored turn is now part of the rendered history; drop any copy read before it landed
+            await history_cache.invalidate(item["user_id"])
+        return
+    error = f"Failed to add message: {response_data.status_code} - {response_data.text}"
+    if 400 <= response_data.status_code < 500 and response_data.status_code not in (408, 429):
+        raise PermanentWriteError(error)
+    raise Exception(error)
+
+# Messages are persisted write-behind, off the streaming path
+persistence_queue = PersistenceQueue(write=_post_add_message, config=get_optional_config("persistence"), name="add_message")
+
+async def call_add_message_endpoint(conversation_id: str, message: Message, response: str, user_id: str = None):
     """
-    Call the add_message endpoint via HTTP request.
+    Queue a message for the add_message endpoint.
+
+    The user's cached history is invalidated, here and again once the write lands, so the
+    next read fetches the data service's own rendering with the new turn. An image already held by the image store is sent
+    as its `image_hash` instead of the base64 payload. The HTTP request itself is sent by
+    the persistence queue, with retries; this only waits if the queue is full.
     """
     try:
         base_url = DATA_URL
+
+        if user_id is not None:
+            await history_cache.invalidate(user_id)
         
-        # Serialize the image if it exists
-        serialized_image = serialize_image(message.image)
-        
-        async with httpx.AsyncClient() as client:
-            response_data = await client.post(
-                f"{base_url}/api/conversations/{conversation_id}/add_message",
-                json={
-                    "content": message.content,
-                    "image": serialized_image,
-                    "timestamp": message.timestamp.isoformat(),
-                    "response": response
-                },
-                timeout=30.0
-            )
-            
-            if response_data.status_code != 200:
-                print(f"Failed to add message: {response_data.status_code} - {response_data.text}")
+        payload = {
+            "content": message.content,
+            "timestamp": message.timestamp.isoformat(),
+            "response": response
+        }
+        if message.image_hash:
+            # The image bytes are already in the image store; send only their hash
+            payload["image"] = None
+            payload["image_hash"] = message.image_hash
+        else:
+            # Serialize the image if it exists
+            payload["image"] = serialize_image(message.image)
+
+        await persistence_queue.enqueue({
+            "base_url": base_url,
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "payload": payload
+        })
                 
     except Exception as e:
         print(f"Error calling add_message endpoint: {str(e)}")
     
-async def call_hybrid_search(
+async def _hybrid_search(
     query: str,
     collection_name: str,
     limit: int,
-    base_url: str = DATA_URL
+    base_url: str = DATA_URL,
+    retrieval_config: dict = None
 ) -> list[types.QueryResponse]:
     """
-    Calls the hybrid_search endpoint and returns parsed Qdrant QueryResponses.
+    Calls the hybrid_search endpoint (uncached) and returns parsed Qdrant QueryResponses.
+
+    With `retrieval.mode = "local"` the search runs in-process against the local
+    index of the collection instead (see `local_hybrid_search`), with the same result shape.
 
     Args:
         query (str): Search query.
         collection_name (str): Name of Qdrant collection.
         limit (int): Number of results to return.
         base_url (str): Base URL of your FastAPI server.
+        retrieval_config (dict, optional): The "retrieval" config; read from Redis if omitted.
 
     Returns:
         List[types.QueryResponse]: A list of results from both dense and sparse searches.
     """
     try:
-        async with httpx.AsyncClient(base_url=base_url, timeout=10.0) as client:
-            response = await client.get(
-                "/api/model_query/hybrid_search",
-                params={"query": query, "collection_name": collection_name, "limit": limit}
+        # "remote" queries the data service; "local" searches memory-mapped indexes in-process
+        if retrieval_config is None:
+            retrieval_config = get_optional_config("retrieval")
+        if retrieval_config.get("mode", "remote") == "local":
+            return await local_hybrid_search(
+                query=query,
+                collection_name=collection_name,
+                limit=limit,
+                index_dir=retrieval_config.get("index_dir", "local_index")
             )
 
+        response = await get_http_client().get(
+            f"{base_url}/api/model_query/hybrid_search",
+            endpoint="hybrid_search",
+            params={"query": query, "collection_name": collection_name, "limit": limit}
+        )
+
         if response.status_code != 200:
             raise Exception(f"Hybrid search failed: {response.status_code} - {response.text}")
 
@@ -107,4 +190,38 @@ async def call_hybrid_search(
 
     except Exception as e:
         print(f"[Hybrid Search Error] {e}")
-        raise
\ No newline at end of file
+        raise
+
+async def call_hybrid_search(
+    query: str,
+    collection_name: str,
+    limit: int,
+    base_url: str = DATA_URL
+) -> list[types.QueryResponse]:
+    """
+    Return hybrid search results, served from the retrieval cache when possible.
+
+    Args:
+        query (str): Search query.
+        collection_name (str): Name of Qdrant collection.
+        limit (int): Number of results to return.
+        base_url (str): Base URL of your FastAPI server.
+
+    Returns:
+        List[types.QueryResponse]: A list of results from both dense and sparse searches.
+    """
+    # Results of the local index and the data service are cached apart, so a mode switch
+    # (hot-reloadable) never serves the other source's results
+    retrieval_config = get_optional_config("retrieval")
+    if retrieval_config.get("mode", "remote") == "local":
+        source = f"local:{retrieval_config.get('index_dir', 'local_index')}"
+    else:
+        source = f"remote:{base_url}"
+
+    return await retrieval_cache.get_or_search(
+        query=query,
+        collection_name=collection_name,
+        limit=limit,
+        search=lambda: _hybrid_search(query, collection_name, limit, base_url, retrieval_config),
+        source=source
+    )
\ No newline at end of file
@@ -0,0 +1,69 @@
+from typing import Any, Optional
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+
+class ConversationHistoryCache:
+    """
+    Per-user cache of the rendered `recent_conversations` history.
+
+    A miss fetches the history from the data service and caches it exactly as rendered there.
+    Answering a turn invalidates the user's entry: once when the message is queued and again
+    when the data service has stored it, so a read racing the write-behind cannot keep a
+    history missing that turn. Reads between turns (speculation, classification, the
+    rolling summary) are then served without a round trip. Entries live in Redis, shared
+    across replicas, or in process memory when no Redis client is given.
+    """
+
+    def __init__(self, config: dict = None, redis_client: Any = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "limit" (the history size that is
+                cached; other limits bypass the cache), "ttl_seconds", "local_size" and
+                "key_prefix".
+            redis_client (Any, optional): Async Redis client with `decode_responses=False`.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.limit = config.get("limit", 50)
+        self.ttl = config.get("ttl_seconds", 1800)
+        self.key_prefix = config.get("key_prefix", "history_cache")
+        self.redis_client = redis_client
+        self.local = TTLCache(max_size=config.get("local_size", 4096), ttl=self.ttl)
+
+    def key(self, user_id: str) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    async def get(self, user_id: str) -> Optional[str]:
+        """Return the cached rendered history, or None on a miss."""
+        if self.redis_client is None:
+            return self.local.get(user_id)
+        try:
+            raw = await self.redis_client.get(self.key(user_id))
+        except Exception as e:
+            print(f"[History Cache] Redis read failed: {e}")
+            metrics.increment("history_cache.errors")
+            return None
+        return raw.decode("utf-8") if raw is not None else None
+
+    async def put(self, user_id: str, history: str) -> None:
+        """Store a user's rendered history, replacing the previous one."""
+        if self.redis_client is None:
+            self.local.set(user_id, history)
+            return
+        try:
+            await self.redis_client.set(self.key(user_id), history.encode("utf-8"), ex=self.ttl)
+        except Exception as e:
+            print(f"[History Cache] Redis write failed: {e}")
+            metrics.increment("history_cache.errors")
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user's entry so the next read fetches the history again."""
+        if not self.enabled:
+            return
+        self.local.pop(user_id)
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.delete(self.key(user_id))
+            except Exception as e:
+                print(f"[History Cache] Redis delete failed: {e}")
+                metrics.increment("history_cache.errors")
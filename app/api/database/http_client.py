@@ -0,0 +1,150 @@
+import time
+import httpx
+from typing import Any, Dict
+from app.utils.metrics import metrics
+
+# Default per-endpoint read timeouts in seconds; overridable through the "timeouts" setting
+_DEFAULT_TIMEOUTS = {
+    "default": 10.0,
+    "recent_conversations": 10.0,
+    "hybrid_search": 10.0,
+    "add_message": 30.0,
+}
+
+class PooledHTTPClient:
+    """
+    Application-scoped `httpx.AsyncClient` for calls to the data service.
+
+    One client (and so one keep-alive connection pool, optionally HTTP/2) is shared by every
+    request instead of paying TCP/TLS handshakes per call. Each request uses its endpoint's
+    timeout and is traced to measure how long it waited for a pooled connection. In-flight and
+    waiting requests are counted here rather than read from httpx/httpcore internals.
+    """
+
+    def __init__(self, config: dict = None):
+        """
+        Args:
+            config (dict, optional): Settings "max_connections", "max_keepalive_connections",
+                "keepalive_expiry", "http2", "connect_timeout", "pool_timeout" and "timeouts"
+                (read timeout per endpoint name, with a "default").
+        """
+        config = config or {}
+        self.timeouts = {**_DEFAULT_TIMEOUTS, **config.get("timeouts", {})}
+        self.connect_timeout = config.get("connect_timeout", 5.0)
+        self.pool_timeout = config.get("pool_timeout", 5.0)
+        self.client = httpx.AsyncClient(
+            http2=config.get("http2", False),
+            limits=httpx.Limits(
+                max_connections=config.get("max_connections", 100),
+                max_keepalive_connections=config.get("max_keepalive_connections", 20),
+                keepalive_expiry=config.get("keepalive_expiry", 30.0),
+            ),
+        )
+        # Requests sent through this client that have not completed / not yet got a connection
+        self._in_flight = 0
+        self._waiting = 0
+
+    def timeout(self, endpoint: str) -> httpx.Timeout:
+        """Timeout for an endpoint: its read timeout plus the shared connect and pool timeouts."""
+        read = self.timeouts.get(endpoint, self.timeouts["default"])
+        return httpx.Timeout(read, connect=self.connect_timeout, pool=self.pool_timeout)
+
+    async def request(self, method: str, url: str, endpoint: str = "default", **kwargs: Any) -> httpx.Response:
+        """
+        Send a request through the shared pool and record its latency and pool wait time.
+
+        The wait time is the gap between sending the request and the first request bytes going
+        out, minus any time spent opening a new connection; it grows when the pool is exhausted.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Absolute URL.
+            endpoint (str): Endpoint name, for the timeout and metric labels.
+            **kwargs: Forwarded to `httpx.AsyncClient.request`.
+
+        Returns:
+            httpx.Response: The response.
+        """
+        events: Dict[str, float] = {}
+        waiting = True
+
+        async def trace(event_name: str, info: dict) -> None:
+            nonlocal waiting
+            events.setdefault(event_name, time.perf_counter())
+            if waiting and event_name.endswith("send_request_headers.started"):
+                # A connection was acquired; the request is no longer queued for the pool
+                waiting = False
+                self._waiting -= 1
+
+        start_time = time.perf_counter()
+        self._in_flight += 1
+        self._waiting += 1
+        try:
+            return await self.client.request(
+                method,
+                url,
+                timeout=self.timeout(endpoint),
+                extensions={"trace": trace},
+                **kwargs
+            )
+        finally:
+            self._in_flight -= 1
+            if waiting:
+                self._waiting -= 1
+            metrics.observe("http_client.request_seconds", time.perf_counter() - start_time, endpoint=endpoint)
+            sent_at = events.get("http11.send_request_headers.started") or events.get("http2.send_request_headers.started")
+            if sent_at is not None:
+                connect_seconds = 0.0
+                if "connection.connect_tcp.started" in events:
+                    metrics.increment("http_client.new_connections", endpoint=endpoint)
+                    connected_at = events.get("connection.start_tls.complete") or events.get("connection.connect_tcp.complete", sent_at)
+                    connect_seconds = connected_at - events["connection.connect_tcp.started"]
+                    metrics.observe("http_client.connect_seconds", connect_seconds, endpoint=endpoint)
+                metrics.observe("http_client.pool_wait_seconds", max(0.0, sent_at - start_time - connect_seconds), endpoint=endpoint)
+
+    async def get(self, url: str, endpoint: str = "default", **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, endpoint=endpoint, **kwargs)
+
+    async def post(self, url: str, endpoint: str = "default", **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, endpoint=endpoint, **kwargs)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Count the client's requests by state and publish them as gauges.
+
+        Returns:
+            Dict[str, int]: "in_flight" (sent and not completed) and "waiting" (not yet
+                holding a pooled connection).
+        """
+        stats = {"in_flight": self._in_flight, "waiting": self._waiting}
+        for name, value in stats.items():
+            metrics.set_gauge(f"http_client.pool_{name}", value)
+        return stats
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        await self.client.aclose()
+
+_client = None
+
+def get_http_client(config: dict = None) -> PooledHTTPClient:
+    """
+    Return the shared HTTP client, creating it on first use.
+
+    Args:
+        config (dict, optional): Client settings, only applied when the client is first created.
+
+    Returns:
+        PooledHTTPClient: The application-scoped client.
+    """
+    global _client
+    if _client is None:
+        _client = PooledHTTPClient(config=config)
+    return _client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (at application shutdown); the next use creates a new one."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
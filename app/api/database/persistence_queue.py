@@ -0,0 +1,193 @@
+import json
+import time
+import random
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Set
+from app.utils.metrics import metrics
+
+class PermanentWriteError(Exception):
+    """A write that must not be retried (e.g. the data service rejected the payload)."""
+
+class PersistenceQueue:
+    """
+    Bounded write-behind queue for persisting messages to the data service.
+
+    Items are JSON-serializable dicts. Worker tasks take up to `batch_size` queued items at a
+    time and write them concurrently, retrying failures with exponential backoff and full
+    jitter. Items that still fail, or are rejected as permanent errors, are appended to a
+    JSONL dead-letter file. When the queue is full, `enqueue` waits up to `enqueue_timeout`
+    (backpressure) before dead-lettering the item. `submit` runs the work that prepares and
+    enqueues an item as a task owned by the queue, so it outlives a cancelled caller.
+    `close` waits for submitted work, then drains the queue at shutdown.
+    """
+
+    def __init__(self, write: Callable[[dict], Awaitable[None]], config: dict = None, name: str = "persistence"):
+        """
+        Args:
+            write (Callable): Async function persisting one item; raises on failure, with
+                `PermanentWriteError` for failures that retrying cannot fix.
+            config (dict, optional): Settings "max_queue_size", "workers", "batch_size",
+                "max_retries", "backoff_base_seconds", "backoff_max_seconds",
+                "enqueue_timeout_seconds", "drain_timeout_seconds" and "dead_letter_path".
+            name (str): Label for metrics and dead-letter records.
+        """
+        config = config or {}
+        self.write = write
+        self.name = name
+        self.max_queue_size = config.get("max_queue_size", 1000)
+        self.workers = config.get("workers", 4)
+        self.batch_size = config.get("batch_size", 8)
+        self.max_retries = config.get("max_retries", 5)
+        self.backoff_base = config.get("backoff_base_seconds", 0.5)
+        self.backoff_max = config.get("backoff_max_seconds", 10.0)
+        self.enqueue_timeout = config.get("enqueue_timeout_seconds", 5.0)
+        self.drain_timeout = config.get("drain_timeout_seconds", 30.0)
+        self.dead_letter_path = Path(config.get("dead_letter_path", f"dead_letters/{name}.jsonl"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._in_flight: List[dict] = []
+        self._submitted: Set[asyncio.Task] = set()
+        self._loop = None
+        self._closing = False
+
+    def _ensure_started(self) -> None:
+        """Create the queue and workers on first use, or again if the event loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._queue is not None and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _record_depth(self) -> None:
+        metrics.set_gauge("persistence.queue_depth", self._queue.qsize(), queue=self.name)
+
+    async def enqueue(self, item: dict) -> None:
+        """
+        Queue an item for persistence, waiting for room if the queue is full.
+
+        Args:
+            item (dict): JSON-serializable item passed to `write`.
+        """
+        if self._closing:
+            await self._dead_letter(item, "enqueued during shutdown", attempts=0)
+            return
+
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._queue.put(item), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            metrics.increment("persistence.rejected", queue=self.name)
+            await self._dead_letter(item, "queue full", attempts=0)
+            return
+        metrics.increment("persistence.enqueued", queue=self.name)
+        self._record_depth()
+
+    def submit(self, work: Awaitable[None]) -> asyncio.Task:
+        """
+        Run a coroutine that prepares and enqueues items as a task held by the queue.
+
+        The task does not depend on its caller: cancelling the caller (e.g. a streaming
+        response whose client disconnected) leaves it running, and `close` waits for it.
+
+        Args:
+            work (Awaitable): Coroutine ending in `enqueue`.
+
+        Returns:
+            asyncio.Task: The task running `work`.
+        """
+        task = asyncio.create_task(work)
+        self._submitted.add(task)
+        task.add_done_callback(self._submitted_done)
+        return task
+
+    def _submitted_done(self, task: asyncio.Task) -> None:
+        self._submitted.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[Persistence] Submitted work failed: {task.exception()}")
+
+    async def _write_with_retries(self, item: dict) -> None:
+        """Write one item, retrying with jittered exponential backoff, then dead-letter it."""
+        self._in_flight.append(item)
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self.write(item)
+                    metrics.increment("persistence.written", queue=self.name)
+                    return
+                except PermanentWriteError as e:
+                    await self._dead_letter(item, str(e), attempts=attempt + 1)
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        await self._dead_letter(item, str(e), attempts=attempt + 1)
+                        return
+                    metrics.increment("persistence.retries", queue=self.name)
+                    await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+        finally:
+            self._in_flight.remove(item)
+
+    async def _worker(self) -> None:
+        """Take batches of queued items and write them concurrently."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._record_depth()
+
+            start_time = time.perf_counter()
+            try:
+                await asyncio.gather(*(self._write_with_retries(item) for item in batch))
+                metrics.observe("persistence.flush_seconds", time.perf_counter() - start_time, queue=self.name)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _dead_letter(self, item: dict, error: str, attempts: int) -> None:
+        """Append a failed item to the dead-letter file so it can be replayed later."""
+        metrics.increment("persistence.dead_lettered", queue=self.name)
+        record = {"queue": self.name, "time": time.time(), "attempts": attempts, "error": error, "item": item}
+        print(f"[Persistence] Dead-lettering item after {attempts} attempts: {error}")
+
+        def append() -> None:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+        try:
+            await asyncio.to_thread(append)
+        except Exception as e:
+            print(f"[Persistence] Failed to write dead letter: {e} - {record}")
+
+    async def close(self) -> None:
+        """
+        Drain the queue (up to `drain_timeout`), then stop the workers.
+
+        Submitted work is awaited first, within the same timeout. Items still queued or in
+        flight afterwards are written to the dead-letter file.
+        """
+        if self._submitted:
+            await asyncio.wait(set(self._submitted), timeout=self.drain_timeout)
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"[Persistence] Drain timed out with {self._queue.qsize()} items queued")
+
+        # Cancelling a worker mid-write may still let the write land; replays must tolerate duplicates
+        unfinished = list(self._in_flight)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            unfinished.append(self._queue.get_nowait())
+        for item in unfinished:
+            await self._dead_letter(item, "shutdown before write", attempts=0)
+
+        self._queue = None
+        self._tasks = []
+        self._in_flight = []
+        self._closing = False
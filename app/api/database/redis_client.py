@@ -1,33 +1,92 @@
 import os
-import json
 import redis
+import redis.asyncio as aioredis
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from typing import Type, TypeVar
+from .config_store import ConfigStore
+
+T = TypeVar("T", bound=BaseModel)
 
 load_dotenv()
 
 redis_client = redis.Redis(
     host=os.getenv("REDIS_HOST"),
-    port=int(os.getenv("REDIS_PORT")),
+    port=int(os.getenv("REDIS_PORT", "6379")),
     password=os.getenv("REDIS_PASSWORD"),
     username="default",
     decode_responses=True
 )
 
+# Async client returning raw bytes, for shared caches that store binary values
+binary_redis_client = aioredis.Redis(
+    host=os.getenv("REDIS_HOST"),
+    port=int(os.getenv("REDIS_PORT", "6379")),
+    password=os.getenv("REDIS_PASSWORD"),
+    username="default",
+    decode_responses=False
+)
+
+# Configs cached in process, hot-reloaded from the change channel once `config_store.start()` runs
+config_store = ConfigStore(
+    client=redis_client,
+    async_client=binary_redis_client,
+    snapshot_path=os.getenv("CONFIG_SNAPSHOT_PATH"),
+    channel=os.getenv("CONFIG_CHANNEL", "config:changes")
+)
+
 def get_config(name: str) -> dict:
     """
-    Retrieve and parse a JSON configuration stored in Redis.
+    Retrieve a JSON configuration stored in Redis, served from the in-process config cache.
 
     Args:
         name (str): Redis key name.
 
     Returns:
-        dict: Parsed configuration dictionary.
+        dict: Parsed configuration dictionary (a copy; changing it does not affect the cache).
 
     Raises:
         KeyError: If the key does not exist in Redis.
         json.JSONDecodeError: If the stored value is not valid JSON.
     """
-    raw = redis_client.get(name=name)
-    if raw is None:
+    config = config_store.get(name)
+    if config is None:
         raise KeyError(f"Config '{name}' not found in Redis.")
-    return json.loads(raw)
\ No newline at end of file
+    return config
+
+def get_typed_config(name: str, model: Type[T]) -> T:
+    """
+    Retrieve a JSON configuration validated into a pydantic model (see `app.schemas.config`).
+
+    The validated model is cached in process until the config changes; treat it as read-only.
+
+    Args:
+        name (str): Redis key name.
+        model (Type[T]): Pydantic model describing the config.
+
+    Returns:
+        T: The validated configuration.
+
+    Raises:
+        KeyError: If the key does not exist in Redis.
+        pydantic.ValidationError: If the config does not match the model.
+    """
+    return config_store.get_typed(name, model)
+
+def get_optional_config(name: str, default: dict = None) -> dict:
+    """
+    Retrieve a JSON configuration from Redis, falling back to a default when the key is absent.
+
+    Used for optional features whose settings may not be deployed yet.
+
+    Args:
+        name (str): Redis key name.
+        default (dict, optional): Value returned when the key does not exist. Defaults to `{}`.
+
+    Returns:
+        dict: Parsed configuration dictionary, or the default.
+    """
+    try:
+        return get_config(name)
+    except KeyError:
+        return {} if default is None else default
@@ -0,0 +1,66 @@
+import asyncio
+from fastapi import APIRouter
+from app.utils.metrics import metrics
+from fastapi.responses import JSONResponse
+from app.services.manage_models.model_manager import model_manager
+from app.api.database.http_client import get_http_client
+from app.services.manage_models.shared_weights import record_memory_usage
+
+# Router for operational endpoints (metrics, health)
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Return a snapshot of the in-process metrics registry.
+
+    Gauges of the data-service client (requests in flight, requests waiting for a pooled
+    connection) are refreshed first.
+
+    Returns:
+        JSONResponse: Counters, gauges and latency summaries keyed by metric name.
+    """
+    get_http_client().pool_stats()
+    return JSONResponse(content=metrics.snapshot(), status_code=200)
+
+@router.get("/memory")
+async def get_memory():
+    """
+    Report private vs. shared memory of the worker serving this request and of its inference workers.
+
+    With `model_loading.mode = "mmap"` the model weights show up as shared memory, so instances
+    can be sized by the private memory each uvicorn worker adds rather than by model count.
+
+    Returns:
+        JSONResponse: This worker's memory split and, when the inference pool is enabled, its workers'.
+    """
+    content = {"worker": record_memory_usage()}
+    if model_manager.inference_pool is not None:
+        content["inference_workers"] = await asyncio.to_thread(model_manager.inference_pool.memory_usage)
+    return JSONResponse(content=content, status_code=200)
+
+@router.get("/health")
+async def health():
+    """
+    Liveness probe: the process is up and the event loop is responsive.
+
+    Returns:
+        JSONResponse: Always `{"status": "ok"}` with status 200.
+    """
+    return JSONResponse(content={"status": "ok"}, status_code=200)
+
+@router.get("/ready")
+async def ready():
+    """
+    Readiness probe: every required model is loaded and warmed.
+
+    Load balancers should only route traffic to the instance once this returns 200.
+
+    Returns:
+        JSONResponse: Per-model readiness, with status 200 when ready and 503 otherwise.
+    """
+    is_ready = model_manager.is_ready()
+    return JSONResponse(
+        content={"ready": is_ready, "models": model_manager.readiness},
+        status_code=200 if is_ready else 503
+    )
@@ -1,8 +1,13 @@
+import asyncio
 from fastapi import FastAPI
-from app.api.routes import conversation
+from app.api.routes import conversation, monitoring
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.database.redis_client import config_store, get_optional_config
+from app.api.database.http_client import get_http_client, close_http_client
+from app.api.database.database_interaction import persistence_queue
 from app.services.manage_models.model_manager import model_manager
+from app.utils.image_processing import close_image_fetcher
 
 @asynccontextmanager
 async def lifespan(app):
@@ -10,9 +15,12 @@ async def lifespan(app):
     Application lifespan manager for model initialization and cleanup.
 
     This function is registered with FastAPI's `lifespan` parameter to handle:
-    - Loading required models at startup.
-    - Warming up models asynchronously in the background.
-    - Cleaning up models on application shutdown.
+    - Following config change notifications so configs reload without a restart.
+    - Opening the shared, pooled HTTP client used for data-service calls.
+    - Loading required models in parallel in the background.
+    - Warming up models asynchronously in the background (readiness is reported at `/ready`).
+    - Draining queued message writes, cleaning up models, closing pooled connections (data
+      service and image URLs) and stopping the config listener on shutdown.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -21,11 +29,22 @@ async def lifespan(app):
         None: Control is yielded back to FastAPI once startup is complete.
 
     Raises:
-        Exception: If any error occurs during model loading or warmup, it is printed and re-raised.
+        Exception: If any error occurs during startup, it is printed and re-raised.
     """
+    warmup_task = None
     try:
-        # Load models immediately (fast)
-        model_manager.load_models()
+        # Hot-reload configs published on the change channel
+        config_store.start()
+
+        # One keep-alive connection pool for every data-service call
+        get_http_client(config=get_optional_config("http_client"))
+
+        # Load and warm models in the background; the server answers liveness checks meanwhile
+        warmup_task = asyncio.create_task(model_manager.warmup())
+        warmup_task.add_done_callback(
+            lambda task: task.cancelled() or task.exception() is None
+            or print(f"Error during model warmup: {task.exception()}")
+        )
 
         print("Application startup completed successfully!")
         yield
@@ -34,8 +53,17 @@ async def lifespan(app):
         print(f"Error during startup: {e}")
         raise
     finally:
-        # Clean up models on shutdown
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
+
+        # Persist queued messages before anything they depend on is torn down
+        await persistence_queue.close()
+
+        # Clean up models and pooled connections on shutdown
         model_manager.cleanup_models()
+        await close_http_client()
+        await close_image_fetcher()
+        await config_store.stop()
         print("Application shutdown completed successfully!")
 
 app = FastAPI(lifespan=lifespan)
@@ -49,4 +77,5 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(conversation.router)
\ No newline at end of file
+app.include_router(conversation.router)
+app.include_router(monitoring.router)
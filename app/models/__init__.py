@@ -1,4 +1,5 @@
 from .llm import *
 from .rag import *
 from .task_classifier import *
-from .summarizer import *
\ No newline at end of file
+from .summarizer import *
+from .history_summarizer import *
@@ -0,0 +1,51 @@
+import dspy
+from typing import Optional
+from app.utils import create_signature_with_doc
+
+HISTORY_SUMMARY_INSTRUCTION = (
+    "Update the running summary of a conversation between a user and a medical assistant. "
+    "Fold the new turns into the previous summary, keeping facts about the user (symptoms, "
+    "conditions, medications, preferences), open questions and advice already given. "
+    "Be concise and write in the language of the conversation."
+)
+
+class SummarizeHistory(dspy.Signature):
+    previous_summary: str = dspy.InputField(description="Summary of the earlier conversation; empty if there is none")
+    new_turns: str = dspy.InputField(description="Older conversation turns to fold into the summary")
+    summary: str = dspy.OutputField()
+
+class HistorySummarizer(dspy.Module):
+    """Model maintaining a rolling summary of older conversation turns."""
+
+    def __init__(self, config: dict = None, lm: Optional[dspy.LM] = None):
+        """
+        Args:
+            config (dict, optional): Settings "instruction", "temperature" and "max_tokens".
+            lm (dspy.LM, optional): A dedicated (e.g. cheaper) LM; defaults to the configured one.
+        """
+        config = config or {}
+        self.lm = lm
+        self.signature_cls = create_signature_with_doc(SummarizeHistory, config.get("instruction", HISTORY_SUMMARY_INSTRUCTION))
+        self.summarize = dspy.Predict(
+            self.signature_cls,
+            temperature=config.get("temperature", 0.0),
+            max_tokens=config.get("max_tokens", 512)
+        )
+
+    async def forward(self, previous_summary: str = "", new_turns: str = None) -> str:
+        """
+        Fold new turns into the previous summary.
+
+        Args:
+            previous_summary (str): The current summary, or an empty string.
+            new_turns (str): The turns to add.
+
+        Returns:
+            str: The updated summary.
+        """
+        if self.lm is not None:
+            with dspy.context(lm=self.lm):
+                result = await self.summarize.acall(previous_summary=previous_summary, new_turns=new_turns)
+        else:
+            result = await self.summarize.acall(previous_summary=previous_summary, new_turns=new_turns)
+        return result.summary
@@ -1,24 +1,212 @@
+import time
 import asyncio
+import numpy as np
+from typing import Any, List, Optional, Tuple
 from transformers import pipeline
+from app.utils.metrics import metrics
+from app.utils.text_processing import get_dense_embedder, compute_dense_vector
+from app.utils.orchestration.micro_batcher import MicroBatcher
+from app.utils.inference_backend import get_inference_backend, load_onnx_zero_shot_pipeline
+
+ZERO_SHOT_MODEL_NAME = "facebook/bart-large-mnli"
+
+def load_zero_shot_pipeline(backend: str = "torch"):
+    """
+    Build the zero-shot text classification pipeline for a given inference backend.
+
+    Args:
+        backend (str): "torch" for eager PyTorch or "onnx" for int8-quantized ONNX Runtime.
+
+    Returns:
+        Pipeline: A transformers zero-shot classification pipeline.
+    """
+    if backend == "onnx":
+        return load_onnx_zero_shot_pipeline(ZERO_SHOT_MODEL_NAME)
+    return pipeline("zero-shot-classification", model=ZERO_SHOT_MODEL_NAME)
 
 
 class Classifier:
     """Classifier for text, general images, and disease-related images using zero-shot models."""
 
-    def __init__(self, config: dict = None):
+    def __init__(self, config: dict = None, inference_pool: Any = None):
         self.config = config
         self.candidate_labels = self.config["candidate_labels"]
-        self.zero_shot_text_classification = pipeline(
-            "zero-shot-classification", 
-            model="facebook/bart-large-mnli"
+
+        # With an inference pool the pipeline lives in the worker processes instead of here
+        self.inference_pool = inference_pool
+        self.zero_shot_text_classification = (
+            None if inference_pool is not None else load_zero_shot_pipeline(get_inference_backend())
         )
 
+        # Concurrent classify_text calls are grouped into one batched NLI pass
+        batching = self.config.get("batching", {})
+        self.batcher = MicroBatcher(
+            self._classify_batch,
+            max_batch_size=batching.get("max_batch_size", 8),
+            max_wait_ms=batching.get("max_wait_ms", 10),
+            max_queue_size=batching.get("max_queue_size", 256),
+        )
+
+        # Optional embedding first stage; BART only runs when its top-1/top-2 margin is too small.
+        # (exemplar embeddings, owning label index of each) are published together, built on first use
+        self.exemplars: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        cascade = self.config.get("cascade", {})
+        self.cascade_enabled = cascade.get("enabled", False)
+        self.margin_threshold = cascade.get("margin_threshold", 0.05)
+        self.label_exemplars = cascade.get("label_exemplars", {})
+        if self.cascade_enabled:
+            self._build_label_embeddings()
+
+    def _build_label_embeddings(self) -> None:
+        """
+        Precompute normalized e5 embeddings for every candidate label's exemplars.
+
+        Labels without configured exemplars use the label text itself as the only exemplar.
+        Embeddings and owners are published in one assignment, so concurrent readers never
+        see one without the other.
+        """
+        texts, owners = [], []
+        for label_index, label in enumerate(self.candidate_labels):
+            for exemplar in self.label_exemplars.get(label) or [label]:
+                texts.append(f"query: {exemplar}")
+                owners.append(label_index)
+
+        if self.inference_pool is not None:
+            vectors = self.inference_pool.encode_dense_sync(texts)
+        else:
+            vectors = get_dense_embedder().encode(texts, convert_to_numpy=True)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.exemplars = (
+            vectors / np.linalg.norm(vectors, axis=1, keepdims=True),
+            np.asarray(owners, dtype=np.int64),
+        )
+
+    async def _label_scores(self, prompt: str) -> np.ndarray:
+        """Return each candidate label's best exemplar cosine similarity to the prompt."""
+        if self.exemplars is None:
+            await asyncio.to_thread(self._build_label_embeddings)
+        exemplar_embeddings, exemplar_owners = self.exemplars
+
+        query = await compute_dense_vector(f"query: {prompt}")
+        similarities = exemplar_embeddings @ (query / np.linalg.norm(query))
+
+        label_scores = np.full(len(self.candidate_labels), -np.inf, dtype=np.float32)
+        np.maximum.at(label_scores, exemplar_owners, similarities)
+        return label_scores
+
+    async def score_with_embeddings(self, prompt: str = None) -> Tuple[str, float]:
+        """
+        Score a prompt against the precomputed label exemplars with the dense embedder.
+
+        Each label's score is its best exemplar cosine similarity.
+
+        Args:
+            prompt (str, optional): The input text to be classified.
+
+        Returns:
+            Tuple[str, float]: The top label and the margin between the top-1 and top-2 label scores.
+        """
+        label_scores = await self._label_scores(prompt)
+
+        if len(label_scores) < 2:
+            return self.candidate_labels[int(np.argmax(label_scores))], float("inf")
+
+        second, first = np.argpartition(label_scores, -2)[-2:]
+        if label_scores[second] > label_scores[first]:
+            first, second = second, first
+        return self.candidate_labels[int(first)], float(label_scores[first] - label_scores[second])
+
+    async def rank_labels(self, prompt: str = None) -> List[Tuple[str, float]]:
+        """
+        Rank every candidate label by embedding similarity, as a cheap pre-classifier.
+
+        Works on untranslated text (the e5 model is multilingual). Label exemplar embeddings
+        are built on first use when the cascade is disabled.
+
+        Args:
+            prompt (str, optional): The input text.
+
+        Returns:
+            List[Tuple[str, float]]: (label, score) pairs, best first.
+        """
+        label_scores = await self._label_scores(prompt)
+        order = np.argsort(-label_scores, kind="stable")
+        return [(self.candidate_labels[int(index)], float(label_scores[index])) for index in order]
+
+    async def _classify_batch(self, prompts: List[str]) -> List[str]:
+        """
+        Run one batched zero-shot classification pass over several prompts.
+
+        Args:
+            prompts (List[str]): The texts collected by the micro-batcher.
+
+        Returns:
+            List[str]: The top predicted label for each prompt, in input order.
+        """
+        if self.inference_pool is not None:
+            return await self.inference_pool.classify(prompts, self.candidate_labels)
+
+        results = await asyncio.to_thread(
+            self.zero_shot_text_classification,
+            prompts,
+            candidate_labels=self.candidate_labels,
+            batch_size=len(prompts)
+        )
+        # The pipeline returns a single dict for a single input
+        if isinstance(results, dict):
+            results = [results]
+        return [result["labels"][0] for result in results]
+
+    async def warm(self, prompt: str) -> None:
+        """
+        Run a prompt through every classifier stage, bypassing the micro-batcher and metrics.
+
+        Used by warmup, so warming inputs are not counted as live classifications.
+
+        Args:
+            prompt (str): A representative input text.
+        """
+        if self.cascade_enabled:
+            await self._label_scores(prompt)
+        await self._classify_batch([prompt])
+
+    async def classify(self, prompt: str = None) -> dict:
+        """
+        Classify a text prompt and report which stage of the cascade decided it.
+
+        When the cascade is enabled, the embedding stage answers on its own if its top-1/top-2
+        margin reaches `margin_threshold`; otherwise the prompt falls back to zero-shot BART.
+
+        Args:
+            prompt (str, optional): The input text to be classified.
+
+        Returns:
+            dict: {"label": str, "stage": "embedding" | "zero-shot", "margin": float | None}
+        """
+        start_time = time.perf_counter()
+        margin = None
+
+        if self.cascade_enabled:
+            label, margin = await self.score_with_embeddings(prompt)
+            if margin >= self.margin_threshold:
+                stage = "embedding"
+            else:
+                label, stage = await self.batcher.submit(prompt), "zero-shot"
+        else:
+            label, stage = await self.batcher.submit(prompt), "zero-shot"
+
+        metrics.increment("classifier.decisions", stage=stage)
+        metrics.observe("classifier.latency_seconds", time.perf_counter() - start_time, stage=stage)
+        return {"label": label, "stage": stage, "margin": margin}
+
     async def classify_text(self, prompt: str = None) -> str:
         """
         Classify a text prompt using zero-shot classification.
 
         This function uses a zero-shot text classification model to determine the most appropriate
         label from a predefined list (`self.candidate_labels`), such as ["not-medical-related", "dermatology",...].
+        Concurrent calls are micro-batched into a single pipeline pass, and confident prompts are
+        answered by the embedding stage when the cascade is enabled.
 
         Args:
             prompt (str, optional): The input text to be classified.
@@ -26,9 +214,5 @@ class Classifier:
         Returns:
             str: The top predicted label based on the input text.
         """
-        result = await asyncio.to_thread(
-            self.zero_shot_text_classification,
-            prompt,
-            candidate_labels=self.candidate_labels
-        )
-        return result["labels"][0]
\ No newline at end of file
+        result = await self.classify(prompt)
+        return result["label"]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+
+class ApiKeysConfig(BaseModel):
+    """The "api_keys" config: data service URL and LLM gateway credentials."""
+    model_config = ConfigDict(extra="allow")
+
+    DATA_URL: str
+    OPEN_ROUTER_URL: str
+    OPEN_ROUTER_API_KEY: str
+
+class LLMConfig(BaseModel):
+    """The "llm" config: the response model and the settings derived from its name."""
+    model_config = ConfigDict(extra="allow", protected_namespaces=())
+
+    model: str
+    temperature: float
+    max_tokens: int
+    instruction: str
+    image_policy: Optional[dict] = None
@@ -5,4 +5,5 @@ from typing import Optional, Union
 class Message(BaseModel):   
     content: Optional[str] = None
     image: Optional[Union[str, bytes]] = None
+    image_hash: Optional[str] = None
     timestamp: Optional[datetime] = None
\ No newline at end of file
@@ -0,0 +1,186 @@
+import os
+import time
+import torch
+import asyncio
+import numpy as np
+import multiprocessing
+from typing import Any, Callable, Dict, List
+from app.utils.metrics import metrics
+from concurrent.futures import ProcessPoolExecutor, wait
+from app.models.task_classifier import ZERO_SHOT_MODEL_NAME, load_zero_shot_pipeline
+from .shared_weights import share_loaded_weights, record_memory_usage
+from app.utils.inference_backend import configure_inference_backend, get_inference_backend
+from app.utils.text_processing import (
+    DENSE_MODEL_NAME,
+    SPARSE_MODEL_NAME,
+    SparseEmbedding,
+    model_identity,
+    get_dense_embedder,
+    get_embedding_engine,
+    get_sparse_embedder_and_tokenizer
+)
+
+# Models loaded inside each worker process by `_init_worker`
+_worker_state = {}
+
+def _init_worker(inference_config: dict, embedding_config: dict, loading_config: dict, threads: int, ready) -> None:
+    """Load every local model once per worker process, then count the worker as ready."""
+    _worker_state["ready"] = ready
+    torch.set_num_threads(threads)
+    configure_inference_backend(inference_config)
+    _worker_state["zero_shot"] = load_zero_shot_pipeline(get_inference_backend())
+    get_embedding_engine(config=embedding_config)
+    share_loaded_weights(loading_config, {
+        ZERO_SHOT_MODEL_NAME: _worker_state["zero_shot"].model,
+        DENSE_MODEL_NAME: get_dense_embedder(),
+        SPARSE_MODEL_NAME: get_sparse_embedder_and_tokenizer()[1],
+    })
+    with ready.get_lock():
+        ready.value += 1
+    print(f"Inference worker {os.getpid()} ready")
+
+def _ping(workers: int, timeout: float) -> int:
+    """Block until `workers` workers have loaded their models, so each ping holds its own worker."""
+    deadline = time.monotonic() + timeout
+    while _worker_state["ready"].value < workers:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Only {_worker_state['ready'].value} of {workers} inference workers loaded")
+        time.sleep(0.05)
+    return os.getpid()
+
+def _memory_usage() -> Dict[str, float]:
+    return record_memory_usage()
+
+def _classify(prompts: List[str], candidate_labels: List[str]) -> List[str]:
+    results = _worker_state["zero_shot"](prompts, candidate_labels=candidate_labels, batch_size=len(prompts))
+    if isinstance(results, dict):
+        results = [results]
+    return [result["labels"][0] for result in results]
+
+def _encode_dense(texts: List[str]) -> np.ndarray:
+    return get_embedding_engine().encode_dense(texts)
+
+def _encode_sparse(texts: List[str]) -> List[SparseEmbedding]:
+    return get_embedding_engine().encode_sparse(texts)
+
+
+class InferencePool:
+    """
+    Pool of worker processes hosting the local models (classifier, dense and sparse embedders).
+
+    CPU-heavy inference runs in the workers, each with its own interpreter and GIL, so it scales
+    across cores while the uvicorn event loop stays free for request handling and SSE streaming.
+    Inputs and outputs cross the process boundary as pickled lists of strings and numpy arrays.
+    """
+
+    def __init__(
+        self,
+        config: dict = None,
+        inference_config: dict = None,
+        embedding_config: dict = None,
+        loading_config: dict = None
+    ):
+        """
+        Args:
+            config (dict, optional): Settings "workers", "threads_per_worker", "start_method" and
+                "start_timeout_seconds".
+            inference_config (dict, optional): Backend settings forwarded to each worker.
+            embedding_config (dict, optional): Embedding engine settings forwarded to each worker.
+            loading_config (dict, optional): Model loading mode forwarded to each worker.
+        """
+        config = config or {}
+        self.workers = config.get("workers", 2)
+        self.start_timeout = config.get("start_timeout_seconds", 600.0)
+        threads = config.get("threads_per_worker") or max(1, (os.cpu_count() or 1) // self.workers)
+        mp_context = multiprocessing.get_context(config.get("start_method", "spawn"))
+        # Number of workers that finished loading their models
+        self._ready = mp_context.Value("i", 0)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(inference_config or {}, embedding_config or {}, loading_config or {}, threads, self._ready),
+        )
+        # Identities of the embedding models in the workers, resolved once by `start`
+        self.identities: Dict[str, str] = {}
+
+    def start(self) -> None:
+        """
+        Spawn every worker and block until all of them have loaded their models.
+
+        Each worker counts itself as ready once its models are loaded, and every ping blocks
+        until all of them have, so the pings are spread over distinct workers and none returns
+        while part of the pool is still cold. The embedding model identities are resolved here
+        too, so cache lookups on the request path never wait for a worker.
+
+        Raises:
+            TimeoutError: If the workers do not load within `start_timeout_seconds`.
+        """
+        futures = [self.executor.submit(_ping, self.workers, self.start_timeout) for _ in range(self.workers)]
+        wait(futures)
+        pids = {future.result() for future in futures}
+        if len(pids) < self.workers:
+            raise RuntimeError(f"Only {len(pids)} of {self.workers} inference workers answered")
+        self.identities = {kind: self.call(model_identity, kind) for kind in ("dense", "sparse")}
+
+    def call(self, fn: Callable, *args) -> Any:
+        """Run a worker function synchronously (for use during model initialization)."""
+        return self.executor.submit(fn, *args).result()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a worker function without blocking the event loop.
+
+        Args:
+            fn (Callable): A module-level worker function.
+            *args: Picklable arguments.
+
+        Returns:
+            Any: The function's result.
+        """
+        start_time = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        metrics.observe("inference_pool.call_seconds", time.perf_counter() - start_time, task=fn.__name__.lstrip("_"))
+        return result
+
+    async def classify(self, prompts: List[str], candidate_labels: List[str]) -> List[str]:
+        """Return the top zero-shot label for each prompt."""
+        return await self.run(_classify, prompts, candidate_labels)
+
+    async def encode_dense(self, texts: List[str]) -> np.ndarray:
+        """Return float32 dense embeddings of shape (len(texts), dim)."""
+        return await self.run(_encode_dense, texts)
+
+    async def encode_sparse(self, texts: List[str]) -> List[SparseEmbedding]:
+        """Return the pruned sparse embedding of each text."""
+        return await self.run(_encode_sparse, texts)
+
+    def encode_dense_sync(self, texts: List[str]) -> np.ndarray:
+        """Blocking variant of `encode_dense`, for initialization code."""
+        return self.call(_encode_dense, texts)
+
+    def model_identity(self, kind: str) -> str:
+        """
+        Return the identity of the model the workers use for `kind` embeddings.
+
+        Raises:
+            RuntimeError: If the pool has not been started.
+        """
+        if kind not in self.identities:
+            raise RuntimeError("Inference pool is not started")
+        return self.identities[kind]
+
+    def memory_usage(self) -> List[Dict[str, float]]:
+        """
+        Return the private/shared memory split reported by the workers.
+
+        Tasks go to whichever worker is idle, so one probe per worker is sent and the
+        results are de-duplicated by pid; a busy worker may be missing from the list.
+        """
+        futures = [self.executor.submit(_memory_usage) for _ in range(self.workers)]
+        wait(futures)
+        return list({usage["pid"]: usage for usage in (future.result() for future in futures)}.values())
+
+    def shutdown(self) -> None:
+        """Stop the workers, cancelling queued work."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
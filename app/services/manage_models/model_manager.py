@@ -1,19 +1,174 @@
+import time
 import dspy
-from typing import Dict, Any
-from app.api.database.redis_client import get_config
-from app.models import RAG, LLM, Classifier, Summarizer
+import asyncio
+import statistics
+from typing import Dict, Any, Awaitable, Callable, Optional
+from app.utils.metrics import metrics
+from app.schemas.config import LLMConfig
+from app.api.database.redis_client import config_store, get_config, get_optional_config, get_typed_config, binary_redis_client
+from app.models import RAG, LLM, Classifier, Summarizer, HistorySummarizer
 from app.utils.orchestration.llm_gateway import set_lm_configure
+from app.utils.orchestration.speculation import Speculator
+from app.utils.orchestration.semantic_cache import SemanticResponseCache
+from app.utils.orchestration.history_summary import HistoryCompressor
+from app.utils.inference_backend import configure_inference_backend
+from .inference_pool import InferencePool
+from .shared_weights import share_loaded_weights
+from app.models.task_classifier import ZERO_SHOT_MODEL_NAME
 from app.utils import (
-    get_dense_embedder, 
+    DENSE_MODEL_NAME,
+    SPARSE_MODEL_NAME,
+    ContextPacker,
+    ImagePolicy,
+    TranslationStage,
+    get_dense_embedder,
+    get_embedding_cache,
+    get_embedding_engine,
+    get_image_fetcher,
+    get_image_store,
     get_sparse_embedder_and_tokenizer
 )
 
+# Representative inputs used to warm each model before it receives traffic
+WARMUP_TEXTS = [
+    "What are the symptoms of eczema?",
+    "Tôi bị đau đầu và sốt nhẹ từ hôm qua, tôi nên làm gì?",
+    "How do I reverse a linked list in Python?",
+]
+
+def _build_context_packer() -> ContextPacker:
+    return ContextPacker(config=get_optional_config("context_packing"), model=get_typed_config("llm", LLMConfig).model)
+
+def _build_response_cache() -> SemanticResponseCache:
+    return SemanticResponseCache(config=get_optional_config("response_cache"), model=get_typed_config("llm", LLMConfig).model)
+
+def _build_image_policy() -> ImagePolicy:
+    llm_config = get_typed_config("llm", LLMConfig)
+    return ImagePolicy(config=llm_config.image_policy, model=llm_config.model)
+
+# Modules rebuilt in place when their config is hot-reloaded; other configs apply on restart.
+# A change to "llm" also rebuilds everything derived from the LLM model name (tokenizer,
+# response cache scope, image policy) and reconfigures the DSPy LM.
+RELOADABLE_MODELS = {
+    "llm": [
+        ("llm_responder", lambda: LLM(config=get_config("llm"))),
+        ("context_packer", _build_context_packer),
+        ("response_cache", _build_response_cache),
+        ("image_policy", _build_image_policy),
+    ],
+    "rag": [("rag_responder", lambda: RAG(config=get_config("rag")))],
+    "summarizer": [("summarizer", lambda: Summarizer(config=get_config("summarizer")))],
+    "speculation": [("speculator", lambda: Speculator(config=get_optional_config("speculation")))],
+    "context_packing": [("context_packer", _build_context_packer)],
+    "response_cache": [("response_cache", _build_response_cache)],
+}
+
 class ModelManager:
     """Manages the lifecycle of ML models."""
-    
+
     def __init__(self):
         self.models: Dict[str, Any] = {}
+        self.readiness: Dict[str, Dict[str, Any]] = {}
+        self.inference_pool: Optional[InferencePool] = None
         self.lm = set_lm_configure(config=get_config("llm"))
+        config_store.on_change(self._reload_models)
+
+    def _reload_models(self, changed: list) -> None:
+        """Rebuild the loaded modules whose config changed (see `RELOADABLE_MODELS`)."""
+        if "llm" in changed:
+            self.lm = set_lm_configure(config=get_config("llm"))
+            dspy.settings.configure(lm=self.lm)
+        for name in changed:
+            for model_name, build in RELOADABLE_MODELS.get(name, []):
+                if model_name in self.models:
+                    self.models[model_name] = build()
+                    print(f"Reloaded {model_name} after a change to config '{name}'")
+
+    def _configure(self) -> None:
+        """Configure the DSPy LM, select the local inference backend and create the worker pool if enabled."""
+        # Set LM configuration
+        dspy.settings.configure(lm=self.lm)
+
+        # Select torch or quantized ONNX Runtime before any local model is loaded
+        configure_inference_backend(get_optional_config("inference"))
+
+        # Optionally host the local models in separate worker processes
+        pool_config = get_optional_config("inference_pool")
+        if pool_config.get("enabled", False) and self.inference_pool is None:
+            self.inference_pool = InferencePool(
+                config=pool_config,
+                inference_config=get_optional_config("inference"),
+                embedding_config=get_optional_config("embedding"),
+                loading_config=get_optional_config("model_loading")
+            )
+
+    def _load_llm_models(self) -> None:
+        """Initialize the DSPy modules (cheap; no weights are loaded locally)."""
+        self.models["llm_responder"] = LLM(config=get_config("llm"))
+        self.models["rag_responder"] = RAG(config=get_config("rag"))
+        self.models["summarizer"] = Summarizer(config=get_config("summarizer"))
+        self.models["translator"] = TranslationStage(config=get_optional_config("translation"))
+        self.models["speculator"] = Speculator(config=get_optional_config("speculation"))
+        self.models["context_packer"] = _build_context_packer()
+        self.models["response_cache"] = _build_response_cache()
+        self.models["history_compressor"] = self._build_history_compressor()
+        self.models["image_policy"] = _build_image_policy()
+
+    def _build_history_compressor(self) -> HistoryCompressor:
+        """Create the rolling history summary, on a dedicated LM when "history_summary" names a model."""
+        config = get_optional_config("history_summary")
+        summarizer = HistorySummarizer(
+            config=config,
+            lm=set_lm_configure(config=config) if config.get("model") else None
+        )
+        return HistoryCompressor(
+            config=config,
+            summarize=summarizer.forward,
+            # Looked up per call, so a reloaded context packer's tokenizer is used
+            count_tokens=lambda text: self.models["context_packer"].count_tokens(text),
+            redis_client=binary_redis_client
+        )
+
+    def _load_classifier(self) -> None:
+        """Load the zero-shot task classifier."""
+        self.models["classifier"] = Classifier(config=get_config("task_classifier"), inference_pool=self.inference_pool)
+
+    def _load_dense_embedder(self) -> None:
+        """Load the dense embedder."""
+        self.models["dense_embedder"] = get_dense_embedder()
+
+    def _load_sparse_embedder(self) -> None:
+        """Load the sparse embedder and its tokenizer."""
+        self.models["sparse_tokenizer"], self.models["sparse_embedder"] = get_sparse_embedder_and_tokenizer()
+
+    def _share_weights(self) -> None:
+        """Apply the configured model loading mode ("private" or "mmap") to the locally loaded models."""
+        classifier = self.models.get("classifier")
+        classifier_pipeline = getattr(classifier, "zero_shot_text_classification", None)
+        share_loaded_weights(get_optional_config("model_loading"), {
+            ZERO_SHOT_MODEL_NAME: classifier_pipeline.model if classifier_pipeline is not None else None,
+            DENSE_MODEL_NAME: self.models.get("dense_embedder"),
+            SPARSE_MODEL_NAME: self.models.get("sparse_embedder"),
+        })
+
+    def _load_embedding_services(self) -> None:
+        """Create the batched embedding engine and its two-tier cache."""
+        self.models["embedding_engine"] = get_embedding_engine(
+            config=get_optional_config("embedding"),
+            inference_pool=self.inference_pool
+        )
+        self.models["embedding_cache"] = get_embedding_cache(
+            config=get_optional_config("embedding_cache"),
+            redis_client=binary_redis_client
+        )
+
+    def _load_image_store(self) -> None:
+        """Create the content-addressed image store, its converted-image cache and the URL image fetcher."""
+        self.models["image_store"] = get_image_store(
+            config=get_optional_config("image_store"),
+            redis_client=binary_redis_client
+        )
+        self.models["image_fetcher"] = get_image_fetcher(config=get_optional_config("image_fetch"))
 
     def load_models(self) -> None:
         """
@@ -27,22 +182,140 @@ class ModelManager:
         After successful execution, all models are stored in `self.models`.
         """
         print("Loading LLM models...")
-        
-        # Set LM configuration 
-        dspy.settings.configure(lm=self.lm)
-        
+        self._configure()
+
         # Initialize LLM models
-        self.models["llm_responder"] = LLM(config=get_config("llm"))
-        self.models["rag_responder"] = RAG(config=get_config("rag"))
-        self.models["summarizer"] = Summarizer(config=get_config("summarizer"))
-        self.models["classifier"] = Classifier(config=get_config("task_classifier"))
-        
-        # Load embedding models
-        self.models["dense_embedder"] = get_dense_embedder()
-        self.models["sparse_tokenizer"], self.models["sparse_embedder"] = get_sparse_embedder_and_tokenizer()
-        
+        self._load_llm_models()
+        self._load_embedding_services()
+        self._load_image_store()
+
+        # Load local models, either here or in the inference worker processes
+        if self.inference_pool is not None:
+            self.inference_pool.start()
+        else:
+            self._load_dense_embedder()
+            self._load_sparse_embedder()
+        self._load_classifier()
+        self._share_weights()
+
         print("All models loaded successfully!")
-    
+
+    async def _warm(self, name: str, run: Callable[[str], Awaitable[Any]], config: dict) -> None:
+        """
+        Run representative inputs through a model until its latency is steady, then mark it ready.
+
+        Latency counts as steady once the p99 of the last `window` runs is within
+        `steady_ratio` of their median, or after `max_iterations` runs.
+
+        Args:
+            name (str): Readiness key of the model.
+            run (Callable): Async function running one inference on a text.
+            config (dict): Warmup settings.
+        """
+        window = config.get("window", 5)
+        max_iterations = config.get("max_iterations", 30)
+        steady_ratio = config.get("steady_ratio", 1.5)
+
+        latencies = []
+        for iteration in range(max_iterations):
+            start_time = time.perf_counter()
+            await run(WARMUP_TEXTS[iteration % len(WARMUP_TEXTS)])
+            latencies.append(time.perf_counter() - start_time)
+
+            recent = sorted(latencies[-window:])
+            if len(recent) == window and recent[-1] <= steady_ratio * statistics.median(recent):
+                break
+
+        recent = sorted(latencies[-window:])
+        self.readiness[name].update(
+            ready=True,
+            warmup_runs=len(latencies),
+            p50_ms=round(statistics.median(recent) * 1000, 2),
+            p99_ms=round(recent[-1] * 1000, 2),
+        )
+        metrics.observe("warmup.first_run_seconds", latencies[0], model=name)
+        print(f"Warmed up {name} in {len(latencies)} runs (p99 {recent[-1] * 1000:.1f} ms)")
+
+    async def _warm_lm(self) -> None:
+        """Send one tiny request through the DSPy LM so the provider connection is established."""
+        start_time = time.perf_counter()
+        await self.lm.acall(messages=[{"role": "user", "content": "ping"}], max_tokens=1)
+        self.readiness["lm"].update(ready=True, p99_ms=round((time.perf_counter() - start_time) * 1000, 2))
+
+    async def _track(self, name: str, step: Awaitable[Any]) -> None:
+        """Await a load/warmup step, recording any failure against the model's readiness."""
+        try:
+            await step
+        except Exception as e:
+            self.readiness[name].update(ready=False, error=str(e))
+            print(f"Warmup of {name} failed: {e}")
+            if self.readiness[name]["required"]:
+                raise
+
+    async def warmup(self) -> None:
+        """
+        Load all models in parallel where possible and warm them before serving traffic.
+
+        Heavy local models (classifier, dense and sparse embedders) load concurrently in worker
+        threads, or inside the inference pool's worker processes when it is enabled, optionally
+        moved onto shared memory-mapped weights. Each then runs representative inputs until its
+        latency is steady. The DSPy LM path is warmed with a minimal request; its failure does
+        not block readiness. Progress is reported per model in `self.readiness`.
+        """
+        config = get_optional_config("warmup")
+        start_time = time.perf_counter()
+        print("Loading models in the background...")
+        self._configure()
+
+        required = ["llm_models", "classifier", "dense_embedder", "sparse_embedder"]
+        if self.inference_pool is not None:
+            required.append("inference_pool")
+        self.readiness = {name: {"ready": False, "required": True} for name in required}
+        self.readiness["lm"] = {"ready": False, "required": False}
+
+        await asyncio.to_thread(self._load_llm_models)
+        await asyncio.to_thread(self._load_embedding_services)
+        await asyncio.to_thread(self._load_image_store)
+        self.readiness["llm_models"]["ready"] = True
+
+        if self.inference_pool is not None:
+            # Workers load the zero-shot pipeline and both embedders; the classifier here is a thin client
+            await self._track("inference_pool", asyncio.to_thread(self.inference_pool.start))
+            self.readiness["inference_pool"]["ready"] = True
+            await self._track("classifier", asyncio.to_thread(self._load_classifier))
+        else:
+            await asyncio.gather(
+                self._track("classifier", asyncio.to_thread(self._load_classifier)),
+                self._track("dense_embedder", asyncio.to_thread(self._load_dense_embedder)),
+                self._track("sparse_embedder", asyncio.to_thread(self._load_sparse_embedder)),
+            )
+            await asyncio.to_thread(self._share_weights)
+        print(f"All models loaded in {time.perf_counter() - start_time:.2f} seconds")
+
+        # Warm sequentially so runs do not compete for cores and distort the latency check
+        engine = self.models["embedding_engine"]
+        classifier = self.models["classifier"]
+        await self._track("dense_embedder", self._warm("dense_embedder", lambda text: engine.dense(f"query: {text}"), config))
+        await self._track("sparse_embedder", self._warm("sparse_embedder", engine.sparse, config))
+        # Warm the classifier stages directly so warmup inputs stay out of the live classifier metrics
+        await self._track("classifier", self._warm("classifier", classifier.warm, config))
+        if config.get("lm", True):
+            await self._track("lm", self._warm_lm())
+
+        metrics.observe("warmup.total_seconds", time.perf_counter() - start_time)
+        print(f"Warmup completed in {time.perf_counter() - start_time:.2f} seconds")
+
+    def is_ready(self) -> bool:
+        """
+        Check whether every required model is loaded and warmed.
+
+        Returns:
+            bool: True once the service can take traffic.
+        """
+        return bool(self.readiness) and all(
+            state["ready"] for state in self.readiness.values() if state["required"]
+        )
+
     def get_model(self, model_name: str) -> Any:
         """
         Retrieve a loaded model instance by its name.
@@ -59,7 +332,7 @@ class ModelManager:
         if model_name not in self.models:
             raise KeyError(f"Model '{model_name}' not found. Available models: {list(self.models.keys())}")
         return self.models[model_name]
-    
+
     def cleanup_models(self) -> None:
         """
         Release resources and clear all loaded models.
@@ -67,9 +340,13 @@ class ModelManager:
         Useful for graceful shutdowns or reinitialization.
         """
         print("Cleaning up ML models...")
+        if self.inference_pool is not None:
+            self.inference_pool.shutdown()
+            self.inference_pool = None
         self.models.clear()
+        self.readiness.clear()
         print("ML models cleaned up!")
-    
+
     def get_history(self):
         """
         Retrieve metadata of the most recent interaction with the LM.
@@ -81,4 +358,4 @@ class ModelManager:
 
 
 # Global model manager instance
-model_manager = ModelManager()
\ No newline at end of file
+model_manager = ModelManager()
@@ -0,0 +1,101 @@
+import os
+import fcntl
+import torch
+from pathlib import Path
+from typing import Any, Dict
+from app.utils.metrics import metrics
+from app.utils.common import model_revision
+
+def share_module_weights(module: torch.nn.Module, name: str, cache_dir: str = "shared_weights") -> Path:
+    """
+    Re-back a model's parameters with a memory-mapped file shared by every process.
+
+    The first process to get here writes the model's state dict to `<cache_dir>/<name>@<revision>.pt`
+    (under a file lock, atomically). Every process then loads that file with `mmap=True` and assigns
+    the tensors into the module, so the weights live in the page cache once per machine instead of
+    once per worker. The process's private copy from the initial load is released.
+
+    Args:
+        module (torch.nn.Module): A loaded PyTorch model.
+        name (str): Stable model name, e.g. "facebook/bart-large-mnli".
+        cache_dir (str): Directory for the shared weight files.
+
+    Returns:
+        Path: The weight file backing the module.
+    """
+    directory = Path(cache_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name.replace('/', '__')}@{model_revision(module)}.pt"
+
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not path.exists():
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            torch.save(module.state_dict(), temp_path)
+            os.replace(temp_path, path)
+
+    state_dict = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    module.load_state_dict(state_dict, assign=True)
+    if hasattr(module, "tie_weights"):
+        module.tie_weights()
+    return path
+
+def share_loaded_weights(config: dict, modules: Dict[str, Any]) -> None:
+    """
+    Apply the configured model loading mode to already loaded models.
+
+    Mode "private" (default) keeps each process's own copy of the weights. Mode "mmap"
+    moves every PyTorch model onto shared memory-mapped weight files; models on other
+    backends (e.g. ONNX Runtime sessions) are left untouched.
+
+    Args:
+        config (dict): Settings "mode" ("private" or "mmap") and "cache_dir".
+        modules (Dict[str, Any]): Loaded models keyed by their model name.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    config = config or {}
+    mode = config.get("mode", "private")
+    if mode not in ("private", "mmap"):
+        raise ValueError(f"Unknown model loading mode: {mode}")
+    if mode == "private":
+        return
+
+    for name, module in modules.items():
+        if isinstance(module, torch.nn.Module):
+            path = share_module_weights(module, name, config.get("cache_dir", "shared_weights"))
+            print(f"Process {os.getpid()} maps {name} weights from {path}")
+
+def memory_usage() -> Dict[str, float]:
+    """
+    Report this process's memory split into private and shared pages (Linux).
+
+    Shared pages include memory-mapped weights also mapped by other workers; PSS divides
+    shared pages by the number of processes mapping them, so summing PSS across workers
+    gives the instance's real footprint.
+
+    Returns:
+        Dict[str, float]: pid and rss/pss/shared/private sizes in MB.
+    """
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+
+    return {
+        "pid": os.getpid(),
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+    }
+
+def record_memory_usage() -> Dict[str, float]:
+    """Read this process's memory usage and publish it as per-worker gauges."""
+    usage = memory_usage()
+    for key in ("rss_mb", "pss_mb", "shared_mb", "private_mb"):
+        metrics.set_gauge(f"memory.{key}", usage[key], pid=usage["pid"])
+    return usage
@@ -2,7 +2,6 @@ from rich import print
 from typing import AsyncGenerator
 from app.schemas.message import Message
 from .response_manager import ResponseManager
-from app.utils.image_processing import convert_to_dspy_image
 
 class ImageHandler(ResponseManager):
     """Handler specialized for image-only inputs."""
@@ -22,7 +21,7 @@ class ImageHandler(ResponseManager):
             Exception: If classification or routing fails.
         """
         try:
-            input_data.image = await convert_to_dspy_image(input_data.image)
+            input_data.image = await cls._convert_image(input_data)
             return await cls.handle_llm_response(input_data=input_data, user_id=user_id)
         except Exception as e:
             print(f"Image response handling failed: {str(e)}")
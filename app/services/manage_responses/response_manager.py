@@ -3,12 +3,15 @@ import dspy
 import asyncio
 from rich import print
 from app.schemas.message import Message
-from app.utils.text_processing import rrf
 from app.api.database import call_hybrid_search
-from typing import Any, AsyncGenerator, Awaitable
+from typing import Any, AsyncGenerator, Awaitable, Optional
 from app.api.database import get_recent_conversations
 from ..manage_models.model_manager import model_manager
 from app.utils.image_processing import convert_to_dspy_image
+from app.utils.orchestration.speculation import SpeculativeSearches
+
+# Number of documents requested from each retriever for RAG
+RAG_SEARCH_LIMIT = 4
 
 class ResponseManager:
     """Base handler for different types of response generation."""
@@ -64,19 +67,147 @@ class ResponseManager:
         """
         start_time = time.time()
         try:
-            recent_conversations = await get_recent_conversations(
+            history = await get_recent_conversations(
                 collection_name=user_id
             )
+            embedding = await cls._response_cache_embedding(input_data, history)
+            cached = cls._cached_response("llm", embedding)
+            if cached is not None:
+                cls._log_execution_time(start_time, "LLM (cached)")
+                return cached
+            recent_conversations = await cls._compress_history(user_id, history)
+
             llm_responder = model_manager.get_model("llm_responder")
             stream_predict = cls._create_stream_predict(llm_responder)
             output_stream = stream_predict(prompt=input_data.content, image=input_data.image, recent_conversations=recent_conversations)
             cls._log_execution_time(start_time, "LLM")
-            return output_stream
+            return cls._record_response("llm", embedding, history, output_stream)
         except Exception as e:
             raise RuntimeError(f"Stream inference error: {str(e)}")
 
     @classmethod
-    async def handle_rag_response(cls, input_data: Message, collection_name: str, user_id: str) -> AsyncGenerator[str, None]:
+    async def _convert_image(cls, input_data: Message) -> dspy.Image:
+        """
+        Convert a message's image to a dspy Image through the content-addressed image store.
+
+        The image is resized and encoded by the LLM's image policy. A previously seen image
+        reuses its cached conversion for that policy, and `input_data.image_hash` is set
+        when the image bytes are stored, so the message can be persisted by reference.
+
+        Args:
+            input_data (Message): The user message carrying the uploaded image.
+
+        Returns:
+            dspy.Image: The converted image.
+        """
+        image_store = model_manager.get_model("image_store")
+        image_policy = model_manager.get_model("image_policy")
+        input_data.image_hash, image = await image_store.prepare(
+            input_data.image,
+            convert=lambda image_data: convert_to_dspy_image(image_data, policy=image_policy),
+            variant=image_policy.key
+        )
+        return image
+
+    @classmethod
+    async def _compress_history(cls, user_id: str, recent_conversations: str) -> str:
+        """Replace older turns of the history with the user's rolling summary (when enabled)."""
+        history_compressor = model_manager.get_model("history_compressor")
+        return await history_compressor.compress(user_id, recent_conversations)
+
+    @classmethod
+    def schedule_history_summary(cls, user_id: str) -> None:
+        """
+        Update the user's rolling history summary in the background after a persisted message.
+
+        Args:
+            user_id (str): The user whose conversation advanced.
+        """
+        history_compressor = model_manager.get_model("history_compressor")
+        history_compressor.schedule_update(user_id, lambda: get_recent_conversations(collection_name=user_id))
+
+    @classmethod
+    async def _response_cache_embedding(cls, input_data: Message, recent_conversations: str) -> Optional[Any]:
+        """
+        Embed the translated prompt for the semantic response cache.
+
+        Returns None, without embedding, when the cache is disabled or cannot apply (no text,
+        or a personal request: an image, or history unless allowed); failures only bypass
+        the cache.
+
+        Args:
+            input_data (Message): The user message.
+            recent_conversations (str): The user's conversation history.
+
+        Returns:
+            Optional[Any]: The dense e5 embedding of the translated prompt.
+        """
+        response_cache = model_manager.get_model("response_cache")
+        if (
+            not response_cache.enabled
+            or not input_data.content
+            or response_cache.is_personal(recent_conversations=recent_conversations, has_image=bool(input_data.image))
+        ):
+            return None
+        try:
+            # Translation was already done (and cached) for classification
+            translator = await cls.get_translator()
+            translated_prompt = await translator.translate(text=input_data.content, dest="en")
+            return await model_manager.get_model("embedding_engine").dense(f"query: {translated_prompt}")
+        except Exception as e:
+            print(f"Response cache skipped: {str(e)}")
+            return None
+
+    @classmethod
+    def _cached_response(cls, route: str, embedding: Any) -> Optional[AsyncGenerator[Any, None]]:
+        """Replay stream of a cached answer for a non-personal request, or None on a miss."""
+        response_cache = model_manager.get_model("response_cache")
+        if embedding is None:
+            return None
+        response = response_cache.lookup(route, embedding)
+        return response_cache.replay(response) if response is not None else None
+
+    @classmethod
+    def _record_response(
+        cls,
+        route: str,
+        embedding: Any,
+        recent_conversations: str,
+        output_stream: AsyncGenerator[Any, None]
+    ) -> AsyncGenerator[Any, None]:
+        """Wrap a live stream so its answer is cached once it completes, if the prompt had no history."""
+        response_cache = model_manager.get_model("response_cache")
+        # allow_history only relaxes lookups: an answer built on a user's history is never shared
+        if embedding is None or not response_cache.is_storable(recent_conversations=recent_conversations):
+            return output_stream
+        return response_cache.record(output_stream, route, embedding)
+
+    @classmethod
+    async def _hybrid_search(cls, input_data: Message, collection_name: str) -> list:
+        """
+        Run the hybrid search used as RAG context for a message.
+
+        Args:
+            input_data (Message): The user message whose content is the query.
+            collection_name (str): Name of the Qdrant collection to search.
+
+        Returns:
+            list: `[dense_results, sparse_results]` for `rrf`.
+        """
+        return await call_hybrid_search(
+            query=input_data.content,
+            collection_name=collection_name,
+            limit=RAG_SEARCH_LIMIT
+        )
+
+    @classmethod
+    async def handle_rag_response(
+        cls,
+        input_data: Message,
+        collection_name: str,
+        user_id: str,
+        speculation: SpeculativeSearches = None
+    ) -> AsyncGenerator[str, None]:
         """
         Handle a user request using RAG (Retrieval-Augmented Generation) with context retrieval.
 
@@ -84,6 +215,8 @@ class ResponseManager:
             input_data (Message): The user message including content and optional image.
             collection_name (str): Name of the Qdrant collection to search.
             user_id (str): User ID for retrieving previous messages.
+            speculation (SpeculativeSearches, optional): Searches started before classification;
+                the one for `collection_name` is reused and the others are cancelled.
 
         Yields:
             AsyncGenerator[str, None]: A stream of generated response text.
@@ -94,22 +227,35 @@ class ResponseManager:
         start_time = time.time()
         try:
 
-            recent_conversations, points = await asyncio.gather(
-                get_recent_conversations(
+            speculative_search = speculation.claim(collection_name) if speculation is not None else None
+            search = speculative_search or asyncio.create_task(cls._hybrid_search(input_data, collection_name))
+            try:
+                history = await get_recent_conversations(
                     collection_name=user_id
-                ),
-                call_hybrid_search(
-                    query=input_data.content,
-                    collection_name=collection_name,
-                    limit=4
                 )
+                embedding = await cls._response_cache_embedding(input_data, history)
+                cached = cls._cached_response(collection_name, embedding)
+                if cached is not None:
+                    cls._log_execution_time(start_time, "RAG (cached)")
+                    return cached
+                recent_conversations = await cls._compress_history(user_id, history)
+                points = await search
+            finally:
+                # A cached answer (or a failure) leaves the search unused
+                if not search.done():
+                    search.cancel()
+            # Deduplicate and fit passages and history into the prompt token budget
+            context_packer = model_manager.get_model("context_packer")
+            context, recent_conversations = await context_packer.apack(
+                points=points,
+                payload=["text"],
+                recent_conversations=recent_conversations
             )
-            context = rrf(points=points, n_points=3, payload=["text"])
             rag_responder = model_manager.get_model("rag_responder")
             stream_predict = cls._create_stream_predict(rag_responder)
             output_stream = stream_predict(context=context, prompt=input_data.content, image=input_data.image, recent_conversations=recent_conversations)
             cls._log_execution_time(start_time, "RAG")
-            return output_stream
+            return cls._record_response(collection_name, embedding, history, output_stream)
         except Exception as e:
             raise Exception(f"RAG response failed: {str(e)}")
 
@@ -132,7 +278,7 @@ class ResponseManager:
             summarizer = model_manager.get_model("summarizer")
             
             if input_data.image and not input_data.content:
-                image = await convert_to_dspy_image(input_data.image) if input_data.image else None
+                image = await cls._convert_image(input_data)
                 response = await llm_responder.forward(image=image)
                 summarized_context = await summarizer.forward(input=response)
             else:
@@ -160,4 +306,38 @@ class ResponseManager:
             return classifier
         except Exception as e:
             print(f"Failed to load classifier: {str(e)}")
-            raise Exception(f"Classifier loading failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Classifier loading failed: {str(e)}")
+
+    @classmethod
+    async def get_speculator(cls) -> Any:
+        """
+        Load and return the speculative retrieval planner from the model manager.
+
+        Returns:
+            Speculator: The shared planner that starts likely hybrid searches early.
+
+        Raises:
+            Exception: If the speculator cannot be loaded.
+        """
+        try:
+            return model_manager.get_model("speculator")
+        except Exception as e:
+            print(f"Failed to load speculator: {str(e)}")
+            raise Exception(f"Speculator loading failed: {str(e)}")
+
+    @classmethod
+    async def get_translator(cls) -> Any:
+        """
+        Load and return the translation stage from the model manager.
+
+        Returns:
+            TranslationStage: The shared translation stage used before classification.
+
+        Raises:
+            Exception: If the translation stage cannot be loaded.
+        """
+        try:
+            return model_manager.get_model("translator")
+        except Exception as e:
+            print(f"Failed to load translator: {str(e)}")
+            raise Exception(f"Translator loading failed: {str(e)}")
\ No newline at end of file
@@ -1,10 +1,13 @@
 import time
 import asyncio
 from rich import print
-from typing import AsyncGenerator
-from googletrans import Translator
+from typing import AsyncGenerator, Optional
 from app.schemas.message import Message
 from .response_manager import ResponseManager
+from app.utils.orchestration.speculation import SpeculativeSearches
+
+# Labels answered by the LLM directly; every other label is a knowledge collection for RAG
+NON_RETRIEVAL_LABELS = {"not related to medical", "code"}
 
 class TextHandler(ResponseManager):
     """Handler specialized for text-only inputs."""
@@ -24,17 +27,55 @@ class TextHandler(ResponseManager):
         Raises:
             Exception: If classification or routing fails.
         """        
+        speculation_task = asyncio.create_task(cls._start_speculative_retrieval(input_data, user_id=user_id))
         try:
-            # Classify text
+            # Classify text while likely collections are already being searched
             text_result = await cls._classify_text(input_data)
             print(f"Text classification completed: {text_result}")
-            
+
+            speculation = await speculation_task
+            speculator = await cls.get_speculator()
+            speculator.remember(user_id, text_result)
+
             # Route based on classification
-            return await cls._route_text_response(input_data, text_result, user_id=user_id)
+            return await cls._route_text_response(input_data, text_result, user_id=user_id, speculation=speculation)
             
         except Exception as e:
             print(f"Text response handling failed: {str(e)}")
             raise Exception(f"Text response failed: {str(e)}")
+        finally:
+            # Nothing speculative outlives routing, including on failure
+            if not speculation_task.done():
+                speculation_task.cancel()
+            elif not speculation_task.cancelled() and speculation_task.result() is not None:
+                speculation_task.result().cancel()
+
+    @classmethod
+    async def _start_speculative_retrieval(cls, input_data: Message = None, user_id: str = None) -> Optional[SpeculativeSearches]:
+        """
+        Start hybrid search for the collections the message is most likely routed to.
+
+        Candidates come from the user's previous label and the classifier's embedding pre-classifier
+        on the untranslated text. Speculation is best-effort: any failure just disables it for the request.
+
+        Args:
+            input_data (Message): The user message containing text.
+            user_id (str): The user's ID, used for their previous label.
+
+        Returns:
+            Optional[SpeculativeSearches]: The running searches, or None when speculation is off.
+        """
+        try:
+            speculator, classifier = await asyncio.gather(cls.get_speculator(), cls.get_classifier())
+            if not speculator.enabled:
+                return None
+
+            collections = [label for label in classifier.candidate_labels if label not in NON_RETRIEVAL_LABELS]
+            labels = await speculator.predict(user_id, input_data.content, collections, classifier.rank_labels)
+            return speculator.start(labels, lambda collection_name: cls._hybrid_search(input_data, collection_name))
+        except Exception as e:
+            print(f"Speculative retrieval skipped: {str(e)}")
+            return None
     
     @classmethod
     async def _classify_text(cls, input_data: Message = None) -> str:
@@ -51,28 +92,31 @@ class TextHandler(ResponseManager):
             Exception: If translation, classification, or either task fails.
         """
         try:
-            async with Translator() as translator:
-                translate_task = translator.translate(text=input_data.content, src="auto", dest="en")
-                
-                classifier_task = cls.get_classifier()
+            translator, classifier = await asyncio.gather(cls.get_translator(), cls.get_classifier())
 
-                start_time = time.time()
+            start_time = time.time()
 
-                # Run both coroutines concurrently
-                translated_prompt, classifier = await asyncio.gather(translate_task, classifier_task)
+            # English input skips the remote hop; repeated texts are served from the cache
+            translated_prompt = await translator.translate(text=input_data.content, dest="en")
                 
-            # Classify text
-            text_result = await classifier.classify_text(prompt=translated_prompt.text)
+            # Classify text (the deciding cascade stage is recorded in the classifier metrics)
+            label = await classifier.classify_text(prompt=translated_prompt)
             
             cls._log_execution_time(start_time, "Text Classification")
-            return text_result
+            return label
             
         except Exception as e:
             print(f"Text classification failed: {str(e)}")
             raise Exception(f"Text classification failed: {str(e)}")
     
     @classmethod
-    async def _route_text_response(cls, input_data: Message = None, text_result: str = None, user_id: str = None) -> AsyncGenerator[str, None]:
+    async def _route_text_response(
+        cls,
+        input_data: Message = None,
+        text_result: str = None,
+        user_id: str = None,
+        speculation: SpeculativeSearches = None
+    ) -> AsyncGenerator[str, None]:
         """
         Route a classified text message to either RAG or general LLM pipeline depending on classification.
 
@@ -80,6 +124,7 @@ class TextHandler(ResponseManager):
             input_data (Message): The original user message.
             text_result (str): Classification label indicating the nature of the text.
             user_id (str): The user's ID for history/context-aware retrieval.
+            speculation (SpeculativeSearches, optional): Searches started before classification.
 
         Yields:
             AsyncGenerator[str, None]: A stream of tokens generated by the selected model.
@@ -88,11 +133,19 @@ class TextHandler(ResponseManager):
             Exception: If the response routing logic fails.
         """
         try:
-            is_medical = text_result != "not related to medical" and text_result != "code"
-            
+            is_medical = text_result not in NON_RETRIEVAL_LABELS
+
+            if not is_medical and speculation is not None:
+                speculation.discard()
+
             if is_medical:
                 # Medical text - use RAG
-                return await cls.handle_rag_response(input_data=input_data, collection_name=text_result, user_id=user_id)
+                return await cls.handle_rag_response(
+                    input_data=input_data,
+                    collection_name=text_result,
+                    user_id=user_id,
+                    speculation=speculation
+                )
             elif text_result == "code":
                 # Code-related text - use LLM responder
                 return await cls.handle_llm_response(input_data=input_data, user_id=user_id)
@@ -1,9 +1,7 @@
-import asyncio
 from rich import print
 from app.schemas.message import Message
 from typing import AsyncGenerator
 from ..manage_responses import TextHandler, ImageHandler
-from app.utils.image_processing import convert_to_dspy_image
 
 class TextImageHandler(TextHandler, ImageHandler):
     """Handler specialized for text+image inputs."""
@@ -24,7 +22,7 @@ class TextImageHandler(TextHandler, ImageHandler):
             Exception: If classification or routing fails.
         """
         try:
-            input_data.image = await asyncio.create_task(convert_to_dspy_image(input_data.image))
+            input_data.image = await cls._convert_image(input_data)
 
             # Route based on classification
             return await cls.handle_text_response(input_data=input_data, user_id=user_id)
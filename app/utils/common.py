@@ -1,6 +1,8 @@
 import io
 import re
 import base64
+import unicodedata
+from typing import Any
 from datetime import datetime
 from fastapi.responses import JSONResponse
 
@@ -99,4 +101,44 @@ def serialize_image(image) -> str:
             return match.group(1) if match else None
         return image.url
 
-    return None
\ No newline at end of file
+    return None
+
+def normalize_text(text: str, casefold: bool = True) -> str:
+    """
+    Normalize text for use as a cache key.
+
+    Applies Unicode NFC normalization, case folding, and collapses runs of whitespace.
+
+    Args:
+        text (str): The raw text.
+        casefold (bool): Whether to fold case. Keys of model inputs must keep it, since the
+            tokenizers are case-sensitive ("US" and "us" embed and translate differently).
+
+    Returns:
+        str: The normalized text.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text)
+    return " ".join((text.casefold() if casefold else text).split())
+
+def model_revision(model: Any) -> str:
+    """
+    Return the Hugging Face commit hash a model was loaded from, or "unknown".
+
+    The model's own config is checked first, then those of its submodules (e.g. the
+    transformers model inside a wrapper module). Used to key shared weight files and
+    embedding cache identities, so both change together when a model is updated.
+
+    Args:
+        model (Any): A transformers / PyTorch / ONNX Runtime model.
+
+    Returns:
+        str: The commit hash.
+    """
+    candidates = [model, *(model.modules() if hasattr(model, "modules") else [])]
+    for candidate in candidates:
+        revision = getattr(getattr(candidate, "config", None), "_commit_hash", None)
+        if revision:
+            return revision
+    return "unknown"
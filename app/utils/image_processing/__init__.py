@@ -1 +1,4 @@
-from .convert_to_dspy_image import *
\ No newline at end of file
+from .image_policy import *
+from .image_fetcher import *
+from .convert_to_dspy_image import *
+from .image_store import *
@@ -1,76 +1,96 @@
-import os
 import io
 import base64
-import requests
-import tempfile
+import asyncio
+import threading
 from dspy import Image
 from pathlib import Path
 from PIL import Image as PILImage
-from typing import Union
+from typing import Optional, Union
+from .image_policy import ImagePolicy
+from .image_fetcher import get_image_fetcher
 
-async def convert_to_dspy_image(image_data: Union[str, bytes, PILImage.Image, io.BytesIO] = None) -> Image:
+# Full-resolution JPEG q95 with the default input limits, used when no policy is given
+_DEFAULT_POLICY = ImagePolicy()
+
+# One encode buffer per worker thread, reused across conversions
+_buffers = threading.local()
+
+async def convert_to_dspy_image(image_data: Union[str, bytes, PILImage.Image, io.BytesIO] = None, policy: ImagePolicy = None) -> Image:
     """
     Convert various image data types to dspy Image
     
+    The image is decoded once, resized and re-encoded according to the model's image policy
+    into a reused in-memory buffer, and passed to dspy as a data URI; nothing touches the
+    disk. URLs are downloaded asynchronously with the policy's byte cap. The CPU-bound work
+    runs in a worker thread so it does not block the event loop.
+
     Args:
         image_data: Can be URL, file path, base64, bytes, PIL Image, or BytesIO
+        policy (ImagePolicy, optional): Resizing, encoding and input limits; defaults to
+            full-resolution JPEG q95.
     
     Returns:
         dspy.Image object
-    """
-    # Use temporary file with proper cleanup
-    temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-    
-    try:
-        # First, get the image as PIL Image for processing
-        pil_image = _convert_to_pil(image_data)
-        
-        # Convert RGBA to RGB if necessary
-        if pil_image.mode in ('RGBA', 'LA', 'P'):
-            # Create a white background for transparency
-            rgb_image = PILImage.new('RGB', pil_image.size, (255, 255, 255))
-            if pil_image.mode == 'P':
-                pil_image = pil_image.convert('RGBA')
-            rgb_image.paste(pil_image, mask=pil_image.split()[-1] if pil_image.mode in ('RGBA', 'LA') else None)
-            pil_image = rgb_image
-        
-        # Close the file descriptor before saving
-        if temp_fd is not None:
-            os.close(temp_fd)
-            temp_fd = None
-            
-        # Save image to temp file
-        pil_image.save(temp_path, format='JPEG', quality=95)
-        
-        # Load with dspy
-        dspy_image = Image.from_file(temp_path)
-        
-        return dspy_image
-        
-    except Exception as e:
-        raise e
-        
-    finally:
-        # Clean up temporary file and file descriptor
-        if temp_fd is not None:
-            try:
-                os.close(temp_fd)
-            except:
-                pass
-        
-        if os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except:
-                pass
-
 
-def _convert_to_pil(image_data: Union[str, bytes, PILImage.Image, io.BytesIO] = None) -> PILImage.Image:
+    Raises:
+        ValueError: If the image exceeds the policy's limits or its type is unsupported.
+    """
+    policy = policy or _DEFAULT_POLICY
+    if isinstance(image_data, str) and image_data.startswith(('http://', 'https://')):
+        image_data = await get_image_fetcher().fetch(image_data, max_bytes=policy.max_bytes)
+    return await asyncio.to_thread(_convert_sync, image_data, policy)
+
+
+def _convert_sync(image_data: Union[str, bytes, PILImage.Image, io.BytesIO], policy: ImagePolicy) -> Image:
+    """Blocking body of `convert_to_dspy_image`."""
+    # First, get the image as PIL Image for processing
+    pil_image = _convert_to_pil(image_data, max_bytes=policy.max_bytes)
+
+    # Image.open only reads the header, so oversized images are rejected before decoding
+    width, height = pil_image.size
+    if width * height > policy.max_pixels:
+        raise ValueError(f"Image is {width}x{height} pixels, above the limit of {policy.max_pixels}")
+
+    pil_image = policy.apply(pil_image)
+
+    # Encode into this thread's buffer and build the data URI straight from its memory
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _buffers.buffer = io.BytesIO()
+    buffer.seek(0)
+    buffer.truncate()
+    policy.save(pil_image, buffer)
+    with buffer.getbuffer() as encoded:
+        policy.record(_encoded_size(image_data), encoded.nbytes)
+        data_uri = f"data:{policy.mime_type};base64," + base64.b64encode(encoded).decode("ascii")
+
+    return Image(url=data_uri)
+
+
+def _encoded_size(image_data: Union[str, bytes, PILImage.Image, io.BytesIO]) -> Optional[int]:
+    """Approximate encoded size of inline image data (None for URLs, paths and PIL images)."""
+    if isinstance(image_data, bytes):
+        return len(image_data)
+    if isinstance(image_data, io.BytesIO):
+        return image_data.getbuffer().nbytes
+    if isinstance(image_data, str) and image_data.startswith('data:image'):
+        return len(image_data.split(',', 1)[1]) * 3 // 4
+    if isinstance(image_data, str) and not image_data.startswith(('http://', 'https://')) and len(image_data) % 4 == 0:
+        return len(image_data) * 3 // 4
+    return None
+
+
+def _check_size(size: int, max_bytes: int) -> None:
+    """Reject image input larger than `max_bytes`."""
+    if max_bytes is not None and size > max_bytes:
+        raise ValueError(f"Image is {size} bytes, above the limit of {max_bytes}")
+
+
+def _convert_to_pil(image_data: Union[str, bytes, PILImage.Image, io.BytesIO] = None, max_bytes: int = None) -> PILImage.Image:
     """
     Convert various types of image input into a PIL Image object.
 
     Supports:
-    - URLs (http/https)
     - Data URI base64 strings
     - Plain base64-encoded image strings
     - Local file paths
@@ -80,48 +100,45 @@ def _convert_to_pil(image_data: Union[str, bytes, PILImage.Image, io.BytesIO] =
 
     Args:
         image_data (Union[str, bytes, PILImage.Image, io.BytesIO], optional): The input image data.
+        max_bytes (int, optional): Largest accepted encoded image size in bytes.
 
     Returns:
         PILImage.Image: A PIL-compatible image object.
 
     Raises:
-        ValueError: If the image data type is unsupported.
+        ValueError: If the image data type is unsupported or larger than `max_bytes`.
         FileNotFoundError: If a local file path does not exist.
-        requests.HTTPError: If the HTTP request for a URL fails.
     """
     if isinstance(image_data, str):
-        if image_data.startswith(('http://', 'https://')):
-            # URL
-            response = requests.get(image_data, timeout=30)
-            response.raise_for_status()
-            return PILImage.open(io.BytesIO(response.content))
-            
-        elif image_data.startswith('data:image'):
+        if image_data.startswith('data:image'):
             # Base64 with data URI prefix
-            image_data = image_data.split(',')[1]
-            image_bytes = base64.b64decode(image_data)
-            return PILImage.open(io.BytesIO(image_bytes))
+            image_data = image_data.split(',', 1)[1]
+            _check_size(len(image_data) * 3 // 4, max_bytes)
+            return PILImage.open(io.BytesIO(base64.b64decode(image_data)))
             
-        elif _is_base64(image_data):
-            # Plain base64 string
+        elif len(image_data) % 4 == 0:
+            # Plain base64 string, decoded (and validated) once
+            _check_size(len(image_data) * 3 // 4, max_bytes)
             try:
-                image_bytes = base64.b64decode(image_data)
-                return PILImage.open(io.BytesIO(image_bytes))
+                image_bytes = base64.b64decode(image_data, validate=True)
             except Exception:
                 # If base64 decode fails, treat as file path
-                return _handle_file_path_pil(image_data)
+                return _handle_file_path_pil(image_data, max_bytes=max_bytes)
+            return PILImage.open(io.BytesIO(image_bytes))
                 
         else:
             # Local file path
-            return _handle_file_path_pil(image_data)
+            return _handle_file_path_pil(image_data, max_bytes=max_bytes)
             
     elif isinstance(image_data, bytes):
+        _check_size(len(image_data), max_bytes)
         return PILImage.open(io.BytesIO(image_data))
         
     elif isinstance(image_data, PILImage.Image):
         return image_data.copy()
         
     elif isinstance(image_data, io.BytesIO):
+        _check_size(image_data.getbuffer().nbytes, max_bytes)
         image_data.seek(0)
         return PILImage.open(image_data)
         
@@ -129,38 +146,20 @@ def _convert_to_pil(image_data: Union[str, bytes, PILImage.Image, io.BytesIO] =
         raise ValueError(f"Unsupported image data type: {type(image_data)}")
 
 
-def _is_base64(string: str = None) -> bool:
-    """
-    Check if a string is a valid base64-encoded value.
-
-    Args:
-        string (str, optional): The string to check.
-
-    Returns:
-        bool: True if the string is valid base64, False otherwise.
-    """
-    try:
-        if len(string) % 4 != 0:
-            return False
-        base64.b64decode(string, validate=True)
-        return True
-    except Exception:
-        return False
-
-
-def _handle_file_path_pil(file_path: str = None) -> PILImage.Image:
+def _handle_file_path_pil(file_path: str = None, max_bytes: int = None) -> PILImage.Image:
     """
     Convert a valid local image file path to a PIL Image.
 
     Args:
         file_path (str, optional): The file path to the image.
+        max_bytes (int, optional): Largest accepted file size in bytes.
 
     Returns:
         PILImage.Image: A PIL image object.
 
     Raises:
         FileNotFoundError: If the file path does not exist.
-        ValueError: If the path is not a file or not a supported image format.
+        ValueError: If the path is not a file, not a supported image format or too large.
     """
     path = Path(file_path)
     
@@ -173,5 +172,6 @@ def _handle_file_path_pil(file_path: str = None) -> PILImage.Image:
     valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'}
     if path.suffix.lower() not in valid_extensions:
         raise ValueError(f"File does not appear to be an image: {file_path}")
-    
+
+    _check_size(path.stat().st_size, max_bytes)
     return PILImage.open(str(path))
\ No newline at end of file
@@ -0,0 +1,180 @@
+import time
+import httpx
+import asyncio
+import hashlib
+from urllib.parse import urlsplit
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+
+_fetcher = None
+
+def _is_non_image(content_type: str) -> bool:
+    """
+    Whether a Content-Type is clearly not an image (text, HTML, JSON or XML).
+
+    Object stores and CDNs often serve images as `application/octet-stream` or without a
+    Content-Type; those are accepted and left to the image decoder to validate.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in ("application/json", "application/xml", "application/xhtml+xml")
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+class ImageFetcher:
+    """
+    Async downloader for images referenced by URL.
+
+    Bodies are streamed and abandoned as soon as they exceed the byte cap, and responses that
+    are clearly not images (text, HTML, JSON) are rejected from their headers, before any body
+    is read; anything else is validated when decoded. Each host gets at most `max_per_host`
+    concurrent downloads over a small keep-alive pool. Recently fetched images are cached:
+    within `fresh_seconds` they are served without a request, afterwards they are revalidated
+    with their ETag / Last-Modified, and bodies are held once per content hash even when
+    several URLs point at the same image.
+    """
+
+    def __init__(self, config: dict = None):
+        """
+        Args:
+            config (dict, optional): Settings "max_connections", "max_keepalive_connections",
+                "max_per_host", "connect_timeout", "read_timeout", "fresh_seconds",
+                "cache_size", "cache_ttl_seconds", "cache_max_bytes" (largest body kept) and
+                "allowed_hosts" (when set, other hosts are rejected).
+        """
+        config = config or {}
+        self.max_per_host = config.get("max_per_host", 4)
+        self.fresh_seconds = config.get("fresh_seconds", 60)
+        self.cache_max_bytes = config.get("cache_max_bytes", 5 * 1024 * 1024)
+        self.allowed_hosts = set(config.get("allowed_hosts", []))
+        self.client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=httpx.Timeout(config.get("read_timeout", 10.0), connect=config.get("connect_timeout", 3.0)),
+            limits=httpx.Limits(
+                max_connections=config.get("max_connections", 32),
+                max_keepalive_connections=config.get("max_keepalive_connections", 8),
+            ),
+        )
+        cache_ttl = config.get("cache_ttl_seconds", 3600)
+        # url -> {"digest", "etag", "last_modified", "checked_at"}; digest -> body
+        self.entries = TTLCache(max_size=config.get("cache_size", 512), ttl=cache_ttl)
+        self.bodies = TTLCache(max_size=config.get("cache_size", 512), ttl=cache_ttl)
+        self._host_limits = TTLCache(max_size=1024, ttl=None)
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_per_host)
+            self._host_limits.set(host, limit)
+        return limit
+
+    async def fetch(self, url: str, max_bytes: int = None) -> bytes:
+        """
+        Download an image, reusing or revalidating a cached copy when possible.
+
+        Args:
+            url (str): An http(s) image URL.
+            max_bytes (int, optional): Largest accepted body size in bytes.
+
+        Returns:
+            bytes: The image bytes.
+
+        Raises:
+            ValueError: If the host is not allowed, the response is clearly not an image or
+                the body exceeds `max_bytes`.
+            httpx.HTTPError: If the request fails.
+        """
+        host = urlsplit(url).hostname or ""
+        if self.allowed_hosts and host not in self.allowed_hosts:
+            metrics.increment("image_fetch.requests", result="rejected")
+            raise ValueError(f"Image host not allowed: {host}")
+
+        entry = self.entries.get(url)
+        body = self.bodies.get(entry["digest"]) if entry else None
+        if body is not None and max_bytes is not None and len(body) > max_bytes:
+            metrics.increment("image_fetch.requests", result="rejected")
+            raise ValueError(f"Image is {len(body)} bytes, above the limit of {max_bytes}")
+        if body is not None and time.monotonic() - entry["checked_at"] < self.fresh_seconds:
+            metrics.increment("image_fetch.requests", result="cached")
+            return body
+
+        headers = {}
+        if body is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        start_time = time.perf_counter()
+        async with self._host_limit(host):
+            async with self.client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and body is not None:
+                    entry["checked_at"] = time.monotonic()
+                    self.entries.set(url, entry)
+                    metrics.increment("image_fetch.requests", result="not_modified")
+                    return body
+                response.raise_for_status()
+                if self.allowed_hosts and response.url.host not in self.allowed_hosts:
+                    metrics.increment("image_fetch.requests", result="rejected")
+                    raise ValueError(f"Image host not allowed after redirect: {response.url.host}")
+
+                content_type = response.headers.get("content-type", "")
+                if _is_non_image(content_type):
+                    metrics.increment("image_fetch.requests", result="rejected")
+                    raise ValueError(f"URL did not return an image (content type '{content_type}')")
+                declared = int(response.headers.get("content-length") or 0)
+                if max_bytes is not None and declared > max_bytes:
+                    metrics.increment("image_fetch.requests", result="rejected")
+                    raise ValueError(f"Image is {declared} bytes, above the limit of {max_bytes}")
+
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        metrics.increment("image_fetch.requests", result="rejected")
+                        raise ValueError(f"Image is over the limit of {max_bytes} bytes")
+                    chunks.append(chunk)
+                body = b"".join(chunks)
+
+        metrics.increment("image_fetch.requests", result="downloaded")
+        metrics.increment("image_fetch.bytes", len(body))
+        metrics.observe("image_fetch.seconds", time.perf_counter() - start_time)
+
+        if len(body) <= self.cache_max_bytes:
+            digest = hashlib.sha256(body).hexdigest()
+            body = self.bodies.get(digest) or body
+            self.bodies.set(digest, body)
+            self.entries.set(url, {
+                "digest": digest,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "checked_at": time.monotonic(),
+            })
+        return body
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        await self.client.aclose()
+
+def get_image_fetcher(config: dict = None) -> ImageFetcher:
+    """
+    Return the shared image fetcher, creating it on first use.
+
+    Args:
+        config (dict, optional): Fetcher settings, only applied when it is first created.
+
+    Returns:
+        ImageFetcher: The shared fetcher.
+    """
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = ImageFetcher(config=config)
+    return _fetcher
+
+async def close_image_fetcher() -> None:
+    """Close the shared image fetcher (at application shutdown); the next use creates a new one."""
+    global _fetcher
+    if _fetcher is not None:
+        fetcher, _fetcher = _fetcher, None
+        await fetcher.close()
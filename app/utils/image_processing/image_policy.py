@@ -0,0 +1,113 @@
+import io
+import json
+import hashlib
+from PIL import Image as PILImage, ImageOps
+from app.utils.metrics import metrics
+
+# Defaults reproduce full-resolution JPEG q95; set "max_long_edge" to downscale
+_DEFAULTS = {
+    "max_long_edge": None,
+    "format": "JPEG",
+    "quality": 95,
+    "strip_exif": True,
+    "strip_alpha": True,
+    "background": [255, 255, 255],
+    "max_bytes": 20 * 1024 * 1024,
+    "max_pixels": 40_000_000,
+}
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+class ImagePolicy:
+    """
+    How images are resized and encoded before they are sent to the multimodal LLM.
+
+    Images are downscaled so their long edge fits `max_long_edge` (JPEG sources are decoded at
+    reduced scale when possible), optionally rotated upright and stripped of EXIF metadata,
+    flattened onto `background` when alpha is stripped or the format has none, and encoded in
+    the target format and quality. Oversized inputs are rejected by `max_bytes` (encoded size)
+    and `max_pixels` (width x height).
+    """
+
+    def __init__(self, config: dict = None, model: str = None):
+        """
+        Args:
+            config (dict, optional): Settings "max_long_edge", "format" ("JPEG", "PNG" or
+                "WEBP"), "quality", "strip_exif", "strip_alpha", "background", "max_bytes"
+                and "max_pixels", plus "models": per-model overrides keyed by model name.
+            model (str, optional): LLM model name, used for its overrides and metric labels.
+        """
+        config = config or {}
+        settings = {**_DEFAULTS, **{key: value for key, value in config.items() if key in _DEFAULTS}}
+        settings.update(config.get("models", {}).get(model, {}))
+        self.model = model
+        self.max_long_edge = settings["max_long_edge"]
+        self.format = settings["format"].upper()
+        self.quality = settings["quality"]
+        self.strip_exif = settings["strip_exif"]
+        self.strip_alpha = settings["strip_alpha"]
+        self.background = tuple(settings["background"])
+        self.max_bytes = settings["max_bytes"]
+        self.max_pixels = settings["max_pixels"]
+        if self.format not in _MIME_TYPES:
+            raise ValueError(f"Unsupported image format '{self.format}'; expected one of {list(_MIME_TYPES)}")
+        # Identifies the output so cached conversions are not reused across policies
+        self.key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def mime_type(self) -> str:
+        return _MIME_TYPES[self.format]
+
+    def _flatten(self, image: PILImage.Image) -> PILImage.Image:
+        """Composite an image with transparency onto the background color."""
+        if image.mode in ("P", "PA"):
+            image = image.convert("RGBA")
+        background = PILImage.new("RGB", image.size, self.background)
+        background.paste(image, mask=image.split()[-1])
+        return background
+
+    def apply(self, image: PILImage.Image) -> PILImage.Image:
+        """
+        Resize, orient and flatten a freshly opened image according to the policy.
+
+        Args:
+            image (PILImage.Image): The source image (not yet decoded, for the draft shortcut).
+
+        Returns:
+            PILImage.Image: The image ready to encode.
+        """
+        if self.max_long_edge and max(image.size) > self.max_long_edge:
+            # Let the JPEG decoder skip detail that the resize would discard anyway
+            scale = self.max_long_edge / max(image.size)
+            image.draft("RGB", (round(image.width * scale), round(image.height * scale)))
+
+        if self.strip_exif:
+            # Bake the EXIF orientation into the pixels before the metadata is dropped
+            image = ImageOps.exif_transpose(image)
+
+        if self.max_long_edge and max(image.size) > self.max_long_edge:
+            image.thumbnail((self.max_long_edge, self.max_long_edge), PILImage.LANCZOS)
+            metrics.increment("image_policy.resized", model=self.model)
+
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        if has_alpha and (self.strip_alpha or self.format == "JPEG"):
+            image = self._flatten(image)
+        elif self.format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+            image = image.convert("RGB")
+        return image
+
+    def save(self, image: PILImage.Image, buffer: io.BytesIO) -> None:
+        """Encode an image returned by `apply` into `buffer` in the target format."""
+        options = {}
+        if self.format in ("JPEG", "WEBP"):
+            options["quality"] = self.quality
+        if not self.strip_exif and "exif" in image.info:
+            options["exif"] = image.info["exif"]
+        image.save(buffer, format=self.format, **options)
+
+    def record(self, bytes_before: int, bytes_after: int) -> None:
+        """Publish the encoded size of an image before and after the policy was applied."""
+        if bytes_before is not None:
+            metrics.observe("image_policy.bytes", bytes_before, stage="before", model=self.model)
+            metrics.increment("image_policy.bytes_saved", max(0, bytes_before - bytes_after), model=self.model)
+        metrics.observe("image_policy.bytes", bytes_after, stage="after", model=self.model)
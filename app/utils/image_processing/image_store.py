@@ -0,0 +1,301 @@
+import os
+import base64
+import hashlib
+import asyncio
+import tempfile
+from pathlib import Path
+from dspy import Image
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+
+_store = None
+
+def image_bytes(image_data: Any = None) -> Optional[bytes]:
+    """
+    Return the raw bytes of an inline image (bytes, data URI or plain base64 string).
+
+    URLs, file paths and other inputs are not inline content and return None.
+    """
+    if isinstance(image_data, bytes):
+        return image_data
+    if not isinstance(image_data, str):
+        return None
+    if image_data.startswith("data:"):
+        header, _, encoded = image_data.partition(",")
+        return base64.b64decode(encoded) if header.endswith(";base64") else None
+    if image_data.startswith(("http://", "https://")) or len(image_data) % 4 != 0:
+        return None
+    try:
+        return base64.b64decode(image_data, validate=True)
+    except Exception:
+        return None
+
+
+class BlobBackend(ABC):
+    """Interface for the blob storage holding image bytes under their content hash."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Return True if a blob is stored under `key`."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the blob stored under `key`, or None if there is none."""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`, replacing any existing blob."""
+
+
+class LocalDiskBackend(BlobBackend):
+    """Backend storing blobs as files below a root directory (e.g. a volume shared with the data service)."""
+
+    def __init__(self, root: str = "image_store"):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename, so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+class S3Backend(BlobBackend):
+    """Backend storing blobs in an S3 (or S3-compatible) bucket; needs `boto3`."""
+
+    def __init__(self, bucket: str, prefix: str = "", **client_kwargs: Any):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", **client_kwargs)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+
+def _disk_backend(config: dict) -> BlobBackend:
+    return LocalDiskBackend(root=config.get("root", "image_store"))
+
+def _s3_backend(config: dict) -> BlobBackend:
+    return S3Backend(
+        bucket=config["bucket"],
+        prefix=config.get("prefix", ""),
+        **config.get("client", {})
+    )
+
+_BACKENDS = {
+    "disk": _disk_backend,
+    "s3": _s3_backend,
+}
+
+
+class ImageStore:
+    """
+    Content-addressed store for uploaded images.
+
+    Images are keyed by the SHA-256 of their bytes, so a re-sent image is stored once and
+    messages can be persisted with that hash instead of the base64 payload. The converted
+    (normalized) image is cached under the same hash, in process memory and optionally Redis,
+    so a repeated image skips decoding and re-encoding. Blob storage and Redis failures
+    never fail a request: the image is then converted and persisted inline as before.
+    """
+
+    def __init__(self, config: dict = None, redis_client: Any = None, backend: BlobBackend = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "backend" ("disk" or "s3") with its
+                settings under "disk" ("root") or "s3" ("bucket", "prefix", "client": boto3
+                client arguments), "local_size", "local_ttl_seconds", "redis_ttl_seconds",
+                "known_size" and "key_prefix".
+            redis_client (Any, optional): Async Redis client with `decode_responses=False`
+                for the shared converted-image tier.
+            backend (BlobBackend, optional): Explicit backend instance, overriding the config.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.redis_client = redis_client
+        self.redis_ttl = config.get("redis_ttl_seconds", 24 * 3600)
+        self.key_prefix = config.get("key_prefix", "image_store")
+        self.converted = TTLCache(
+            max_size=config.get("local_size", 256),
+            ttl=config.get("local_ttl_seconds", 3600),
+        )
+        # Hashes already known to be stored, so re-sent images skip the backend lookup
+        self.known = TTLCache(max_size=config.get("known_size", 4096), ttl=None)
+        self.backend = backend
+        if self.backend is None and self.enabled:
+            name = config.get("backend", "disk")
+            self.backend = _BACKENDS[name](config.get(name, {}))
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Content hash of the image bytes."""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def blob_key(digest: str) -> str:
+        """Blob key of a hash, fanned out over subdirectories by its first two characters."""
+        return f"{digest[:2]}/{digest}"
+
+    async def put(self, data: bytes, digest: str = None) -> Optional[str]:
+        """
+        Store image bytes unless an identical image is already stored.
+
+        Args:
+            data (bytes): The raw image bytes.
+            digest (str, optional): Their hash, if already computed.
+
+        Returns:
+            Optional[str]: The hash, or None if the image could not be stored.
+        """
+        digest = digest or self.digest(data)
+        if self.known.get(digest):
+            metrics.increment("image_store.puts", result="deduplicated")
+            metrics.increment("image_store.bytes_deduplicated", len(data))
+            return digest
+
+        key = self.blob_key(digest)
+        try:
+            if await asyncio.to_thread(self.backend.exists, key):
+                metrics.increment("image_store.puts", result="deduplicated")
+                metrics.increment("image_store.bytes_deduplicated", len(data))
+            else:
+                await asyncio.to_thread(self.backend.put, key, data)
+                metrics.increment("image_store.puts", result="stored")
+                metrics.increment("image_store.bytes_stored", len(data))
+        except Exception as e:
+            print(f"[Image Store] Blob write failed: {e}")
+            metrics.increment("image_store.errors", operation="put")
+            return None
+        self.known.set(digest, True)
+        return digest
+
+    async def get(self, digest: str) -> Optional[bytes]:
+        """Return the stored bytes of an image hash, or None if it is not stored."""
+        return await asyncio.to_thread(self.backend.get, self.blob_key(digest))
+
+    def _converted_key(self, digest: str, variant: str = "") -> str:
+        return f"{self.key_prefix}:converted:{variant}:{digest}" if variant else f"{self.key_prefix}:converted:{digest}"
+
+    async def get_converted(self, digest: str, variant: str = "") -> Optional[Image]:
+        """Return the cached converted image for a hash and conversion variant, or None on a miss."""
+        key = self._converted_key(digest, variant)
+        image = self.converted.get(key)
+        if image is not None:
+            metrics.increment("image_store.converted_hits", tier="local")
+            return image
+
+        if self.redis_client is not None:
+            try:
+                raw = await self.redis_client.get(key)
+            except Exception as e:
+                print(f"[Image Store] Redis read failed: {e}")
+                metrics.increment("image_store.errors", operation="get_converted")
+                raw = None
+            if raw is not None:
+                image = Image(url=raw.decode("utf-8"))
+                self.converted.set(key, image)
+                metrics.increment("image_store.converted_hits", tier="redis")
+                return image
+
+        metrics.increment("image_store.converted_misses")
+        return None
+
+    async def set_converted(self, digest: str, image: Image, variant: str = "") -> None:
+        """Cache the converted image for a hash and conversion variant."""
+        key = self._converted_key(digest, variant)
+        self.converted.set(key, image)
+        if self.redis_client is not None and isinstance(getattr(image, "url", None), str):
+            try:
+                await self.redis_client.set(key, image.url.encode("utf-8"), ex=self.redis_ttl)
+            except Exception as e:
+                print(f"[Image Store] Redis write failed: {e}")
+                metrics.increment("image_store.errors", operation="set_converted")
+
+    async def prepare(
+        self,
+        image_data: Any,
+        convert: Callable[[Any], Awaitable[Image]],
+        variant: str = ""
+    ) -> Tuple[Optional[str], Image]:
+        """
+        Convert an uploaded image, reusing a cached conversion, and store its bytes.
+
+        Args:
+            image_data (Any): The image as received (base64 string, data URI, bytes, URL, ...).
+            convert (Callable): Async function converting image data into a dspy Image.
+            variant (str): Identifies the conversion settings (e.g. the image policy), so
+                cached conversions are only reused for the same output.
+
+        Returns:
+            Tuple[Optional[str], Image]: The image hash (None when the store is disabled,
+            the image is not inline content or could not be stored) and the converted image.
+        """
+        data = image_bytes(image_data) if self.enabled else None
+        if data is None:
+            return None, await convert(image_data)
+
+        digest = self.digest(data)
+        image = await self.get_converted(digest, variant)
+        if image is None:
+            image = await convert(data)
+            await self.set_converted(digest, image, variant)
+        return await self.put(data, digest), image
+
+
+def get_image_store(config: dict = None, redis_client: Any = None) -> ImageStore:
+    """
+    Return the singleton image store, creating it on first use.
+
+    Args:
+        config (dict, optional): Store settings, only applied when the store is first created.
+        redis_client (Any, optional): Async binary Redis client for the converted-image tier.
+
+    Returns:
+        ImageStore: The shared image store.
+    """
+    global _store
+    if _store is None:
+        _store = ImageStore(config=config, redis_client=redis_client)
+    return _store
@@ -0,0 +1,167 @@
+import os
+import fcntl
+import shutil
+from pathlib import Path
+from typing import Callable
+
+# Inference backend settings; "torch" runs eager PyTorch, "onnx" runs int8-quantized ONNX Runtime
+_settings = {
+    "backend": "torch",
+    "onnx_dir": "onnx_models",
+    "quantization": "avx2",
+}
+
+def configure_inference_backend(config: dict = None) -> None:
+    """
+    Select the inference backend used when models are loaded.
+
+    Must be called before the first model load; already loaded models keep their backend.
+
+    Args:
+        config (dict, optional): Settings "backend" ("torch" or "onnx"), "onnx_dir" (where
+            exported models are cached) and "quantization" ("avx2", "avx512_vnni" or "arm64").
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    config = config or {}
+    backend = config.get("backend", _settings["backend"])
+    if backend not in ("torch", "onnx"):
+        raise ValueError(f"Unknown inference backend: {backend}")
+    _settings.update({key: value for key, value in config.items() if key in _settings})
+
+def get_inference_backend() -> str:
+    """Return the configured inference backend name."""
+    return _settings["backend"]
+
+def _export_dir(model_name: str) -> Path:
+    """Directory holding the exported and quantized ONNX files of a model."""
+    return Path(_settings["onnx_dir"]) / model_name.replace("/", "__")
+
+def _quantization_config():
+    """Dynamic int8 quantization config (no calibration data needed) for the target CPU."""
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    factory = getattr(AutoQuantizationConfig, _settings["quantization"])
+    return factory(is_static=False, per_channel=False)
+
+def _export_once(export_dir: Path, file_name: str, export: Callable[[Path], None]) -> Path:
+    """
+    Run an export into `export_dir` unless it already holds `file_name`, once across processes.
+
+    Inference workers load models concurrently, so the export runs under a file lock, into a
+    temporary directory that is moved into place only once complete; a process never loads a
+    partially written model.
+
+    Args:
+        export_dir (Path): Final directory of the exported model.
+        file_name (str): File (relative to `export_dir`) whose presence marks a finished export.
+        export (Callable): Function writing the export into the directory it is given.
+
+    Returns:
+        Path: `export_dir`.
+    """
+    if (export_dir / file_name).exists():
+        return export_dir
+
+    export_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(export_dir.with_name(f"{export_dir.name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not (export_dir / file_name).exists():
+            temp_dir = export_dir.with_name(f"{export_dir.name}.{os.getpid()}.tmp")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            temp_dir.mkdir()
+            try:
+                export(temp_dir)
+            except BaseException:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise
+            # An incomplete directory left by an interrupted export is replaced
+            shutil.rmtree(export_dir, ignore_errors=True)
+            os.replace(temp_dir, export_dir)
+    return export_dir
+
+def export_quantized_onnx(model_name: str, model_cls) -> Path:
+    """
+    Export a Hugging Face model to ONNX and apply dynamic int8 quantization, once.
+
+    Args:
+        model_name (str): Hugging Face model ID.
+        model_cls (type): optimum ORTModel class matching the model head.
+
+    Returns:
+        Path: Directory containing `model_quantized.onnx` and the tokenizer files.
+    """
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTQuantizer
+
+    def export(directory: Path) -> None:
+        print(f"Exporting {model_name} to quantized ONNX in {_export_dir(model_name)}...")
+        model_cls.from_pretrained(model_name, export=True).save_pretrained(directory)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(directory)
+
+        quantizer = ORTQuantizer.from_pretrained(directory)
+        quantizer.quantize(save_dir=directory, quantization_config=_quantization_config())
+
+    return _export_once(_export_dir(model_name), "model_quantized.onnx", export)
+
+def load_onnx_zero_shot_pipeline(model_name: str):
+    """
+    Build a zero-shot classification pipeline backed by a quantized ONNX model.
+
+    Args:
+        model_name (str): Hugging Face NLI model ID, e.g. "facebook/bart-large-mnli".
+
+    Returns:
+        Pipeline: A transformers zero-shot pipeline with the same call interface as the torch one.
+    """
+    from transformers import AutoTokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    export_dir = export_quantized_onnx(model_name, ORTModelForSequenceClassification)
+    model = ORTModelForSequenceClassification.from_pretrained(export_dir, file_name="model_quantized.onnx")
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+
+def load_onnx_dense_embedder(model_name: str):
+    """
+    Load a SentenceTransformer running a dynamically quantized ONNX model.
+
+    Args:
+        model_name (str): SentenceTransformer model ID.
+
+    Returns:
+        SentenceTransformer: A model with the usual `encode` interface.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    file_name = f"onnx/model_qint8_{_settings['quantization']}.onnx"
+
+    def export(directory: Path) -> None:
+        print(f"Exporting {model_name} to quantized ONNX in {_export_dir(model_name)}...")
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(str(directory))
+        export_dynamic_quantized_onnx_model(model, _settings["quantization"], str(directory))
+
+    export_dir = _export_once(_export_dir(model_name), file_name, export)
+    return SentenceTransformer(str(export_dir), backend="onnx", model_kwargs={"file_name": file_name})
+
+def load_onnx_sparse_embedder_and_tokenizer(model_name: str):
+    """
+    Load a SPLADE masked-language model running as quantized ONNX, with its tokenizer.
+
+    The ORT model accepts the same tokenizer output and returns `.logits` like the torch model.
+
+    Args:
+        model_name (str): Hugging Face masked-LM model ID.
+
+    Returns:
+        Tuple[PreTrainedTokenizer, ORTModelForMaskedLM]: The tokenizer and the ONNX model.
+    """
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForMaskedLM
+
+    export_dir = export_quantized_onnx(model_name, ORTModelForMaskedLM)
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    model = ORTModelForMaskedLM.from_pretrained(export_dir, file_name="model_quantized.onnx")
+    return tokenizer, model
@@ -0,0 +1,80 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any
+
+class Metrics:
+    """Thread-safe in-process registry of counters, gauges and latency observations."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._window = window
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._observations: Dict[str, deque] = {}
+        self._observation_totals: Dict[str, list] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> str:
+        """Build a flat metric key such as `name{label=value}`."""
+        if not labels:
+            return name
+        rendered = ",".join(f"{key}={value}" for key, value in sorted(labels.items()))
+        return f"{name}{{{rendered}}}"
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter by `value`."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to its current value."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation (e.g. a latency in seconds) for percentile reporting."""
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._observations:
+                self._observations[key] = deque(maxlen=self._window)
+                self._observation_totals[key] = [0, 0.0]
+            self._observations[key].append(value)
+            self._observation_totals[key][0] += 1
+            self._observation_totals[key][1] += value
+
+    @staticmethod
+    def _percentile(values: list, q: float) -> float:
+        """Nearest-rank percentile of an already sorted list."""
+        index = min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))
+        return values[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return a JSON-serializable view of all metrics.
+
+        Observations are summarized as count, sum and mean over the whole lifetime,
+        plus p50/p95/p99 over the most recent window.
+        """
+        with self._lock:
+            observations = {}
+            for key, window in self._observations.items():
+                values = sorted(window)
+                count, total = self._observation_totals[key]
+                observations[key] = {
+                    "count": count,
+                    "sum": total,
+                    "mean": total / count if count else 0.0,
+                    "p50": self._percentile(values, 0.50),
+                    "p95": self._percentile(values, 0.95),
+                    "p99": self._percentile(values, 0.99),
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "observations": observations,
+            }
+
+# Global metrics registry
+metrics = Metrics()
@@ -0,0 +1,192 @@
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+from app.utils.common import normalize_text
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+class HistoryCompressor:
+    """
+    Bounds the conversation history sent with each prompt.
+
+    The last `keep_turns` turns are kept verbatim; older turns are replaced by a rolling summary.
+    The summary is updated in the background after each answered message, folding in the
+    turns that have left the verbatim window since the last update (in batches of at least
+    `min_new_turns`), so requests never wait for it. Turns not yet folded in are kept verbatim.
+    Each summary records the identities of the last `anchor_turns` turns it covers, which
+    locate the uncovered turns even as the fetched history window slides. A turn's identity is
+    its user message, not its rendering, so a change in how the data service renders turns
+    does not make covered turns look new.
+    """
+
+    def __init__(
+        self,
+        config: dict = None,
+        summarize: Callable[[str, str], Awaitable[str]] = None,
+        count_tokens: Callable[[str], int] = None,
+        redis_client: Any = None
+    ):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "keep_turns", "min_new_turns",
+                "turn_pattern" (regex matching the start of each turn in the rendered history),
+                "turn_id_pattern" (regex whose first group identifies a turn in every
+                rendering; default its first line, the user's message), "anchor_turns",
+                "summary_prefix", "ttl_seconds", "key_prefix" and "metrics_sample_rate"
+                (share of requests whose token counts are measured).
+            summarize (Callable): Async function (previous_summary, new_turns) -> summary.
+            count_tokens (Callable, optional): Token counter for the before/after metrics.
+            redis_client (Any, optional): Async Redis client with `decode_responses=False`;
+                without it summaries are kept in process memory.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.keep_turns = config.get("keep_turns", 4)
+        self.min_new_turns = config.get("min_new_turns", 2)
+        self.turn_pattern = re.compile(config.get("turn_pattern", r"^(?=User: )"), re.MULTILINE)
+        self.turn_id_pattern = re.compile(config.get("turn_id_pattern", r"\A(.*)"))
+        self.anchor_turns = config.get("anchor_turns", 3)
+        self.metrics_sample_rate = config.get("metrics_sample_rate", 0.05)
+        self.summary_prefix = config.get("summary_prefix", "Summary of the earlier conversation:")
+        self.ttl = config.get("ttl_seconds", 7 * 24 * 3600)
+        self.key_prefix = config.get("key_prefix", "history_summary")
+        self.summarize = summarize
+        self.count_tokens = count_tokens
+        self.redis_client = redis_client
+        self.local = TTLCache(max_size=config.get("local_size", 4096), ttl=self.ttl)
+        self._updating: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def split_turns(self, history: str) -> List[str]:
+        """Split a rendered history into turns, oldest first."""
+        return [turn.strip() for turn in self.turn_pattern.split(history or "") if turn.strip()]
+
+    def turn_id(self, turn: str) -> str:
+        """Identity of a turn that does not depend on how it was rendered."""
+        match = self.turn_id_pattern.search(turn)
+        text = match.group(1) if match and match.groups() else turn
+        return hashlib.sha1(normalize_text(text, casefold=False).encode("utf-8")).hexdigest()
+
+    def key(self, user_id: str) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    async def _get(self, user_id: str) -> Optional[dict]:
+        """Return the stored state ({"summary", "anchor"}), or None."""
+        if self.redis_client is None:
+            return self.local.get(user_id)
+        try:
+            raw = await self.redis_client.get(self.key(user_id))
+        except Exception as e:
+            print(f"[History Summary] Redis read failed: {e}")
+            metrics.increment("history_summary.errors")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def _put(self, user_id: str, state: dict) -> None:
+        if self.redis_client is None:
+            self.local.set(user_id, state)
+            return
+        try:
+            await self.redis_client.set(self.key(user_id), json.dumps(state).encode("utf-8"), ex=self.ttl)
+        except Exception as e:
+            print(f"[History Summary] Redis write failed: {e}")
+            metrics.increment("history_summary.errors")
+
+    def _uncovered(self, older: List[str], state: Optional[dict]) -> List[str]:
+        """The older turns the summary does not cover yet."""
+        anchor = (state or {}).get("anchor")
+        if not anchor:
+            return older
+        ids = [self.turn_id(turn) for turn in older]
+        # Find the newest position where the covered turns end; near the start of the window
+        # only the part of the anchor still fetched has to match
+        for end in range(len(ids), 0, -1):
+            tail = anchor[-min(end, len(anchor)):]
+            if ids[end - len(tail):end] == tail:
+                return older[end:]
+        # The summarized turns have all left the fetched window: every fetched turn is newer
+        return older
+
+    async def compress(self, user_id: str, history: str) -> str:
+        """
+        Replace the older part of a history with its rolling summary.
+
+        Args:
+            user_id (str): The user whose history it is.
+            history (str): The rendered recent conversations.
+
+        Returns:
+            str: The summary, uncovered older turns and the last `keep_turns` turns verbatim.
+        """
+        if not self.enabled or not history:
+            return history
+        turns = self.split_turns(history)
+        if len(turns) <= self.keep_turns:
+            return history
+
+        older, recent = turns[:-self.keep_turns], turns[-self.keep_turns:]
+        state = await self._get(user_id)
+        if not state:
+            return history
+
+        uncovered = self._uncovered(older, state)
+        compressed = "\n".join([f"{self.summary_prefix}\n{state['summary']}\n", *uncovered, *recent])
+        if self.count_tokens is not None and random.random() < self.metrics_sample_rate:
+            await self._record_tokens(history, compressed)
+        return compressed
+
+    async def _record_tokens(self, history: str, compressed: str) -> None:
+        """Measure prompt tokens before and after compression, off the event loop."""
+        try:
+            before, after = await asyncio.to_thread(lambda: (self.count_tokens(history), self.count_tokens(compressed)))
+        except Exception as e:
+            print(f"[History Summary] Token count failed: {e}")
+            return
+        metrics.observe("history_summary.tokens", before, stage="before")
+        metrics.observe("history_summary.tokens", after, stage="after")
+
+    async def update(self, user_id: str, fetch_history: Callable[[], Awaitable[str]]) -> None:
+        """
+        Fold the turns that left the verbatim window into the user's summary.
+
+        Args:
+            user_id (str): The user whose summary to update.
+            fetch_history (Callable): Async function returning the rendered recent conversations.
+        """
+        turns = self.split_turns(await fetch_history())
+        older = turns[:-self.keep_turns] if len(turns) > self.keep_turns else []
+        state = await self._get(user_id)
+        uncovered = self._uncovered(older, state)
+        if len(uncovered) < self.min_new_turns:
+            return
+
+        start_time = time.perf_counter()
+        summary = await self.summarize(state["summary"] if state else "", "\n".join(uncovered))
+        # The summary now covers every older turn; remember the newest of them
+        anchor = [self.turn_id(turn) for turn in older[-self.anchor_turns:]]
+        await self._put(user_id, {"summary": summary, "anchor": anchor})
+        metrics.increment("history_summary.updates")
+        metrics.observe("history_summary.update_seconds", time.perf_counter() - start_time)
+
+    def schedule_update(self, user_id: str, fetch_history: Callable[[], Awaitable[str]]) -> None:
+        """Start `update` in the background, at most one per user at a time."""
+        if not self.enabled or not user_id or user_id in self._updating:
+            return
+        self._updating.add(user_id)
+
+        async def run() -> None:
+            try:
+                await self.update(user_id, fetch_history)
+            except Exception as e:
+                print(f"[History Summary] Update failed: {e}")
+                metrics.increment("history_summary.errors")
+            finally:
+                self._updating.discard(user_id)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -1,5 +1,6 @@
 import dspy
-from app.api.database.redis_client import get_config
+from app.schemas.config import ApiKeysConfig
+from app.api.database.redis_client import get_typed_config
 
 def set_lm_configure(config: dict = None):
     """
@@ -19,11 +20,11 @@ def set_lm_configure(config: dict = None):
         KeyError: If the "model" key is missing from the config dictionary.
         EnvironmentError: If required environment variables are not set.
     """
-    api_keys = get_config("api_keys")
+    api_keys = get_typed_config("api_keys", ApiKeysConfig)
     lm = dspy.LM(
             model=config["model"],
-            base_url=api_keys["OPEN_ROUTER_URL"],
-            api_key=api_keys["OPEN_ROUTER_API_KEY"],
+            base_url=api_keys.OPEN_ROUTER_URL,
+            api_key=api_keys.OPEN_ROUTER_API_KEY,
             cache=False,
             cache_in_memory=False,
             track_usage=True,
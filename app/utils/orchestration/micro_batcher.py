@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+class MicroBatcher:
+    """
+    Collect concurrent single-item requests into batches for one batched model call.
+
+    Callers `await submit(item)` and get back their own result. A background worker drains
+    the queue: it waits for the first item, then keeps collecting until either `max_batch_size`
+    items are gathered or `max_wait_ms` has elapsed, and runs `process_batch` once for the batch.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_queue_size: int = 256,
+    ):
+        """
+        Args:
+            process_batch (Callable): Async function mapping a list of items to a list of results
+                of the same length and order.
+            max_batch_size (int): Maximum number of items processed in one call.
+            max_wait_ms (float): Maximum time to wait for more items once the first one arrived.
+            max_queue_size (int): Maximum number of pending items; `submit` waits when the queue is full.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.max_queue_size = max(1, int(max_queue_size))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> None:
+        """Start the worker on the running loop, restarting it if the loop changed."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item for the next batch and wait for its result.
+
+        Args:
+            item (Any): A single input for `process_batch`.
+
+        Returns:
+            Any: The result produced for this item.
+
+        Raises:
+            Exception: Any error raised by `process_batch` for the batch containing this item.
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Wait for the first item, then gather more until the batch is full or the window closes."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+
+        try:
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    # Window closed; still take whatever is already queued
+                    while len(batch) < self.max_batch_size and not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Items taken off the queue are no longer reachable by `close`; fail them here
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher closed"))
+            raise
+        return batch
+
+    async def _run(self) -> None:
+        """Worker loop: collect a batch, process it, and resolve each caller's future."""
+        while True:
+            batch = await self._collect()
+
+            # Drop requests whose callers went away before we started
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                results = await self.process_batch([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} inputs")
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Micro-batcher closed"))
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def close(self) -> None:
+        """Stop the worker and fail any requests still waiting in the queue."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher closed"))
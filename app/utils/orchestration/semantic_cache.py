@@ -0,0 +1,175 @@
+import re
+import time
+import dspy
+import numpy as np
+from collections import OrderedDict
+from app.utils.metrics import metrics
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+class CachedChunk:
+    """A piece of a cached answer, streamed like a `dspy.streaming.StreamResponse` chunk."""
+
+    __slots__ = ("chunk",)
+
+    def __init__(self, chunk: str):
+        self.chunk = chunk
+
+class _Entry:
+    __slots__ = ("route", "vector", "response", "expires_at")
+
+    def __init__(self, route: str, vector: np.ndarray, response: str, expires_at: float):
+        self.route = route
+        self.vector = vector
+        self.response = response
+        self.expires_at = expires_at
+
+class SemanticResponseCache:
+    """
+    Reuses answers to semantically equivalent, non-personal questions.
+
+    Entries are keyed by the normalized dense embedding of the translated prompt and by the
+    route (the RAG collection or "llm") under the LLM model name. A lookup returns the answer of
+    the most similar live entry on the same route if its cosine similarity reaches `threshold`.
+    Entries expire after `ttl_seconds`, and the least recently used are evicted beyond
+    `max_entries`. The cache lives in process memory; each replica warms its own.
+    """
+
+    def __init__(self, config: dict = None, model: str = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "threshold", "ttl_seconds",
+                "max_entries", "allow_history" (also serve cached answers to requests that have
+                conversation history; answers are only ever stored from requests without one)
+                and "replay_chunk_chars".
+            model (str, optional): LLM model name; answers are never shared across models.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.threshold = config.get("threshold", 0.95)
+        self.ttl = config.get("ttl_seconds", 3600)
+        self.max_entries = config.get("max_entries", 1024)
+        self.allow_history = config.get("allow_history", False)
+        self.replay_chunk_chars = config.get("replay_chunk_chars", 24)
+        self.model = model
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._matrices: Dict[str, tuple] = {}
+        self._next_id = 0
+
+    def is_personal(self, recent_conversations: str = None, has_image: bool = False) -> bool:
+        """Whether a request depends on the user (an image, or history unless allowed) and must not look up the cache."""
+        return has_image or (bool(recent_conversations) and not self.allow_history)
+
+    @staticmethod
+    def is_storable(recent_conversations: str = None, has_image: bool = False) -> bool:
+        """Whether an answer may be shared: its prompt carried neither an image nor any history."""
+        return not has_image and not recent_conversations
+
+    def _route(self, route: str) -> str:
+        return f"{self.model}:{route}"
+
+    def _matrix(self, route: str) -> tuple:
+        """Entry ids, stacked vectors and expiry times of a route, rebuilt after the route's entries change."""
+        if route not in self._matrices:
+            ids = [entry_id for entry_id, entry in self._entries.items() if entry.route == route]
+            vectors = np.stack([self._entries[entry_id].vector for entry_id in ids]) if ids else None
+            expires_at = np.array([self._entries[entry_id].expires_at for entry_id in ids])
+            self._matrices[route] = (ids, vectors, expires_at)
+        return self._matrices[route]
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._matrices.pop(entry.route, None)
+
+    def _nearest(self, route: str, vector: np.ndarray) -> tuple:
+        """Return (entry id, similarity) of the most similar live entry on a route, or (None, 0.0)."""
+        ids, vectors, expires_at = self._matrix(route)
+        expired = np.flatnonzero(expires_at <= time.monotonic())
+        if expired.size:
+            # Drop every expired entry of the route at once, then rebuild its matrix a single time
+            for index in expired:
+                self._remove(ids[index])
+            ids, vectors, expires_at = self._matrix(route)
+            metrics.set_gauge("response_cache.entries", len(self._entries))
+        if vectors is None:
+            return None, 0.0
+        scores = vectors @ vector
+        best = int(np.argmax(scores))
+        return ids[best], float(scores[best])
+
+    @staticmethod
+    def _normalize(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, route: str, embedding: Any) -> Optional[str]:
+        """
+        Return the cached answer for a prompt embedding on a route, or None on a miss.
+
+        Args:
+            route (str): The RAG collection, or "llm".
+            embedding (Any): Dense embedding of the translated prompt.
+
+        Returns:
+            Optional[str]: The cached answer.
+        """
+        try:
+            route = self._route(route)
+            entry_id, similarity = self._nearest(route, self._normalize(embedding))
+        except Exception as e:
+            print(f"[Response Cache] Lookup failed: {e}")
+            metrics.increment("response_cache.errors")
+            return None
+        if entry_id is None or similarity < self.threshold:
+            metrics.increment("response_cache.lookups", result="miss")
+            return None
+        self._entries.move_to_end(entry_id)
+        metrics.increment("response_cache.lookups", result="hit")
+        metrics.observe("response_cache.similarity", similarity)
+        return self._entries[entry_id].response
+
+    def store(self, route: str, embedding: Any, response: str) -> None:
+        """Cache an answer, replacing an equivalent one already cached on the route; failures are only logged."""
+        try:
+            self._store(self._route(route), embedding, response)
+        except Exception as e:
+            print(f"[Response Cache] Store failed: {e}")
+            metrics.increment("response_cache.errors")
+
+    def _store(self, route: str, embedding: Any, response: str) -> None:
+        vector = self._normalize(embedding)
+        entry_id, similarity = self._nearest(route, vector)
+        if entry_id is not None and similarity >= self.threshold:
+            self._remove(entry_id)
+
+        self._entries[self._next_id] = _Entry(route, vector, response, time.monotonic() + self.ttl)
+        self._next_id += 1
+        self._matrices.pop(route, None)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        metrics.set_gauge("response_cache.entries", len(self._entries))
+
+    def _split(self, response: str) -> List[str]:
+        """Cut an answer into word-aligned pieces of about `replay_chunk_chars` characters."""
+        pieces, current = [], ""
+        for token in re.findall(r"\S+\s*|\s+", response):
+            current += token
+            if len(current) >= self.replay_chunk_chars:
+                pieces.append(current)
+                current = ""
+        if current:
+            pieces.append(current)
+        return pieces
+
+    async def replay(self, response: str) -> AsyncGenerator[Any, None]:
+        """Stream a cached answer as chunks followed by its `dspy.Prediction`, like a live stream."""
+        for piece in self._split(response):
+            yield CachedChunk(piece)
+        yield dspy.Prediction(response=response)
+
+    async def record(self, stream: AsyncGenerator[Any, None], route: str, embedding: Any) -> AsyncGenerator[Any, None]:
+        """Pass a live stream through unchanged, caching its final answer."""
+        async for chunk in stream:
+            if isinstance(chunk, dspy.Prediction) and getattr(chunk, "response", None):
+                self.store(route, embedding, chunk.response)
+            yield chunk
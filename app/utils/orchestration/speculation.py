@@ -0,0 +1,138 @@
+import time
+import asyncio
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+class SpeculativeSearches:
+    """Hybrid searches started for one request before its label is known."""
+
+    def __init__(self, tasks: Dict[str, asyncio.Task]):
+        self.tasks = tasks
+        self.started_at = time.perf_counter()
+        self.finished_at: Dict[str, float] = {}
+        for label, task in tasks.items():
+            task.add_done_callback(lambda task, label=label: self._on_done(label, task))
+
+    def _on_done(self, label: str, task: asyncio.Task) -> None:
+        self.finished_at.setdefault(label, time.perf_counter())
+        # Mark failures of discarded searches as retrieved; a claimed search re-raises when awaited
+        if not task.cancelled():
+            task.exception()
+
+    def claim(self, label: str) -> Optional[asyncio.Task]:
+        """
+        Take the search started for the final label and cancel every other one.
+
+        Args:
+            label (str): The classifier's label (the collection to search).
+
+        Returns:
+            Optional[asyncio.Task]: The matching search, or None if it was not speculated.
+        """
+        task = self.tasks.pop(label, None)
+        self.cancel()
+        if task is None:
+            metrics.increment("speculation.outcomes", outcome="miss")
+            return None
+
+        # Time-to-first-token saved: how long the search had already been running when it was needed
+        claimed_at = time.perf_counter()
+        saved = min(claimed_at, self.finished_at.get(label, claimed_at)) - self.started_at
+        metrics.increment("speculation.outcomes", outcome="hit")
+        metrics.observe("speculation.saved_seconds", saved)
+        return task
+
+    def discard(self) -> None:
+        """Cancel every search because the request does not use retrieval."""
+        if self.tasks:
+            metrics.increment("speculation.outcomes", outcome="wasted")
+        self.cancel()
+
+    def cancel(self) -> None:
+        """Cancel the searches that were not claimed."""
+        for task in self.tasks.values():
+            if not task.done():
+                task.cancel()
+                metrics.increment("speculation.cancelled")
+        self.tasks.clear()
+
+
+class Speculator:
+    """
+    Predicts the collections a request will be routed to and starts their searches early.
+
+    Candidates come from the user's previous label and from a cheap embedding pre-classifier,
+    so hybrid search overlaps translation and zero-shot classification instead of following them.
+    """
+
+    def __init__(self, config: dict = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "max_collections" (searches started per
+                request), "use_history", "use_pre_classifier", "min_score" (minimum pre-classifier
+                similarity) and "history_ttl_seconds".
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.max_collections = config.get("max_collections", 1)
+        self.use_history = config.get("use_history", True)
+        self.use_pre_classifier = config.get("use_pre_classifier", True)
+        self.min_score = config.get("min_score", 0.0)
+        self.last_labels = TTLCache(max_size=10000, ttl=config.get("history_ttl_seconds", 3600))
+
+    def remember(self, user_id: str, label: str) -> None:
+        """Record the label a user's request was routed to."""
+        if self.enabled and user_id:
+            self.last_labels.set(user_id, label)
+
+    async def predict(
+        self,
+        user_id: str,
+        prompt: str,
+        collections: Iterable[str],
+        rank_labels: Callable[[str], Awaitable[List[Tuple[str, float]]]] = None
+    ) -> List[str]:
+        """
+        Return the most likely collections for a request, best first.
+
+        Args:
+            user_id (str): The user's ID, for their previous label.
+            prompt (str): The raw (untranslated) request text.
+            collections (Iterable[str]): Labels that are routed to retrieval.
+            rank_labels (Callable, optional): Async pre-classifier returning (label, score) pairs.
+
+        Returns:
+            List[str]: Up to `max_collections` collection names.
+        """
+        collections = set(collections)
+        candidates = []
+
+        previous = self.last_labels.get(user_id) if self.use_history and user_id else None
+        if previous in collections:
+            candidates.append(previous)
+
+        if self.use_pre_classifier and rank_labels is not None and len(candidates) < self.max_collections:
+            for label, score in await rank_labels(prompt):
+                if score < self.min_score:
+                    break
+                if label in collections and label not in candidates:
+                    candidates.append(label)
+                if len(candidates) >= self.max_collections:
+                    break
+
+        return candidates[:self.max_collections]
+
+    def start(self, labels: List[str], search: Callable[[str], Awaitable[Any]]) -> SpeculativeSearches:
+        """
+        Start one search per predicted collection.
+
+        Args:
+            labels (List[str]): Predicted collections.
+            search (Callable): Async function searching one collection.
+
+        Returns:
+            SpeculativeSearches: The running searches.
+        """
+        metrics.increment("speculation.started", len(labels))
+        return SpeculativeSearches({label: asyncio.create_task(search(label)) for label in labels})
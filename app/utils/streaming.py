@@ -1,8 +1,19 @@
 import dspy
-import asyncio
 from app.schemas.message import Message
-from app.api.database import call_add_message_endpoint
-from app.services.manage_responses import TextHandler, ImageHandler, TextImageHandler
+from app.utils.orchestration.semantic_cache import CachedChunk
+from app.api.database import call_add_message_endpoint, persistence_queue
+from app.services.manage_responses import ResponseManager, TextHandler, ImageHandler, TextImageHandler
+
+async def _persist_turn(message: Message, response: str, user_id: str, conversation_id: str) -> None:
+    """Queue an answered message for persistence, then refresh the user's rolling history summary."""
+    await call_add_message_endpoint(
+        conversation_id=conversation_id,
+        message=message,
+        response=response,
+        user_id=user_id
+    )
+    # Fold turns leaving the verbatim window into the rolling summary, off the response path
+    ResponseManager.schedule_history_summary(user_id)
 
 async def generate_response_stream(message: Message, user_id: str, conversation_id: str):
     try:
@@ -22,14 +33,19 @@ async def generate_response_stream(message: Message, user_id: str, conversation_
         
         # Stream the response output
         async for chunk in output_stream:
-            if isinstance(chunk, dspy.streaming.StreamResponse):
+            # Cached answers replay as CachedChunk pieces; clients see the same SSE stream
+            if isinstance(chunk, (dspy.streaming.StreamResponse, CachedChunk)):
                 yield f"data: {chunk.chunk}\n\n"
             elif isinstance(chunk, dspy.Prediction):
                 yield "data: [DONE]\n\n"
-                # Call add_message endpoint via HTTP
-                asyncio.create_task(
-                    call_add_message_endpoint(conversation_id=conversation_id, message=message, response=chunk.response)
-                )
+                # Persist write-behind in a task the queue owns: the response can close (or the
+                # client disconnect) without cancelling it
+                persistence_queue.submit(_persist_turn(
+                    message=message,
+                    response=chunk.response,
+                    user_id=user_id,
+                    conversation_id=conversation_id
+                ))
     except ValueError as ve:
         yield f"data: ERROR - Invalid input: {str(ve)}\n\n"
     except Exception as e:
@@ -1,2 +1,7 @@
 from .text_embedding import *
-from .reciprocal_rank_fusion import *
\ No newline at end of file
+from .embedding_cache import *
+from .reciprocal_rank_fusion import *
+from .translation import *
+from .local_index import *
+from .retrieval_cache import *
+from .context_packing import *
\ No newline at end of file
@@ -0,0 +1,180 @@
+import asyncio
+import litellm
+from typing import List, Set, Tuple
+from app.utils.metrics import metrics
+from app.utils.common import normalize_text
+from qdrant_client.conversions import common_types as types
+from .reciprocal_rank_fusion import fuse, rrf
+
+_DEFAULTS = {
+    "enabled": False,
+    "max_passages": 3,
+    "budget_tokens": 3000,
+    "min_context_tokens": 1000,
+    "min_passage_tokens": 64,
+    "shingle_size": 5,
+    "duplicate_threshold": 0.8,
+}
+
+def _shingles(text: str, size: int) -> Set[Tuple[str, ...]]:
+    """Word n-grams of the normalized text (the whole text if it is shorter than `size`)."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+class ContextPacker:
+    """
+    Packs fused passages and conversation history into a fixed prompt token budget.
+
+    Passages are taken in fused-rank order. A passage whose word shingles are mostly contained
+    in a higher-ranked passage (overlapping chunk windows, near-duplicate documents) is dropped.
+    The rest are added whole until the budget runs out, and the last one is trimmed if enough
+    room is left. `recent_conversations` shares the same budget: it keeps whatever the context
+    leaves over, but never squeezes the context below `min_context_tokens`; when it is too long
+    its oldest part (the beginning) is cut. Tokens are counted with the LLM's tokenizer through litellm;
+    `apack` does this off the event loop and falls back to the unpacked context on tokenizer errors.
+    """
+
+    def __init__(self, config: dict = None, model: str = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "max_passages", "budget_tokens",
+                "min_context_tokens", "min_passage_tokens", "shingle_size" and
+                "duplicate_threshold", plus "models": per-model overrides keyed by model name.
+            model (str, optional): LLM model name, used for its tokenizer and overrides.
+        """
+        config = config or {}
+        settings = {**_DEFAULTS, **{key: value for key, value in config.items() if key in _DEFAULTS}}
+        settings.update(config.get("models", {}).get(model, {}))
+        self.model = model
+        self.enabled = settings["enabled"]
+        self.max_passages = settings["max_passages"]
+        self.budget_tokens = settings["budget_tokens"]
+        self.min_context_tokens = settings["min_context_tokens"]
+        self.min_passage_tokens = settings["min_passage_tokens"]
+        self.shingle_size = settings["shingle_size"]
+        self.duplicate_threshold = settings["duplicate_threshold"]
+
+    def _encode(self, text: str) -> List[int]:
+        tokens = litellm.encode(model=self.model, text=text)
+        # Hugging Face tokenizers return an Encoding, tiktoken a list of ids
+        return list(getattr(tokens, "ids", tokens))
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens in `text` for the configured model."""
+        return len(self._encode(text)) if text else 0
+
+    def _truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        """Cut `text` to at most `max_tokens` tokens, keeping its beginning (or its end)."""
+        tokens = self._encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        kept = tokens[len(tokens) - max_tokens:] if keep_end else tokens[:max_tokens]
+        return litellm.decode(model=self.model, tokens=kept) if kept else ""
+
+    def deduplicate(self, passages: List[str]) -> List[str]:
+        """
+        Drop passages mostly contained in a higher-ranked passage.
+
+        Args:
+            passages (List[str]): Passages, best first.
+
+        Returns:
+            List[str]: The kept passages, in order.
+        """
+        kept, seen = [], []
+        for passage in passages:
+            shingles = _shingles(passage, self.shingle_size)
+            if not shingles:
+                continue
+            if any(len(shingles & other) / len(shingles) >= self.duplicate_threshold for other in seen):
+                metrics.increment("context_packing.duplicates_dropped")
+                continue
+            kept.append(passage)
+            seen.append(shingles)
+        return kept
+
+    def pack(
+        self,
+        points: List[types.QueryResponse],
+        payload: List[str],
+        recent_conversations: str = ""
+    ) -> Tuple[str, str]:
+        """
+        Fuse retrieval results and fit them, with the conversation history, into the token budget.
+
+        When packing is disabled this returns the plain `rrf` context and the history untouched.
+
+        Args:
+            points (List[types.QueryResponse]): Ranked results, e.g. `[dense_results, sparse_results]`.
+            payload (List[str]): Payload keys holding the passage text.
+            recent_conversations (str): Formatted conversation history.
+
+        Returns:
+            Tuple[str, str]: The context string and the (possibly trimmed) conversation history.
+        """
+        if not self.enabled:
+            return rrf(points=points, n_points=self.max_passages, payload=payload), recent_conversations
+
+        fused = fuse(points=points, n_points=self.max_passages)
+        passages = ["\n".join(str((document or {}).get(key, "")) for key in payload) for document in fused.payloads]
+        history = recent_conversations or ""
+        history_tokens = self.count_tokens(history)
+        tokens_before = self.count_tokens(fused.to_context(payload)) + history_tokens
+
+        # Context may use whatever the history does not, but always at least `min_context_tokens`
+        context_budget = max(self.min_context_tokens, self.budget_tokens - history_tokens)
+        chunks, used = [], 0
+        for passage in self.deduplicate(passages):
+            label = f"Context {len(chunks)}: "
+            tokens = self.count_tokens(label + passage)
+            if used + tokens > context_budget:
+                remaining = context_budget - used
+                if remaining >= self.min_passage_tokens:
+                    chunks.append(self._truncate(label + passage, remaining))
+                    used = context_budget
+                break
+            chunks.append(label + passage)
+            used += tokens
+        context = "\n\n".join(chunks)
+
+        history_budget = max(0, self.budget_tokens - used)
+        if history_tokens > history_budget:
+            history = self._truncate(history, history_budget, keep_end=True)
+
+        # The kept chunks and history were already counted; re-encoding them only for metrics is wasted work
+        tokens_after = used + min(history_tokens, history_budget)
+        metrics.observe("context_packing.tokens", tokens_before, stage="before")
+        metrics.observe("context_packing.tokens", tokens_after, stage="after")
+        metrics.increment("context_packing.tokens_saved", max(0, tokens_before - tokens_after))
+        return context, history
+
+    async def apack(
+        self,
+        points: List[types.QueryResponse],
+        payload: List[str],
+        recent_conversations: str = ""
+    ) -> Tuple[str, str]:
+        """
+        Run `pack` in a worker thread, since tokenization is CPU-bound.
+
+        If packing fails (e.g. an unknown model or a tokenizer that cannot be downloaded),
+        the plain `rrf` context and the untrimmed history are returned instead.
+
+        Args:
+            points (List[types.QueryResponse]): Ranked results, e.g. `[dense_results, sparse_results]`.
+            payload (List[str]): Payload keys holding the passage text.
+            recent_conversations (str): Formatted conversation history.
+
+        Returns:
+            Tuple[str, str]: The context string and the (possibly trimmed) conversation history.
+        """
+        if not self.enabled:
+            return self.pack(points=points, payload=payload, recent_conversations=recent_conversations)
+        try:
+            return await asyncio.to_thread(self.pack, points, payload, recent_conversations)
+        except Exception as e:
+            print(f"[Context Packing] Falling back to unpacked context: {e}")
+            metrics.increment("context_packing.errors")
+            return rrf(points=points, n_points=self.max_passages, payload=payload), recent_conversations
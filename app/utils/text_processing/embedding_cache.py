@@ -0,0 +1,115 @@
+import hashlib
+from typing import Any, Awaitable, Callable
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+from app.utils.common import normalize_text
+
+_cache = None
+
+class EmbeddingCache:
+    """
+    Content-addressed two-tier cache for embedding vectors.
+
+    Keys are a SHA-256 of the model identity plus the normalized text, so a new model name,
+    revision or pruning setting never reads vectors produced by another one. The first tier is a
+    bounded in-process LRU holding decoded vectors; the optional second tier is Redis, shared
+    across replicas and holding the compact binary encoding.
+    """
+
+    def __init__(self, config: dict = None, redis_client: Any = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "local_size", "local_ttl_seconds",
+                "redis_ttl_seconds" and "key_prefix".
+            redis_client (Any, optional): Async Redis client with `decode_responses=False`.
+                Without it only the in-process tier is used.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.redis_client = redis_client
+        self.redis_ttl = config.get("redis_ttl_seconds", 7 * 24 * 3600)
+        self.key_prefix = config.get("key_prefix", "embedding_cache")
+        self.local = TTLCache(
+            max_size=config.get("local_size", 4096),
+            ttl=config.get("local_ttl_seconds", 3600),
+        )
+
+    def key(self, namespace: str, text: str) -> str:
+        """Build the content-addressed key for a text under a model identity."""
+        digest = hashlib.sha256(f"{namespace}\x00{normalize_text(text, casefold=False)}".encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        text: str,
+        compute: Callable[[str], Awaitable[Any]],
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+    ) -> Any:
+        """
+        Return the cached vector for `text`, computing and storing it on a miss.
+
+        Redis failures are counted and treated as misses so the cache never fails a request.
+
+        Args:
+            namespace (str): Model identity, e.g. "dense:<model>@<revision>".
+            text (str): The text to embed.
+            compute (Callable): Async function producing the vector on a miss.
+            encode (Callable): Converts a vector to its binary encoding for Redis.
+            decode (Callable): Converts the binary encoding back to a vector.
+
+        Returns:
+            Any: The embedding vector.
+        """
+        if not self.enabled:
+            return await compute(text)
+
+        kind = namespace.split(":", 1)[0]
+        key = self.key(namespace, text)
+
+        vector = self.local.get(key)
+        if vector is not None:
+            metrics.increment("embedding_cache.hits", tier="local", model=kind)
+            return vector
+
+        if self.redis_client is not None:
+            try:
+                raw = await self.redis_client.get(key)
+            except Exception as e:
+                print(f"[Embedding Cache] Redis read failed: {e}")
+                metrics.increment("embedding_cache.errors", model=kind)
+                raw = None
+            if raw is not None:
+                vector = decode(raw)
+                self.local.set(key, vector)
+                metrics.increment("embedding_cache.hits", tier="redis", model=kind)
+                return vector
+
+        metrics.increment("embedding_cache.misses", model=kind)
+        vector = await compute(text)
+        self.local.set(key, vector)
+
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.set(key, encode(vector), ex=self.redis_ttl)
+            except Exception as e:
+                print(f"[Embedding Cache] Redis write failed: {e}")
+                metrics.increment("embedding_cache.errors", model=kind)
+        return vector
+
+def get_embedding_cache(config: dict = None, redis_client: Any = None) -> EmbeddingCache:
+    """
+    Return the singleton embedding cache, creating it on first use.
+
+    Args:
+        config (dict, optional): Cache settings, only applied when the cache is first created.
+        redis_client (Any, optional): Async binary Redis client for the shared tier.
+
+    Returns:
+        EmbeddingCache: The shared embedding cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(config=config, redis_client=redis_client)
+    return _cache
@@ -0,0 +1,215 @@
+import json
+import asyncio
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, List
+from qdrant_client import models
+from qdrant_client.conversions import common_types as types
+from .text_embedding import (
+    DENSE_MODEL_NAME,
+    SPARSE_MODEL_NAME,
+    SparseEmbedding,
+    compute_dense_vector,
+    compute_sparse_vector
+)
+
+# Open indexes keyed by collection directory
+_indexes: Dict[str, "LocalHybridIndex"] = {}
+_indexes_lock = threading.Lock()
+
+def _top_k(scores: np.ndarray, candidates: np.ndarray, limit: int) -> np.ndarray:
+    """Return the candidates with the `limit` highest scores, best first."""
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+class LocalHybridIndex:
+    """
+    Read-only on-disk dense + sparse index over one knowledge collection.
+
+    Files in the collection directory (all arrays are memory-mapped, so several workers
+    share one copy in the page cache):
+        - `dense.npy`: float32 (n_points, dim), L2-normalized passage embeddings.
+        - `sparse_offsets.npy`: int64 (vocab_size + 1), start of each term's posting list.
+        - `sparse_points.npy` / `sparse_weights.npy`: int32 point rows and float32 weights,
+          grouped by term (a CSR inverted index).
+        - `points.jsonl`: one `{"id", "payload"}` object per row.
+        - `meta.json`: model names and the query prefix used at build time.
+
+    Dense search is a brute-force matmul (cosine similarity); sparse search accumulates
+    query-term posting lists (dot product), matching what the Qdrant collections return.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Collection directory written by `build_local_index`.
+
+        Raises:
+            ValueError: If the index was built with different embedding models.
+        """
+        self.directory = Path(directory)
+        self.meta = json.loads((self.directory / "meta.json").read_text())
+        if self.meta["dense_model"] != DENSE_MODEL_NAME or self.meta["sparse_model"] != SPARSE_MODEL_NAME:
+            raise ValueError(
+                f"Index {directory} was built with {self.meta['dense_model']} / {self.meta['sparse_model']}"
+            )
+
+        self.dense = np.load(self.directory / "dense.npy", mmap_mode="r")
+        self.sparse_offsets = np.load(self.directory / "sparse_offsets.npy", mmap_mode="r")
+        self.sparse_points = np.load(self.directory / "sparse_points.npy", mmap_mode="r")
+        self.sparse_weights = np.load(self.directory / "sparse_weights.npy", mmap_mode="r")
+        with open(self.directory / "points.jsonl", encoding="utf-8") as f:
+            self.points = [json.loads(line) for line in f]
+
+    @property
+    def query_prefix(self) -> str:
+        return self.meta.get("query_prefix", "")
+
+    def _response(self, rows: np.ndarray, scores: np.ndarray) -> types.QueryResponse:
+        """Wrap ranked rows as a Qdrant `QueryResponse`."""
+        return models.QueryResponse(points=[
+            models.ScoredPoint(
+                id=self.points[row]["id"],
+                version=0,
+                score=float(scores[row]),
+                payload=self.points[row]["payload"],
+            )
+            for row in rows
+        ])
+
+    def search_dense(self, vector: np.ndarray, limit: int) -> types.QueryResponse:
+        """
+        Rank every point by cosine similarity to a dense query vector.
+
+        Args:
+            vector (np.ndarray): The query embedding.
+            limit (int): Number of results to return.
+
+        Returns:
+            types.QueryResponse: The top points, best first.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        scores = self.dense @ (vector / np.linalg.norm(vector))
+        return self._response(_top_k(scores, np.arange(len(scores)), limit), scores)
+
+    def search_sparse(self, vector: SparseEmbedding, limit: int) -> types.QueryResponse:
+        """
+        Rank the points sharing at least one term with a sparse query vector by dot product.
+
+        Args:
+            vector (SparseEmbedding): The query's SPLADE terms and weights.
+            limit (int): Number of results to return.
+
+        Returns:
+            types.QueryResponse: The top matching points, best first.
+        """
+        scores = np.zeros(len(self.points), dtype=np.float32)
+        vocab_size = len(self.sparse_offsets) - 1
+        for term, weight in zip(vector.indices, vector.values):
+            if term >= vocab_size:
+                continue
+            start, end = self.sparse_offsets[term], self.sparse_offsets[term + 1]
+            # A point appears at most once per posting list, so fancy-index accumulation is safe
+            scores[self.sparse_points[start:end]] += weight * self.sparse_weights[start:end]
+        return self._response(_top_k(scores, np.flatnonzero(scores), limit), scores)
+
+def build_local_index(
+    directory: str,
+    ids: List[Any],
+    payloads: List[dict],
+    dense_vectors: np.ndarray,
+    sparse_vectors: List[SparseEmbedding],
+    vocab_size: int,
+    query_prefix: str = ""
+) -> None:
+    """
+    Write a collection's vectors and payloads in the `LocalHybridIndex` layout.
+
+    Args:
+        directory (str): Output directory for the collection.
+        ids (List[Any]): Point IDs (ints or UUID strings), one per row.
+        payloads (List[dict]): Point payloads, one per row.
+        dense_vectors (np.ndarray): Passage embeddings of shape (n_points, dim).
+        sparse_vectors (List[SparseEmbedding]): Passage SPLADE vectors, one per row.
+        vocab_size (int): Size of the sparse model's vocabulary.
+        query_prefix (str): Prefix the dense model expects on queries (e.g. "query: ").
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    dense_vectors = np.asarray(dense_vectors, dtype=np.float32)
+    norms = np.linalg.norm(dense_vectors, axis=1, keepdims=True)
+    np.save(directory / "dense.npy", dense_vectors / np.maximum(norms, 1e-12))
+
+    # The trailing empty vector keeps the concatenations valid for an empty collection
+    vectors = list(sparse_vectors) + [SparseEmbedding(np.empty(0), np.empty(0))]
+    rows = np.concatenate([np.full(len(vector), row, dtype=np.int32) for row, vector in enumerate(vectors)])
+    terms = np.concatenate([vector.indices for vector in vectors]).astype(np.int64)
+    weights = np.concatenate([vector.values for vector in vectors])
+    order = np.argsort(terms, kind="stable")
+    offsets = np.zeros(vocab_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=vocab_size), out=offsets[1:])
+    np.save(directory / "sparse_offsets.npy", offsets)
+    np.save(directory / "sparse_points.npy", rows[order])
+    np.save(directory / "sparse_weights.npy", weights[order])
+
+    with open(directory / "points.jsonl", "w", encoding="utf-8") as f:
+        for point_id, payload in zip(ids, payloads):
+            f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+
+    (directory / "meta.json").write_text(json.dumps({
+        "dense_model": DENSE_MODEL_NAME,
+        "sparse_model": SPARSE_MODEL_NAME,
+        "query_prefix": query_prefix,
+        "points": len(ids),
+    }, indent=2))
+
+def get_local_index(collection_name: str, index_dir: str = "local_index") -> LocalHybridIndex:
+    """
+    Open (once per process) and return the local index of a collection.
+
+    Args:
+        collection_name (str): Knowledge collection name.
+        index_dir (str): Root directory holding one sub-directory per collection.
+
+    Returns:
+        LocalHybridIndex: The memory-mapped index.
+    """
+    directory = str(Path(index_dir) / collection_name)
+    with _indexes_lock:
+        if directory not in _indexes:
+            _indexes[directory] = LocalHybridIndex(directory)
+        return _indexes[directory]
+
+async def local_hybrid_search(
+    query: str,
+    collection_name: str,
+    limit: int,
+    index_dir: str = "local_index"
+) -> list[types.QueryResponse]:
+    """
+    Run dense and sparse search in-process against a local collection index.
+
+    The query is embedded with the models already loaded by the model manager (through the
+    embedding cache), and both searches run off the event loop.
+
+    Args:
+        query (str): Search query.
+        collection_name (str): Knowledge collection name.
+        limit (int): Number of results per search.
+        index_dir (str): Root directory of the local indexes.
+
+    Returns:
+        List[types.QueryResponse]: `[dense_results, sparse_results]`, the shape `rrf` expects.
+    """
+    index = await asyncio.to_thread(get_local_index, collection_name, index_dir)
+    dense_vector, sparse_vector = await asyncio.gather(
+        compute_dense_vector(f"{index.query_prefix}{query}"),
+        compute_sparse_vector(query)
+    )
+    return list(await asyncio.gather(
+        asyncio.to_thread(index.search_dense, dense_vector, limit),
+        asyncio.to_thread(index.search_sparse, sparse_vector, limit)
+    ))
@@ -1,74 +1,121 @@
 import traceback
+import numpy as np
+from typing import List, Sequence
 from qdrant_client.conversions import common_types as types
 
-def rrf(points: list[types.QueryResponse] = None, n_points: int = None, payload: list[str] = None, k: int = 60) -> str:
+CONTEXT_SEPARATOR = "\n\n------------------------------------------------------------------\n\n"
+
+class FusionResult:
+    """Documents ranked by fused score: parallel lists of ids, scores and payloads, best first."""
+
+    __slots__ = ("ids", "scores", "payloads")
+
+    def __init__(self, ids: List[str], scores: np.ndarray, payloads: List[dict]):
+        self.ids = ids
+        self.scores = scores
+        self.payloads = payloads
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def to_context(self, payload: List[str]) -> str:
         """
-        Perform Reciprocal Rank Fusion (RRF) on dense and sparse Qdrant search results
-        and return a combined context string from the top-ranked documents.
-        
+        Join the payload fields of every document into one context string.
+
         Args:
-            points: List containing [dense_results, sparse_results]
-            n_points: Number of top documents to include in final context
-            payload: List of payload keys to extract
-            k: RRF parameter (default 60)
-    
+            payload (List[str]): Payload keys to extract from each document.
+
         Returns:
-            Combined context string from top-ranked documents
+            str: The documents' fields, labelled "Context <rank>: ...", separated by a rule.
         """
-        try:
-            dense_results = points[0].points
-            sparse_results = points[1].points
-            
-            # Create score maps directly without intermediate sets
-            dense_scores = {str(r.id): r.score for r in dense_results}
-            sparse_scores = {str(r.id): r.score for r in sparse_results}
-            
-            # Get all unique doc IDs in one pass
-            all_doc_ids = dense_scores.keys() | sparse_scores.keys()
-            
-            # Build document lookup only for docs we have
-            doc_lookup = {}
-            for result in dense_results:
-                doc_lookup[str(result.id)] = result
-            for result in sparse_results:
-                doc_lookup[str(result.id)] = result
-            
-            # Calculate RRF scores directly without ranx overhead
-            rrf_scores = {}
-            
-            # Create sorted rank lists once
-            dense_ranked = sorted(dense_scores.items(), key=lambda x: x[1], reverse=True)
-            sparse_ranked = sorted(sparse_scores.items(), key=lambda x: x[1], reverse=True)
-            
-            # Create rank mappings
-            dense_ranks = {doc_id: rank + 1 for rank, (doc_id, _) in enumerate(dense_ranked)}
-            sparse_ranks = {doc_id: rank + 1 for rank, (doc_id, _) in enumerate(sparse_ranked)}
-            
-            # Calculate RRF scores
-            for doc_id in all_doc_ids:
-                dense_rank = dense_ranks.get(doc_id, len(dense_results) + 1)
-                sparse_rank = sparse_ranks.get(doc_id, len(sparse_results) + 1)
-                
-                rrf_scores[doc_id] = (1 / (k + dense_rank)) + (1 / (k + sparse_rank))
-            
-            # Get top N documents efficiently
-            if n_points and n_points < len(rrf_scores):
-                import heapq
-                top_items = heapq.nlargest(n_points, rrf_scores.items(), key=lambda x: x[1])
-                top_doc_ids = [doc_id for doc_id, _ in top_items]
-            else:
-                top_doc_ids = sorted(rrf_scores.keys(), key=lambda x: rrf_scores[x], reverse=True)[:n_points]
-            
-            # Build context with list comprehension and join
-            context_chunks = []
-            for idx, doc_id in enumerate(top_doc_ids):
-                doc = doc_lookup[doc_id]
-                payload_content = [f"Context {idx}: {doc.payload.get(key, '')}" for key in payload]
-                context_chunks.append("\n".join(payload_content))
-            
-            return "\n\n------------------------------------------------------------------\n\n".join(context_chunks)
-            
-        except Exception as e:
-            print("[RRF Exception Traceback]")
-            traceback.print_exc()
-            return f"[RRF Error] {e}"
\ No newline at end of file
+        return CONTEXT_SEPARATOR.join(
+            "\n".join(f"Context {idx}: {(document or {}).get(key, '')}" for key in payload)
+            for idx, document in enumerate(self.payloads)
+        )
+
+def fuse(
+    points: Sequence[types.QueryResponse] = None,
+    weights: Sequence[float] = None,
+    n_points: int = None,
+    k: int = 60
+) -> FusionResult:
+    """
+    Weighted Reciprocal Rank Fusion over any number of ranked result lists.
+
+    Each list is taken in the order the retriever returned it (best first). A document's
+    fused score is the sum over lists of `weight / (k + rank)`, where a document missing from
+    a list gets rank `len(list) + 1` in it. Document ids are interned to array rows once, then
+    all scoring and top-N selection are array operations.
+
+    Args:
+        points: Ranked results, e.g. `[dense_results, sparse_results]`.
+        weights: Weight of each list. Defaults to 1 for every list.
+        n_points: Number of top documents to return. None returns all of them.
+        k: RRF parameter (default 60).
+
+    Returns:
+        FusionResult: The top documents with their fused scores and payloads.
+
+    Raises:
+        ValueError: If the number of weights does not match the number of lists.
+    """
+    weights = [1.0] * len(points) if weights is None else list(weights)
+    if len(weights) != len(points):
+        raise ValueError(f"Got {len(weights)} weights for {len(points)} result lists")
+
+    # Intern ids; the first occurrence of a document provides its payload
+    rows_by_id, ids, payloads, ranked_rows = {}, [], [], []
+    for response in points:
+        rows = []
+        for point in response.points:
+            doc_id = str(point.id)
+            row = rows_by_id.get(doc_id)
+            if row is None:
+                row = rows_by_id[doc_id] = len(ids)
+                ids.append(doc_id)
+                payloads.append(point.payload)
+            rows.append(row)
+        # Keep each document's best rank if a retriever returned it twice
+        rows = np.asarray(rows, dtype=np.int64)
+        _, first = np.unique(rows, return_index=True)
+        ranked_rows.append(rows[np.sort(first)])
+
+    scores = np.zeros(len(ids), dtype=np.float64)
+    for weight, rows in zip(weights, ranked_rows):
+        missing = weight / (k + len(rows) + 1)
+        scores += missing
+        scores[rows] += weight / (k + np.arange(1, len(rows) + 1)) - missing
+
+    top = np.arange(len(ids))
+    if n_points is not None and n_points < len(top):
+        top = np.argpartition(-scores, n_points - 1)[:n_points] if n_points > 0 else top[:0]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    return FusionResult(
+        ids=[ids[row] for row in top],
+        scores=scores[top],
+        payloads=[payloads[row] for row in top],
+    )
+
+def rrf(points: list[types.QueryResponse] = None, n_points: int = None, payload: list[str] = None, k: int = 60, weights: list[float] = None) -> str:
+    """
+    Perform Reciprocal Rank Fusion (RRF) on Qdrant search results (e.g. dense and sparse)
+    and return a combined context string from the top-ranked documents.
+
+    Args:
+        points: List of ranked results, e.g. [dense_results, sparse_results]
+        n_points: Number of top documents to include in final context
+        payload: List of payload keys to extract
+        k: RRF parameter (default 60)
+        weights: Optional weight per result list (see `fuse`)
+
+    Returns:
+        Combined context string from top-ranked documents
+    """
+    try:
+        return fuse(points=points, weights=weights, n_points=n_points, k=k).to_context(payload)
+
+    except Exception as e:
+        print("[RRF Exception Traceback]")
+        traceback.print_exc()
+        return f"[RRF Error] {e}"
@@ -0,0 +1,161 @@
+import json
+import time
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+from app.utils.common import normalize_text
+from qdrant_client.conversions import common_types as types
+
+class RetrievalCache:
+    """
+    Two-tier cache of hybrid search results, invalidated by collection version.
+
+    Entries are keyed on (retrieval source, collection, collection version, limit, normalized
+    query), the source telling apart the local index and the data service. The version
+    is an integer stored in Redis under `<key_prefix>:version:<collection>`; ingestion bumps it
+    (`INCR`, or `bump_collection_version`) and every replica stops reading older entries, which
+    then expire through their TTL. The first tier is an in-process LRU of parsed responses; the
+    second is Redis, shared across replicas and holding the JSON results.
+    """
+
+    def __init__(self, config: dict = None, redis_client: Any = None):
+        """
+        Args:
+            config (dict, optional): Settings "enabled", "local_size", "local_ttl_seconds",
+                "redis_ttl_seconds", "version_ttl_seconds" (how long a replica trusts the
+                collection version it last read) and "key_prefix".
+            redis_client (Any, optional): Async Redis client with `decode_responses=False`.
+                Without it only the in-process tier is used and bumping a version just clears it.
+        """
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.redis_client = redis_client
+        self.redis_ttl = config.get("redis_ttl_seconds", 24 * 3600)
+        self.key_prefix = config.get("key_prefix", "retrieval_cache")
+        self.local = TTLCache(
+            max_size=config.get("local_size", 2048),
+            ttl=config.get("local_ttl_seconds", 600),
+        )
+        self.versions = TTLCache(max_size=256, ttl=config.get("version_ttl_seconds", 5))
+        self.fetch_seconds: Dict[str, float] = {}
+
+    def version_key(self, collection_name: str) -> str:
+        return f"{self.key_prefix}:version:{collection_name}"
+
+    def key(self, collection_name: str, version: int, query: str, limit: int, source: str = "") -> str:
+        """Build the cache key of a search under a collection version and retrieval source."""
+        digest = hashlib.sha256(
+            f"{source}\x00{collection_name}\x00{version}\x00{limit}\x00{normalize_text(query, casefold=False)}".encode("utf-8")
+        ).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+
+    async def collection_version(self, collection_name: str) -> int:
+        """Return the collection's current version (0 if it was never bumped)."""
+        version = self.versions.get(collection_name)
+        if version is not None:
+            return version
+
+        version = 0
+        if self.redis_client is not None:
+            raw = await self.redis_client.get(self.version_key(collection_name))
+            version = int(raw) if raw is not None else 0
+        self.versions.set(collection_name, version)
+        return version
+
+    async def bump_collection_version(self, collection_name: str) -> int:
+        """
+        Invalidate every cached result of a collection, e.g. after ingestion.
+
+        Other replicas notice within `version_ttl_seconds`.
+
+        Returns:
+            int: The new version.
+        """
+        if self.redis_client is None:
+            self.local.clear()
+            return 0
+        version = await self.redis_client.incr(self.version_key(collection_name))
+        self.versions.set(collection_name, version)
+        return version
+
+    def _record_fetch(self, collection_name: str, seconds: float) -> None:
+        """Track a moving average of uncached search latency, used to estimate time saved by hits."""
+        previous = self.fetch_seconds.get(collection_name)
+        self.fetch_seconds[collection_name] = seconds if previous is None else 0.9 * previous + 0.1 * seconds
+        metrics.observe("retrieval_cache.fetch_seconds", seconds, collection=collection_name)
+
+    def _record_hit(self, collection_name: str, tier: str, seconds: float) -> None:
+        metrics.increment("retrieval_cache.hits", tier=tier, collection=collection_name)
+        if collection_name in self.fetch_seconds:
+            saved = max(0.0, self.fetch_seconds[collection_name] - seconds)
+            metrics.increment("retrieval_cache.saved_seconds", saved, collection=collection_name)
+
+    async def get_or_search(
+        self,
+        query: str,
+        collection_name: str,
+        limit: int,
+        search: Callable[[], Awaitable[list[types.QueryResponse]]],
+        source: str = "",
+    ) -> list[types.QueryResponse]:
+        """
+        Return cached `[dense, sparse]` results for a search, running it on a miss.
+
+        Redis failures are counted and treated as misses so the cache never fails a request.
+
+        Args:
+            query (str): Search query.
+            collection_name (str): Collection searched.
+            limit (int): Number of results per search.
+            search (Callable): Async function running the search on a miss.
+            source (str): Where `search` retrieves from (e.g. "local:<index_dir>" or
+                "remote:<url>"); results of different sources never share entries.
+
+        Returns:
+            List[types.QueryResponse]: The dense and sparse results.
+        """
+        if not self.enabled:
+            return await search()
+
+        start_time = time.perf_counter()
+        try:
+            version = await self.collection_version(collection_name)
+        except Exception as e:
+            print(f"[Retrieval Cache] Redis read failed: {e}")
+            metrics.increment("retrieval_cache.errors", collection=collection_name)
+            return await search()
+        key = self.key(collection_name, version, query, limit, source)
+
+        points = self.local.get(key)
+        if points is not None:
+            self._record_hit(collection_name, "local", time.perf_counter() - start_time)
+            return points
+
+        if self.redis_client is not None:
+            try:
+                raw = await self.redis_client.get(key)
+            except Exception as e:
+                print(f"[Retrieval Cache] Redis read failed: {e}")
+                metrics.increment("retrieval_cache.errors", collection=collection_name)
+                raw = None
+            if raw is not None:
+                points = [types.QueryResponse(**result) for result in json.loads(raw)]
+                self.local.set(key, points)
+                self._record_hit(collection_name, "redis", time.perf_counter() - start_time)
+                return points
+
+        metrics.increment("retrieval_cache.misses", collection=collection_name)
+        search_start = time.perf_counter()
+        points = await search()
+        self._record_fetch(collection_name, time.perf_counter() - search_start)
+        self.local.set(key, points)
+
+        if self.redis_client is not None:
+            try:
+                raw = json.dumps([result.model_dump(mode="json") for result in points])
+                await self.redis_client.set(key, raw.encode("utf-8"), ex=self.redis_ttl)
+            except Exception as e:
+                print(f"[Retrieval Cache] Redis write failed: {e}")
+                metrics.increment("retrieval_cache.errors", collection=collection_name)
+        return points
@@ -1,108 +1,388 @@
 import torch
+import base64
 import asyncio
+import threading
 import numpy as np
-from typing import List, Tuple
+from typing import Any, List
 from sentence_transformers import SentenceTransformer
 from transformers import AutoModelForMaskedLM, AutoTokenizer
+from app.utils.common import model_revision
+from .embedding_cache import get_embedding_cache
+from app.utils.inference_backend import (
+    get_inference_backend,
+    load_onnx_dense_embedder,
+    load_onnx_sparse_embedder_and_tokenizer
+)
+from app.utils.orchestration.micro_batcher import MicroBatcher
+
+DENSE_MODEL_NAME = "intfloat/multilingual-e5-small"
+SPARSE_MODEL_NAME = "naver/splade-cocondenser-ensembledistil"
 
 _model_d = None
 _model_s_tokenizer = None
 _model_s_embedder = None
+_engine = None
+_identities = {}
+_dense_load_lock = threading.Lock()
+_sparse_load_lock = threading.Lock()
+
+def load_dense_embedder(backend: str = "torch") -> SentenceTransformer:
+    """
+    Load the dense embedder model for a given inference backend.
+
+    Args:
+        backend (str): "torch" for eager PyTorch or "onnx" for int8-quantized ONNX Runtime.
+
+    Returns:
+        SentenceTransformer: The dense embedding model.
+    """
+    if backend == "onnx":
+        return load_onnx_dense_embedder(DENSE_MODEL_NAME)
+    return SentenceTransformer(DENSE_MODEL_NAME)
 
 def get_dense_embedder():
     """
     Load and return a singleton instance of a dense embedder model.
 
     Uses the `intfloat/multilingual-e5-small` model from SentenceTransformers
-    to generate dense embeddings. Ensures the model is loaded only once
-    and reused across function calls.
+    to generate dense embeddings, on the configured inference backend. Ensures
+    the model is loaded only once (also across threads) and reused across function calls.
 
     Returns:
         SentenceTransformer: An instance of the dense embedding model.
     """
     global _model_d
-    if _model_d is None:
-        print("Loading dense embedder model...")
-        _model_d = SentenceTransformer("intfloat/multilingual-e5-small")
+    with _dense_load_lock:
+        if _model_d is None:
+            print("Loading dense embedder model...")
+            _model_d = load_dense_embedder(get_inference_backend())
     return _model_d
 
+def load_sparse_embedder_and_tokenizer(backend: str = "torch"):
+    """
+    Load the sparse embedder model and its tokenizer for a given inference backend.
+
+    Args:
+        backend (str): "torch" for eager PyTorch or "onnx" for int8-quantized ONNX Runtime.
+
+    Returns:
+        Tuple[PreTrainedTokenizer, PreTrainedModel]: The tokenizer and the embedder model.
+    """
+    if backend == "onnx":
+        return load_onnx_sparse_embedder_and_tokenizer(SPARSE_MODEL_NAME)
+    return AutoTokenizer.from_pretrained(SPARSE_MODEL_NAME), AutoModelForMaskedLM.from_pretrained(SPARSE_MODEL_NAME)
+
 def get_sparse_embedder_and_tokenizer():
     """
     Load and return singleton instances of a sparse embedder model and its tokenizer.
 
     Uses the `naver/splade-cocondenser-ensembledistil` model from Hugging Face
-    to compute sparse vector representations via masked language modeling.
+    to compute sparse vector representations via masked language modeling,
+    on the configured inference backend.
 
     Returns:
         Tuple[PreTrainedTokenizer, PreTrainedModel]: The tokenizer and the embedder model.
     """
     global _model_s_tokenizer, _model_s_embedder
-    if _model_s_tokenizer is None or _model_s_embedder is None:
-        print("Loading sparse embedder model and tokenizer...")
-        _model_s_tokenizer = AutoTokenizer.from_pretrained("naver/splade-cocondenser-ensembledistil")
-        _model_s_embedder = AutoModelForMaskedLM.from_pretrained("naver/splade-cocondenser-ensembledistil")
+    with _sparse_load_lock:
+        if _model_s_tokenizer is None or _model_s_embedder is None:
+            print("Loading sparse embedder model and tokenizer...")
+            _model_s_tokenizer, _model_s_embedder = load_sparse_embedder_and_tokenizer(get_inference_backend())
     return _model_s_tokenizer, _model_s_embedder
 
-async def compute_dense_vector(text: str = None) -> List[float] | np.ndarray:
+class SparseEmbedding:
+    """
+    Compact array-backed sparse vector.
+
+    Indices are int32 and values float32, sorted by index. The vector serializes to a flat
+    little-endian byte string (count, indices, values) without creating per-element Python
+    objects, and still unpacks like the `(indices, values)` tuple used elsewhere.
+    """
+
+    __slots__ = ("indices", "values")
+
+    def __init__(self, indices: np.ndarray, values: np.ndarray):
+        self.indices = np.ascontiguousarray(indices, dtype="<i4")
+        self.values = np.ascontiguousarray(values, dtype="<f4")
+
+    def __iter__(self):
+        return iter((self.indices, self.values))
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the binary encoding in bytes."""
+        return 4 + self.indices.nbytes + self.values.nbytes
+
+    def to_bytes(self) -> bytes:
+        """Encode as `uint32 count | int32 indices | float32 values` (little-endian)."""
+        return np.uint32(len(self.indices)).astype("<u4").tobytes() + self.indices.tobytes() + self.values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SparseEmbedding":
+        """Decode a byte string produced by `to_bytes`."""
+        count = int(np.frombuffer(data, dtype="<u4", count=1)[0])
+        indices = np.frombuffer(data, dtype="<i4", count=count, offset=4)
+        values = np.frombuffer(data, dtype="<f4", count=count, offset=4 + 4 * count)
+        return cls(indices, values)
+
+    def to_base64(self) -> str:
+        """Binary encoding wrapped in base64, for JSON transports."""
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+def prune_sparse_vector(
+    indices: np.ndarray,
+    values: np.ndarray,
+    top_k: int = None,
+    min_weight: float = 0.0
+) -> SparseEmbedding:
+    """
+    Keep only the strongest terms of a SPLADE vector.
+
+    Args:
+        indices (np.ndarray): Vocabulary indices of the non-zero terms.
+        values (np.ndarray): Weights of those terms.
+        top_k (int, optional): Maximum number of terms to keep. None keeps all.
+        min_weight (float): Terms with a weight below this are dropped.
+
+    Returns:
+        SparseEmbedding: The pruned vector, sorted by index.
+    """
+    indices = np.asarray(indices, dtype=np.int32)
+    values = np.asarray(values, dtype=np.float32)
+
+    if min_weight > 0:
+        keep = values >= min_weight
+        indices, values = indices[keep], values[keep]
+
+    if top_k is not None and len(values) > top_k:
+        strongest = np.argpartition(values, -top_k)[-top_k:]
+        indices, values = indices[strongest], values[strongest]
+
+    order = np.argsort(indices, kind="stable")
+    return SparseEmbedding(indices[order], values[order])
+
+def splade_vectors(tokenizer, embedder, texts: List[str], max_length: int = 512) -> np.ndarray:
+    """
+    Compute full-vocabulary SPLADE weights for a padded batch of texts.
+
+    Args:
+        tokenizer (PreTrainedTokenizer): The SPLADE tokenizer.
+        embedder (PreTrainedModel): The SPLADE masked-language model (torch or ONNX Runtime).
+        texts (List[str]): Texts to embed.
+        max_length (int): Tokenizer truncation length.
+
+    Returns:
+        np.ndarray: A float32 array of shape (len(texts), vocab_size).
+    """
+    tokens = tokenizer(texts, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+    with torch.inference_mode():
+        logits = embedder(**tokens).logits
+        weighted_log = torch.log1p(torch.relu(logits)) * tokens.attention_mask.unsqueeze(-1)
+        return torch.amax(weighted_log, dim=1).to(torch.float32).cpu().numpy()
+
+class EmbeddingEngine:
+    """
+    Batched, non-blocking dense and sparse embedding.
+
+    Concurrent requests for each model are collected by a micro-batcher, padded into one
+    batch and run in a worker thread under `torch.inference_mode` (or in an inference worker
+    process when a pool is attached), so the event loop keeps serving other streams while
+    embeddings are computed.
+    """
+
+    def __init__(self, config: dict = None, inference_pool: Any = None):
+        """
+        Args:
+            config (dict, optional): Settings "max_batch_size", "max_wait_ms", "max_queue_size",
+                "max_length" (sparse tokenizer truncation length), and "sparse_top_k" /
+                "sparse_min_weight" for pruning sparse vectors.
+            inference_pool (InferencePool, optional): Worker processes hosting the embedders.
+                When set, batches are sent to the pool instead of running in this process.
+        """
+        config = config or {}
+        self.inference_pool = inference_pool
+        self.max_length = config.get("max_length", 512)
+        self.sparse_top_k = config.get("sparse_top_k")
+        self.sparse_min_weight = config.get("sparse_min_weight", 0.0)
+        batcher_options = dict(
+            max_batch_size=config.get("max_batch_size", 16),
+            max_wait_ms=config.get("max_wait_ms", 5),
+            max_queue_size=config.get("max_queue_size", 256),
+        )
+        self.dense_batcher = MicroBatcher(self._encode_dense_batch, **batcher_options)
+        self.sparse_batcher = MicroBatcher(self._encode_sparse_batch, **batcher_options)
+
+    def encode_dense(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode a batch of texts with the dense embedder.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: A float32 array of shape (len(texts), dim).
+        """
+        embedder = get_dense_embedder()
+        with torch.inference_mode():
+            vectors = embedder.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def encode_sparse(self, texts: List[str]) -> List[SparseEmbedding]:
+        """
+        Encode a padded batch of texts into pruned SPLADE sparse vectors.
+
+        Padding positions are masked out before max-pooling, so every row matches what the
+        unbatched computation would produce.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            List[SparseEmbedding]: For each text, the int32 indices and float32 values of its
+            strongest vocabulary weights.
+        """
+        tokenizer, embedder = get_sparse_embedder_and_tokenizer()
+        vectors = splade_vectors(tokenizer, embedder, texts, max_length=self.max_length)
+
+        sparse_vectors = []
+        for row in vectors:
+            indices = np.flatnonzero(row)
+            sparse_vectors.append(
+                prune_sparse_vector(indices, row[indices], top_k=self.sparse_top_k, min_weight=self.sparse_min_weight)
+            )
+        return sparse_vectors
+
+    async def _encode_dense_batch(self, texts: List[str]) -> List[np.ndarray]:
+        if self.inference_pool is not None:
+            vectors = await self.inference_pool.encode_dense(texts)
+        else:
+            vectors = await asyncio.to_thread(self.encode_dense, texts)
+        return list(vectors)
+
+    async def _encode_sparse_batch(self, texts: List[str]) -> List[SparseEmbedding]:
+        if self.inference_pool is not None:
+            return await self.inference_pool.encode_sparse(texts)
+        return await asyncio.to_thread(self.encode_sparse, texts)
+
+    async def dense(self, text: str) -> np.ndarray:
+        """Return the float32 dense embedding of a single text."""
+        return await self.dense_batcher.submit(text)
+
+    async def sparse(self, text: str) -> SparseEmbedding:
+        """Return the pruned sparse embedding of a single text."""
+        return await self.sparse_batcher.submit(text)
+
+def get_embedding_engine(config: dict = None, inference_pool: Any = None) -> EmbeddingEngine:
+    """
+    Return the singleton embedding engine, creating it on first use.
+
+    Args:
+        config (dict, optional): Engine settings, only applied when the engine is first created.
+        inference_pool (InferencePool, optional): Worker pool, only applied when the engine is first created.
+
+    Returns:
+        EmbeddingEngine: The shared embedding engine.
+    """
+    global _engine
+    if _engine is None:
+        _engine = EmbeddingEngine(config=config, inference_pool=inference_pool)
+    return _engine
+
+def model_identity(kind: str) -> str:
+    """
+    Describe the model that produces a given kind of embedding, for cache keys.
+
+    The identity includes the model name, the downloaded revision, the inference backend and,
+    for sparse vectors, the pruning settings, so changing any of them invalidates previously
+    cached vectors.
+
+    Args:
+        kind (str): "dense" or "sparse".
+
+    Returns:
+        str: An identity string such as "dense:intfloat/multilingual-e5-small@<revision>".
+    """
+    if kind in _identities:
+        return _identities[kind]
+
+    engine = get_embedding_engine()
+    if engine.inference_pool is not None:
+        # The models live in the worker processes, which reported their identities at start
+        _identities[kind] = engine.inference_pool.model_identity(kind)
+        return _identities[kind]
+
+    backend = get_inference_backend()
+    if kind == "dense":
+        transformer = get_dense_embedder()[0]
+        identity = f"dense:{DENSE_MODEL_NAME}@{model_revision(getattr(transformer, 'auto_model', None))}/{backend}"
+    else:
+        _, embedder = get_sparse_embedder_and_tokenizer()
+        identity = (
+            f"sparse:{SPARSE_MODEL_NAME}@{model_revision(embedder)}/{backend}"
+            f"/top_k={engine.sparse_top_k}/min_weight={engine.sparse_min_weight}"
+        )
+    _identities[kind] = identity
+    return identity
+
+async def compute_dense_vector(text: str = None) -> np.ndarray:
     """
     Convert input text into a dense embedding vector.
 
     Uses the SentenceTransformer model to produce a dense numerical vector
-    that captures the semantic content of the input text.
+    that captures the semantic content of the input text. Vectors are served from
+    the embedding cache when possible; otherwise the work is batched with concurrent
+    requests and runs off the event loop.
 
     Args:
         text (str, optional): The input text to embed.
 
     Returns:
-        List[float] | np.ndarray: A dense vector representation of the input text.
+        np.ndarray: A float32 dense vector representation of the input text.
     """
-    embedder = get_dense_embedder()
-    embedded_text = embedder.encode(text)
-    return embedded_text
+    return await get_embedding_cache().get_or_compute(
+        namespace=model_identity("dense"),
+        text=text,
+        compute=get_embedding_engine().dense,
+        encode=lambda vector: np.asarray(vector, dtype="<f4").tobytes(),
+        decode=lambda raw: np.frombuffer(raw, dtype="<f4"),
+    )
 
-async def compute_sparse_vector(text: str = None) -> Tuple[List[int], List[float]]:
+async def compute_sparse_vector(text: str = None) -> SparseEmbedding:
     """
     Convert input text into a sparse vector using SPLADE technique.
 
     Tokenizes the input text and passes it through a masked language model,
     then computes a sparse vector using a combination of ReLU, log, and max-pooling
-    over the logits. Only non-zero indices and their values are returned.
+    over the logits. Only the strongest non-zero terms are kept (see `prune_sparse_vector`).
+    Vectors are served from the embedding cache when possible; otherwise the work is
+    batched with concurrent requests and runs off the event loop.
 
     Args:
         text (str, optional): The input text to embed.
 
     Returns:
-        Tuple[List[int], List[float]]: A tuple containing:
-            - indices (List[int]): Positions of non-zero values in the sparse vector.
-            - values (List[float]): Corresponding non-zero values at those indices.
+        SparseEmbedding: Unpacks as a tuple containing:
+            - indices (np.ndarray[int32]): Positions of non-zero values in the sparse vector.
+            - values (np.ndarray[float32]): Corresponding non-zero values at those indices.
     """
-    tokenizer, embedder = get_sparse_embedder_and_tokenizer()
-    tokens = tokenizer(text, return_tensors="pt")
-    output = embedder(**tokens)
-    logits, attention_mask = output.logits, tokens.attention_mask
-    relu_log = torch.log(1 + torch.relu(logits))
-    weighted_log = relu_log * attention_mask.unsqueeze(-1)
-    max_val, _ = torch.max(weighted_log, dim=1)
-    vec = max_val.squeeze()
-
-    # Safely get indices of non-zero values
-    indices = torch.nonzero(vec, as_tuple=True)[0].tolist()
-
-    if isinstance(indices, int):  # if single int, convert to list
-            indices = [indices]
-
-    # Safely get corresponding values
-    values = vec[indices].tolist() if indices else []
-
-    return indices, values
+    return await get_embedding_cache().get_or_compute(
+        namespace=model_identity("sparse"),
+        text=text,
+        compute=get_embedding_engine().sparse,
+        encode=SparseEmbedding.to_bytes,
+        decode=SparseEmbedding.from_bytes,
+    )
 
-async def embed(text: str) -> tuple[list[float], list[int], list[float]]:
+async def embed(text: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Generate dense and sparse embeddings for a given text.
     Returns:
-        dense_vec: List of floats representing dense embedding
-        indices: List of ints for sparse embedding indices
-        values: List of floats for sparse embedding values
+        dense_vec: float32 array representing dense embedding
+        indices: int32 array of sparse embedding indices
+        values: float32 array of sparse embedding values
     """
     try:
         dense_vec, (indices, values) = await asyncio.gather(
@@ -0,0 +1,142 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from googletrans import Translator
+from app.utils.metrics import metrics
+from app.utils.caching import TTLCache
+from app.utils.common import normalize_text
+
+# Common English function words; their density is a cheap signal that a text is English
+_ENGLISH_STOPWORDS = frozenset({
+    "the", "and", "is", "are", "was", "were", "be", "been", "of", "in", "on", "at", "for",
+    "with", "what", "why", "how", "when", "where", "which", "who", "can", "could", "should",
+    "would", "will", "my", "your", "i", "you", "it", "this", "that", "these", "those", "have",
+    "has", "had", "does", "did", "not", "from", "about", "after", "before", "if", "or", "but",
+    "there", "they", "we", "me", "am", "get", "feel", "some", "any", "much", "many", "than",
+})
+_WORD_PATTERN = re.compile(r"[a-z']+")
+
+def is_probably_english(text: str = None, min_stopword_ratio: float = 0.2) -> bool:
+    """
+    Cheaply decide whether a text is English without any remote call.
+
+    The check is deliberately conservative: text containing non-ASCII letters (e.g. Vietnamese
+    diacritics) is never treated as English, and ASCII text must contain enough common English
+    function words. A false negative only costs a translation call.
+
+    Args:
+        text (str, optional): The text to check.
+        min_stopword_ratio (float): Minimum share of words that must be English stopwords.
+
+    Returns:
+        bool: True if the text can skip translation.
+    """
+    if not text or not text.strip():
+        return True
+
+    if any(ord(char) > 127 and char.isalpha() for char in text):
+        return False
+
+    words = _WORD_PATTERN.findall(text.lower())
+    if not words:
+        return True
+
+    hits = sum(word in _ENGLISH_STOPWORDS for word in words)
+    return hits > 0 and hits / len(words) >= min_stopword_ratio
+
+
+class TranslatorBackend(ABC):
+    """Interface for translation services used by the translation stage."""
+
+    @abstractmethod
+    async def translate(self, text: str, dest: str = "en") -> str:
+        """Translate `text` into the `dest` language and return the translated text."""
+
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """Backend using a single long-lived `googletrans.Translator` and its pooled HTTP client."""
+
+    def __init__(self):
+        self.translator = Translator()
+
+    async def translate(self, text: str, dest: str = "en") -> str:
+        result = await self.translator.translate(text=text, src="auto", dest=dest)
+        return result.text
+
+    async def close(self) -> None:
+        await self.translator.client.aclose()
+
+
+class PassthroughTranslatorBackend(TranslatorBackend):
+    """Local stub that returns the input unchanged, for tests and latency measurements."""
+
+    async def translate(self, text: str, dest: str = "en") -> str:
+        return text
+
+
+_BACKENDS = {
+    "google": GoogleTranslatorBackend,
+    "passthrough": PassthroughTranslatorBackend,
+}
+
+
+class TranslationStage:
+    """
+    Translate user text to English for classification, skipping the remote hop when possible.
+
+    English input (by local detection) is returned unchanged, and translations are kept in a
+    bounded LRU/TTL cache keyed on the normalized text.
+    """
+
+    def __init__(self, config: dict = None, backend: TranslatorBackend = None):
+        """
+        Args:
+            config (dict, optional): Settings such as "backend" ("google" or "passthrough"),
+                "cache_size", "cache_ttl_seconds", "detect_language" and "min_stopword_ratio".
+            backend (TranslatorBackend, optional): Explicit backend instance, overriding the config.
+        """
+        config = config or {}
+        self.backend = backend or _BACKENDS[config.get("backend", "google")]()
+        self.detect_language = config.get("detect_language", True)
+        self.min_stopword_ratio = config.get("min_stopword_ratio", 0.2)
+        self.cache = TTLCache(
+            max_size=config.get("cache_size", 2048),
+            ttl=config.get("cache_ttl_seconds", 24 * 3600),
+        )
+
+    async def translate(self, text: str = None, dest: str = "en") -> str:
+        """
+        Translate text into the destination language using the fast paths when available.
+
+        Args:
+            text (str, optional): The user's text.
+            dest (str): Target language code.
+
+        Returns:
+            str: The translated (or original English) text.
+        """
+        start_time = time.perf_counter()
+
+        if dest == "en" and self.detect_language and is_probably_english(text, self.min_stopword_ratio):
+            path = "skipped"
+            translated = text
+        else:
+            key = (dest, normalize_text(text, casefold=False))
+            translated = self.cache.get(key)
+            if translated is not None:
+                path = "cached"
+            else:
+                path = "remote"
+                translated = await self.backend.translate(text, dest=dest)
+                self.cache.set(key, translated)
+
+        metrics.increment("translation.requests", path=path)
+        metrics.observe("translation.latency_seconds", time.perf_counter() - start_time, path=path)
+        return translated
+
+    async def close(self) -> None:
+        """Close the underlying backend client."""
+        await self.backend.close()
@@ -0,0 +1,90 @@
+"""
+Benchmark image ingestion at typical phone-photo sizes.
+
+Compares `convert_to_dspy_image` (single decode, in-memory encode, worker thread) against a
+reference of the previous pipeline (base64 validated and decoded twice, JPEG written to a
+temporary file, read back with `dspy.Image.from_file`, all on the event loop). For each
+size it reports the median conversion time and the longest event-loop stall seen by a
+ticker task running alongside the conversion.
+
+Usage:
+    python -m scripts.benchmark_image_pipeline --sizes 1920x1080 2048x1536 3264x2448 4032x3024 --repeat 5
+"""
+import io
+import os
+import time
+import base64
+import asyncio
+import argparse
+import tempfile
+import statistics
+import numpy as np
+from dspy import Image
+from PIL import Image as PILImage
+from app.utils.image_processing import convert_to_dspy_image
+
+def make_photo(width: int, height: int, seed: int = 0) -> str:
+    """Base64 JPEG (quality 90) of a smooth gradient with sensor-like noise, similar in size to a photo."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 / width, y * 255 / height, (x + y) * 127 / (width + height)], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    PILImage.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+async def reference_convert(image_data: str) -> Image:
+    """The previous temp-file pipeline, run directly on the event loop."""
+    base64.b64decode(image_data, validate=True)
+    pil_image = PILImage.open(io.BytesIO(base64.b64decode(image_data)))
+    temp_fd, temp_path = tempfile.mkstemp(suffix=".jpg")
+    try:
+        os.close(temp_fd)
+        pil_image.save(temp_path, format="JPEG", quality=95)
+        return Image.from_file(temp_path)
+    finally:
+        os.remove(temp_path)
+
+async def measure(convert, image_data: str, repeat: int) -> tuple:
+    """Median conversion time and worst event-loop stall, both in milliseconds."""
+    timings, stalls = [], []
+    for _ in range(repeat):
+        stall = 0.0
+        done = asyncio.Event()
+
+        async def ticker() -> None:
+            nonlocal stall
+            while not done.is_set():
+                tick = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stall = max(stall, time.perf_counter() - tick - 0.001)
+
+        ticker_task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await convert(image_data)
+        timings.append(time.perf_counter() - start)
+        done.set()
+        await ticker_task
+        stalls.append(stall)
+    return statistics.median(timings) * 1000, max(stalls) * 1000
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["1920x1080", "2048x1536", "3264x2448", "4032x3024"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'input KB':>9} {'reference ms':>13} {'stall ms':>9} {'pipeline ms':>12} {'stall ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        width, height = (int(value) for value in size.split("x"))
+        image_data = make_photo(width, height)
+        reference_ms, reference_stall = await measure(reference_convert, image_data, args.repeat)
+        pipeline_ms, pipeline_stall = await measure(convert_to_dspy_image, image_data, args.repeat)
+        print(
+            f"{size:>10} {len(image_data) * 3 // 4 // 1024:>9} {reference_ms:>13.1f} {reference_stall:>9.1f} "
+            f"{pipeline_ms:>12.1f} {pipeline_stall:>9.1f} {reference_ms / pipeline_ms:>7.2f}x"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Latency and memory comparison of the PyTorch and quantized ONNX Runtime backends.
+
+Each (backend, model) pair runs in a fresh subprocess so resident memory is measured in
+isolation. Reports RSS after loading, peak RSS, and single-request latency percentiles.
+
+Usage:
+    python -m scripts.benchmark_inference_backends prompts.txt --iterations 50
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import statistics
+
+MODELS = ("classifier", "dense", "sparse")
+BACKENDS = ("torch", "onnx")
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB (Linux)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def run_child(backend: str, model: str, prompts: list[str], iterations: int) -> dict:
+    """Load one model on one backend and time single-prompt inference."""
+    baseline = rss_mb()
+
+    if model == "classifier":
+        from app.api.database.redis_client import get_config
+        from app.models.task_classifier import load_zero_shot_pipeline
+        labels = get_config("task_classifier")["candidate_labels"]
+        classifier = load_zero_shot_pipeline(backend)
+        infer = lambda text: classifier(text, candidate_labels=labels)
+    elif model == "dense":
+        from app.utils.text_processing import load_dense_embedder
+        embedder = load_dense_embedder(backend)
+        infer = lambda text: embedder.encode(f"query: {text}")
+    else:
+        from app.utils.text_processing import splade_vectors, load_sparse_embedder_and_tokenizer
+        tokenizer, embedder = load_sparse_embedder_and_tokenizer(backend)
+        infer = lambda text: splade_vectors(tokenizer, embedder, [text])
+
+    loaded = rss_mb()
+    for prompt in prompts[:3]:
+        infer(prompt)
+
+    latencies = []
+    for index in range(iterations):
+        start = time.perf_counter()
+        infer(prompts[index % len(prompts)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "load_rss_mb": loaded - baseline,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "mean_ms": statistics.mean(latencies),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="File with one prompt per line")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    with open(args.prompts, encoding="utf-8") as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    if not prompts:
+        raise SystemExit("No prompts to benchmark.")
+
+    if args.child:
+        print(json.dumps(run_child(*args.child, prompts, args.iterations)))
+        return
+
+    print(f"{'model':>10} {'backend':>8} {'load MB':>8} {'peak MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for model in MODELS:
+        for backend in BACKENDS:
+            output = subprocess.run(
+                [sys.executable, "-m", "scripts.benchmark_inference_backends", args.prompts,
+                 "--iterations", str(args.iterations), "--child", backend, model],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{model:>10} {backend:>8} {result['load_rss_mb']:>8.0f} {result['peak_rss_mb']:>8.0f} "
+                f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['mean_ms']:>8.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
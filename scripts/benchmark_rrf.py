@@ -0,0 +1,78 @@
+"""
+Micro-benchmark reciprocal rank fusion at increasing retrieval depths.
+
+Compares `fuse` (interned ids, array scoring) against a dict-based reference equivalent to
+the previous two-list implementation, on synthetic ranked lists drawn from a shared
+candidate pool so that lists overlap as dense and sparse results do. Also checks that both
+produce the same fused scores.
+
+Usage:
+    python -m scripts.benchmark_rrf --depths 4 100 1000 10000 --lists 2 3 --repeat 20
+"""
+import time
+import random
+import argparse
+import statistics
+from types import SimpleNamespace
+from app.utils.text_processing import fuse
+
+def make_lists(n_lists: int, depth: int, seed: int = 0) -> list:
+    """Build `n_lists` ranked result lists of `depth` points with about 50% overlap."""
+    rng = random.Random(seed)
+    pool = [str(i) for i in range(2 * depth)]
+    lists = []
+    for _ in range(n_lists):
+        ids = rng.sample(pool, depth)
+        scores = sorted((rng.random() for _ in ids), reverse=True)
+        lists.append(SimpleNamespace(points=[
+            SimpleNamespace(id=doc_id, score=score, payload={"text": f"document {doc_id}"})
+            for doc_id, score in zip(ids, scores)
+        ]))
+    return lists
+
+def reference_rrf(points: list, n_points: int, k: int = 60) -> list:
+    """Dict-based RRF over N lists (string ids, per-list rank maps, full sort)."""
+    rank_maps = []
+    for response in points:
+        ranked = sorted(((str(p.id), p.score) for p in response.points), key=lambda x: x[1], reverse=True)
+        rank_maps.append(({doc_id: rank + 1 for rank, (doc_id, _) in enumerate(ranked)}, len(ranked)))
+    all_ids = set().union(*(ranks.keys() for ranks, _ in rank_maps))
+    scores = {
+        doc_id: sum(1 / (k + ranks.get(doc_id, size + 1)) for ranks, size in rank_maps)
+        for doc_id in all_ids
+    }
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:n_points]
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall time of `fn()` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[4, 100, 1000, 10000])
+    parser.add_argument("--lists", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--n-points", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'lists':>5} {'depth':>7} {'reference ms':>13} {'fuse ms':>9} {'speedup':>8} {'match':>6}")
+    for n_lists in args.lists:
+        for depth in args.depths:
+            points = make_lists(n_lists, depth)
+            expected = [round(score, 12) for _, score in reference_rrf(points, args.n_points)]
+            actual = [round(float(score), 12) for score in fuse(points, n_points=args.n_points).scores]
+
+            reference_ms = time_call(lambda: reference_rrf(points, args.n_points), args.repeat)
+            fuse_ms = time_call(lambda: fuse(points, n_points=args.n_points), args.repeat)
+            print(
+                f"{n_lists:>5} {depth:>7} {reference_ms:>13.3f} {fuse_ms:>9.3f} "
+                f"{reference_ms / fuse_ms:>7.1f}x {str(expected == actual):>6}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark SPLADE sparse-vector pruning levels.
+
+For each pruning level, reports the mean number of kept terms, the time spent pruning and
+serializing, payload size as a JSON float list versus the compact binary encoding, and
+retrieval quality as recall@k of the pruned query against the unpruned query over a
+document set (documents are always kept unpruned).
+
+Usage:
+    python -m scripts.benchmark_sparse_pruning queries.txt documents.txt --k 10
+
+Both files hold one text per line.
+"""
+import json
+import time
+import argparse
+import statistics
+import numpy as np
+from app.utils.text_processing import EmbeddingEngine, prune_sparse_vector
+
+LEVELS = [
+    (None, 0.0),
+    (None, 0.1),
+    (None, 0.3),
+    (256, 0.0),
+    (128, 0.0),
+    (64, 0.0),
+    (32, 0.0),
+]
+
+def score_documents(query, documents, vocab_size: int) -> np.ndarray:
+    """Sparse dot product of one query against every document."""
+    dense_query = np.zeros(vocab_size, dtype=np.float32)
+    dense_query[query.indices] = query.values
+    return np.array([float(dense_query[doc.indices] @ doc.values) for doc in documents], dtype=np.float32)
+
+def read_lines(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="File with one query per line")
+    parser.add_argument("documents", help="File with one document per line")
+    parser.add_argument("--k", type=int, default=10, help="Cutoff for recall@k")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    engine = EmbeddingEngine()
+    encode = lambda texts: [
+        vector
+        for start in range(0, len(texts), args.batch_size)
+        for vector in engine.encode_sparse(texts[start:start + args.batch_size])
+    ]
+    queries = encode(read_lines(args.queries))
+    documents = encode(read_lines(args.documents))
+    vocab_size = 1 + max(int(vector.indices.max()) for vector in queries + documents if len(vector))
+    k = min(args.k, len(documents))
+
+    reference = [np.argsort(-score_documents(query, documents, vocab_size))[:k] for query in queries]
+
+    print(f"Queries: {len(queries)}  Documents: {len(documents)}  recall@{k}")
+    print(f"{'top_k':>6} {'min_w':>6} {'terms':>7} {'prune+ser us':>13} {'json B':>8} {'binary B':>9} {'recall':>7}")
+
+    for top_k, min_weight in LEVELS:
+        terms, timings, json_sizes, binary_sizes, recalls = [], [], [], [], []
+        for query, expected in zip(queries, reference):
+            start = time.perf_counter()
+            pruned = prune_sparse_vector(query.indices, query.values, top_k=top_k, min_weight=min_weight)
+            payload = pruned.to_bytes()
+            timings.append(time.perf_counter() - start)
+
+            terms.append(len(pruned))
+            binary_sizes.append(len(payload))
+            json_sizes.append(len(json.dumps({"indices": pruned.indices.tolist(), "values": pruned.values.tolist()})))
+
+            found = np.argsort(-score_documents(pruned, documents, vocab_size))[:k]
+            recalls.append(len(set(found.tolist()) & set(expected.tolist())) / k)
+
+        print(
+            f"{str(top_k):>6} {min_weight:>6.2f} {statistics.mean(terms):>7.1f} "
+            f"{statistics.mean(timings) * 1e6:>13.1f} {statistics.mean(json_sizes):>8.0f} "
+            f"{statistics.mean(binary_sizes):>9.0f} {statistics.mean(recalls):>7.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Build the local hybrid index of a knowledge collection for `retrieval.mode = "local"`.
+
+Reads one JSON object per line, embeds the text field with the same dense (e5) and sparse
+(SPLADE) models the service loads, and writes the memory-mapped index to
+`<index-dir>/<collection>/`. Every field except the ID becomes the point payload, so the
+text field must match the payload key `rrf` reads ("text").
+
+Documents are embedded with the e5 "passage: " prefix and queries will be embedded with
+"query: "; document sparse vectors are kept unpruned.
+
+Usage:
+    python -m scripts.build_local_index medical_knowledge documents.jsonl --index-dir local_index
+"""
+import json
+import time
+import argparse
+import numpy as np
+from app.utils.text_processing import (
+    SparseEmbedding,
+    splade_vectors,
+    build_local_index,
+    get_dense_embedder,
+    get_sparse_embedder_and_tokenizer
+)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("collection", help="Collection name, as passed to call_hybrid_search")
+    parser.add_argument("documents", help="JSONL file with one document per line")
+    parser.add_argument("--index-dir", default="local_index")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    with open(args.documents, encoding="utf-8") as f:
+        documents = [json.loads(line) for line in f if line.strip()]
+    ids = [document.pop(args.id_field, row) for row, document in enumerate(documents)]
+    texts = [document[args.text_field] for document in documents]
+
+    dense_embedder = get_dense_embedder()
+    tokenizer, sparse_embedder = get_sparse_embedder_and_tokenizer()
+
+    start_time = time.perf_counter()
+    dense_vectors, sparse_vectors = [], []
+    for start in range(0, len(texts), args.batch_size):
+        batch = texts[start:start + args.batch_size]
+        dense_vectors.append(dense_embedder.encode([f"passage: {text}" for text in batch], convert_to_numpy=True))
+        for row in splade_vectors(tokenizer, sparse_embedder, batch):
+            indices = np.flatnonzero(row)
+            sparse_vectors.append(SparseEmbedding(indices, row[indices]))
+        print(f"Embedded {min(start + args.batch_size, len(texts))}/{len(texts)} documents", end="\r")
+
+    dim = dense_embedder.get_sentence_embedding_dimension()
+    build_local_index(
+        directory=f"{args.index_dir}/{args.collection}",
+        ids=ids,
+        payloads=documents,
+        dense_vectors=np.concatenate(dense_vectors) if dense_vectors else np.empty((0, dim), dtype=np.float32),
+        sparse_vectors=sparse_vectors,
+        vocab_size=len(tokenizer),
+        query_prefix="query: "
+    )
+    terms = sum(len(vector) for vector in sparse_vectors)
+    print(f"\nIndexed {len(ids)} documents ({terms} sparse postings) in {time.perf_counter() - start_time:.1f} s")
+
+if __name__ == "__main__":
+    main()
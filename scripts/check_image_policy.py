@@ -0,0 +1,96 @@
+"""
+Check that converted images respect each model's image policy.
+
+Runs synthetic inputs (a 12 MP phone photo with an EXIF rotation, a transparent PNG
+screenshot, a small image that must not be upscaled) through `convert_to_dspy_image` for the
+default policy and every per-model override in the "image_policy" section of the LLM config,
+then decodes the output and verifies its long edge, format, EXIF and alpha channel. Prints
+bytes before and after and exits non-zero if any check fails.
+
+Usage:
+    python -m scripts.check_image_policy                      # policy from the "llm" config in Redis
+    python -m scripts.check_image_policy --config policy.json # policy from a JSON file
+"""
+import io
+import sys
+import json
+import base64
+import asyncio
+import argparse
+import numpy as np
+from PIL import Image as PILImage
+from app.utils.image_processing import ImagePolicy, convert_to_dspy_image
+
+def make_inputs() -> dict:
+    """Synthetic inputs as raw encoded bytes, keyed by name."""
+    rng = np.random.default_rng(0)
+    inputs = {}
+
+    photo = PILImage.fromarray(rng.integers(0, 255, (3024, 4032, 3), dtype=np.uint8))
+    exif = photo.getexif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=90, exif=exif)
+    inputs["photo_4032x3024_exif"] = buffer.getvalue()
+
+    screenshot = PILImage.fromarray(rng.integers(0, 255, (1600, 2560, 4), dtype=np.uint8), mode="RGBA")
+    buffer = io.BytesIO()
+    screenshot.save(buffer, format="PNG")
+    inputs["screenshot_2560x1600_rgba"] = buffer.getvalue()
+
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (320, 240), (40, 120, 200)).save(buffer, format="JPEG")
+    inputs["small_320x240"] = buffer.getvalue()
+    return inputs
+
+def check(policy: ImagePolicy, data: bytes, output: PILImage.Image) -> list:
+    """Return the list of policy violations of one converted image."""
+    errors = []
+    if policy.max_long_edge and max(output.size) > policy.max_long_edge:
+        errors.append(f"long edge {max(output.size)} > {policy.max_long_edge}")
+    if output.format != policy.format:
+        errors.append(f"format {output.format} != {policy.format}")
+    if policy.strip_exif and output.getexif():
+        errors.append("EXIF not stripped")
+    if (policy.strip_alpha or policy.format == "JPEG") and output.mode in ("RGBA", "LA", "PA"):
+        errors.append(f"alpha not stripped (mode {output.mode})")
+    source = PILImage.open(io.BytesIO(data))
+    if max(output.size) > max(source.size):
+        errors.append("image was upscaled")
+    return errors
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", help="JSON file with the image_policy section (default: the 'llm' config in Redis)")
+    args = parser.parse_args()
+
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config, default_model = json.load(f), None
+    else:
+        from app.api.database.redis_client import get_config
+        llm_config = get_config("llm")
+        config, default_model = llm_config.get("image_policy", {}), llm_config.get("model")
+
+    models = list(dict.fromkeys([default_model, *config.get("models", {})]))
+    inputs = make_inputs()
+    failures = 0
+
+    print(f"{'model':<40} {'input':<28} {'size':>11} {'KB before':>10} {'KB after':>9}  result")
+    for model in models:
+        policy = ImagePolicy(config=config, model=model)
+        for name, data in inputs.items():
+            image = await convert_to_dspy_image(data, policy=policy)
+            encoded = base64.b64decode(image.url.split(",", 1)[1])
+            output = PILImage.open(io.BytesIO(encoded))
+            errors = check(policy, data, output)
+            failures += bool(errors)
+            size = f"{output.width}x{output.height}"
+            print(
+                f"{str(model):<40} {name:<28} {size:>11} {len(data) / 1024:>10.0f} {len(encoded) / 1024:>9.0f}  "
+                f"{'; '.join(errors) or 'ok'}"
+            )
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
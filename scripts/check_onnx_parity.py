@@ -0,0 +1,81 @@
+"""
+Parity checks between the eager PyTorch and quantized ONNX Runtime backends.
+
+Loads each local model on both backends and compares their outputs on the same prompts:
+- classifier: top-label agreement of the zero-shot pipelines
+- dense embedder: cosine similarity of e5 embeddings
+- sparse embedder: cosine similarity of full-vocabulary SPLADE vectors
+
+Exits with status 1 if any check falls below its threshold.
+
+Usage:
+    python -m scripts.check_onnx_parity prompts.txt --min-agreement 0.95 --min-cosine 0.98
+"""
+import sys
+import argparse
+import numpy as np
+from app.api.database.redis_client import get_config
+from app.models.task_classifier import load_zero_shot_pipeline
+from app.utils.text_processing import (
+    splade_vectors,
+    load_dense_embedder,
+    load_sparse_embedder_and_tokenizer
+)
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity of two 2-D arrays."""
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return (a * b).sum(axis=1)
+
+def check_classifier(prompts: list[str]) -> float:
+    labels = get_config("task_classifier")["candidate_labels"]
+    predictions = {}
+    for backend in ("torch", "onnx"):
+        classifier = load_zero_shot_pipeline(backend)
+        predictions[backend] = [result["labels"][0] for result in classifier(prompts, candidate_labels=labels)]
+    return float(np.mean([a == b for a, b in zip(predictions["torch"], predictions["onnx"])]))
+
+def check_dense(prompts: list[str]) -> np.ndarray:
+    texts = [f"query: {prompt}" for prompt in prompts]
+    torch_vectors = load_dense_embedder("torch").encode(texts, convert_to_numpy=True)
+    onnx_vectors = load_dense_embedder("onnx").encode(texts, convert_to_numpy=True)
+    return cosine(np.asarray(torch_vectors), np.asarray(onnx_vectors))
+
+def check_sparse(prompts: list[str]) -> np.ndarray:
+    torch_vectors = splade_vectors(*load_sparse_embedder_and_tokenizer("torch"), prompts)
+    onnx_vectors = splade_vectors(*load_sparse_embedder_and_tokenizer("onnx"), prompts)
+    return cosine(torch_vectors, onnx_vectors)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="File with one prompt per line")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    with open(args.prompts, encoding="utf-8") as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    if not prompts:
+        raise SystemExit("No prompts to check.")
+
+    failures = []
+
+    agreement = check_classifier(prompts)
+    print(f"classifier label agreement: {agreement:.1%}")
+    if agreement < args.min_agreement:
+        failures.append("classifier")
+
+    for name, check in (("dense", check_dense), ("sparse", check_sparse)):
+        similarities = check(prompts)
+        print(f"{name} cosine: mean {similarities.mean():.4f}, min {similarities.min():.4f}")
+        if similarities.min() < args.min_cosine:
+            failures.append(name)
+
+    if failures:
+        print(f"Parity FAILED for: {', '.join(failures)}")
+        sys.exit(1)
+    print("Parity OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Offline evaluation of the embedding/BART cascade classifier.
+
+Runs every prompt through the embedding stage and through zero-shot BART once, then replays
+the cascade decision for each margin threshold. Reports agreement with BART-only
+classification, how many prompts the embedding stage resolves, and the latency saved.
+
+Usage:
+    python -m scripts.evaluate_cascade_classifier prompts.txt --thresholds 0.02 0.05 0.1
+
+`prompts.txt` holds one prompt per line (already translated to English).
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from app.models import Classifier
+from app.api.database.redis_client import get_config
+
+async def evaluate(prompts: list[str], thresholds: list[float]) -> None:
+    config = get_config("task_classifier")
+    config["cascade"] = {**config.get("cascade", {}), "enabled": True}
+    classifier = Classifier(config=config)
+
+    # Warm both stages so the first prompt does not dominate the timings
+    await classifier.score_with_embeddings(prompts[0])
+    await classifier._classify_batch([prompts[0]])
+
+    rows = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        embedding_label, margin = await classifier.score_with_embeddings(prompt)
+        embedding_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bart_label = (await classifier._classify_batch([prompt]))[0]
+        bart_time = time.perf_counter() - start
+
+        rows.append((embedding_label, margin, embedding_time, bart_label, bart_time))
+
+    baseline = statistics.mean(row[4] for row in rows)
+    print(f"Prompts: {len(rows)}")
+    print(f"BART-only mean latency: {baseline * 1000:.1f} ms")
+    print(f"Embedding stage mean latency: {statistics.mean(row[2] for row in rows) * 1000:.1f} ms")
+    print()
+    print(f"{'threshold':>10} {'agreement':>10} {'embedding%':>11} {'mean ms':>9} {'saved%':>7}")
+
+    for threshold in thresholds:
+        agree, decided, latencies = 0, 0, []
+        for embedding_label, margin, embedding_time, bart_label, bart_time in rows:
+            if margin >= threshold:
+                label, latency = embedding_label, embedding_time
+                decided += 1
+            else:
+                label, latency = bart_label, embedding_time + bart_time
+            agree += label == bart_label
+            latencies.append(latency)
+
+        mean_latency = statistics.mean(latencies)
+        print(
+            f"{threshold:>10.3f} {agree / len(rows):>10.1%} {decided / len(rows):>11.1%} "
+            f"{mean_latency * 1000:>9.1f} {1 - mean_latency / baseline:>7.1%}"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="File with one prompt per line")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.0, 0.02, 0.05, 0.1, 0.2])
+    args = parser.parse_args()
+
+    with open(args.prompts, encoding="utf-8") as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    if not prompts:
+        raise SystemExit("No prompts to evaluate.")
+
+    asyncio.run(evaluate(prompts, args.thresholds))
+
+if __name__ == "__main__":
+    main()